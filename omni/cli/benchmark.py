@@ -1,10 +1,14 @@
 """cli commands related to benchmark infos and stats"""
 
+import asyncio
+
 from typing_extensions import Annotated
 
 import typer
 from packaging.version import Version
+import omni.io.diff
 import omni.io.files
+import omni.io.utils
 
 cli = typer.Typer(add_completion=False)
 
@@ -63,11 +67,35 @@ def diff_benchmark(
             help="version to compare with.",
         ),
     ],
+    endpoint: Annotated[
+        str,
+        typer.Option(
+            "--endpoint",
+            "-e",
+            help="remote/object storage.",
+        ),
+    ],
 ):
     """Show differences between 2 benchmark versions."""
     typer.echo(
         f"Found the following differences in {benchmark} for {version1} and {version2}."
     )
+    auth_options = {"endpoint": endpoint, "secure": endpoint.startswith("https")}
+    ss = omni.io.utils.get_storage("minio", auth_options, benchmark)
+    # listings are streamed, only the totals per group are kept
+    groups = omni.io.diff.summarize_diff(
+        omni.io.diff.diff_versions(ss, version1, version2)
+    )
+    if len(groups) == 0:
+        typer.echo("No differences.")
+        return
+    typer.echo(f"{'':<40} {'added':>16} {'removed':>16} {'changed':>16}")
+    for group, counts in groups.items():
+        columns = [
+            f"{counts.get(status, 0):>5} {omni.io.utils.sizeof_fmt(counts.get(f'{status}_bytes', 0)):>10}"
+            for status in ["added", "removed", "changed"]
+        ]
+        typer.echo(f"{group or '.':<40} {' '.join(columns)}")
 
 
 @cli.command("list")
@@ -83,15 +111,14 @@ def list_benchmarks(
 ):
     """List all available benchmarks and versions at a specific endpoint"""
     typer.echo(f"Available benchmarks at {endpoint}:")
-    benchmark_names = omni.io.files.get_benchmarks_public(endpoint)
-    benchmarks = {}
-    for benchmark in benchmark_names:
-        benchmarks[benchmark] = omni.io.files.get_benchmark_versions_public(
-            benchmark, endpoint
-        )
-    for key, value in sorted(benchmarks.items()):
-        value = (value or [None])[-1]
-        typer.echo(f"{key:>20}     latest: {value:>5}")
+
+    async def echo_benchmarks():
+        # benchmarks are printed as soon as their versions are retrieved
+        async for key, value in omni.io.files.iter_benchmark_versions_public(endpoint):
+            value = str((value or [None])[-1])
+            typer.echo(f"{key:>20}     latest: {value:>5}")
+
+    asyncio.run(echo_benchmarks())
 
 
 @cli.command("list versions")
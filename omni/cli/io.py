@@ -109,6 +109,63 @@ def download_files(
     )
 
 
+@cli.command("sync")
+def sync_files(
+    benchmark: Annotated[
+        str,
+        typer.Option(
+            "--benchmark",
+            "-b",
+            help="Path to benchmark yaml file or benchmark id.",
+        ),
+    ],
+    type: Annotated[
+        str,
+        typer.Option(
+            "--type",
+            "-t",
+            help="File types. Options: all, code, inputs, outputs, logs, performance.",
+        ),
+    ] = "all",
+    stage: Annotated[
+        str,
+        typer.Option(
+            "--stage",
+            "-s",
+            help="Stage to sync files from.",
+        ),
+    ] = None,
+    module: Annotated[
+        Optional[str],
+        typer.Option(
+            "--module",
+            "-m",
+            help="Module to sync files from.",
+        ),
+    ] = None,
+    file_id: Annotated[
+        Optional[List[str]],
+        typer.Option(
+            "--id",
+            "-i",
+            help="File id to sync.",
+        ),
+    ] = None,
+    delete: Annotated[
+        bool,
+        typer.Option(
+            "--delete",
+            help="Delete local files that were removed remotely.",
+        ),
+    ] = False,
+):
+    """Download new or changed files for a benchmark."""
+    typer.echo(
+        f"Sync {type} files for {benchmark} at stage {stage} from module {module}",
+        err=True,
+    )
+
+
 @cli.command("checksum")
 def checksum_files(
     benchmark: Annotated[
@@ -0,0 +1,468 @@
+"""Asynchronous MinIO class for remote storage."""
+
+import asyncio
+import base64
+import datetime
+import functools
+import hashlib
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, List, Union
+from urllib.parse import quote, urlsplit
+
+import aiohttp
+import minio.credentials
+import minio.signer
+import minio.time
+import yarl
+from lxml import etree
+from packaging.version import Version
+
+from omni.io.AsyncRemoteStorage import AsyncRemoteStorage
+from omni.io.listing import encode_query, list_objects_public_async
+from omni.io.MinIOStorage import (
+    MAX_SINGLE_COPY_SIZE,
+    UPLOAD_PARALLEL_PARTS,
+    UPLOAD_PART_SIZE,
+    endpoint_url,
+)
+from omni.io.session import client_session, is_retryable
+from omni.io.symlinks import SYMLINK_MANIFEST, merge_symlinks_async, read_manifest
+from omni.io.transfer import TransferPolicy
+from omni.io.utils import ETagVerifier, object_name
+
+logger = logging.getLogger(__name__)
+
+# maximum number of concurrent requests of a bulk operation (copy, upload, download)
+ASYNC_MAX_WORKERS = 16
+# region requests are signed for if none is given in the auth options
+DEFAULT_REGION = "us-east-1"
+# part size of multipart copies of objects above MAX_SINGLE_COPY_SIZE
+COPY_PART_SIZE = 512 * 1024**2
+# size of the chunks downloads are written in
+CHUNK_SIZE = 1024 * 1024
+# payloads are not part of the signature, their integrity is checked with Content-MD5
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+
+
+class AsyncMinIOStorage(AsyncRemoteStorage):
+    """
+    Asynchronous MinIO (S3 compatible) storage based on aiohttp, requests are signed with AWS signature V4.
+
+    Without `secret_key` in the auth options the storage is read-only and uses anonymous requests.
+
+    Attributes:
+    - session (aiohttp.ClientSession): The session, can be shared by many storages on one event loop.
+    - policy (TransferPolicy): The retry policy of requests.
+    - credentials (minio.credentials.Credentials): The credentials, None in read-only mode.
+    """
+
+    def __init__(
+        self,
+        auth_options: Dict,
+        benchmark: str,
+        session: aiohttp.ClientSession = None,
+        policy: TransferPolicy = None,
+    ):
+        super().__init__(auth_options, benchmark)
+        self.session = session
+        self._owns_session = session is None
+        self.policy = policy or TransferPolicy(retryable=is_retryable)
+        if "secret_key" in self.auth_options.keys():
+            self.credentials = minio.credentials.Credentials(
+                self.auth_options["access_key"],
+                self.auth_options["secret_key"],
+                self.auth_options.get("session_token"),
+            )
+        else:
+            self.credentials = None
+
+    async def connect(self) -> None:
+        if self.session is None:
+            self.session = client_session()
+        await self._get_versions()
+
+    async def close(self) -> None:
+        if self._owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def _is_readonly(self, readonly: bool = False) -> bool:
+        return self.credentials is None or readonly
+
+    def _url(self, bucket: Union[None, str] = None, key: Union[None, str] = None):
+        url = endpoint_url(self.auth_options)
+        if bucket is None:
+            return f"{url}/"
+        if key is None:
+            return f"{url}/{bucket}"
+        return f"{url}/{bucket}/{quote(key, safe='/-_.~')}"
+
+    def _sign(self, method: str, url: str, headers: Union[None, Dict] = None) -> Dict:
+        """
+        Signs a request (AWS signature V4).
+
+        Args:
+            method (str): The http method.
+            url (str): The url, with encoded query.
+            headers (dict, optional): Additional headers to sign. Defaults to None.
+
+        Returns:
+            dict: The headers of the signed request.
+        """
+        headers = dict(headers or {})
+        if self.credentials is None:
+            return headers
+        url = urlsplit(url)
+        date = minio.time.utcnow()
+        headers["Host"] = url.netloc
+        headers["x-amz-content-sha256"] = UNSIGNED_PAYLOAD
+        headers["x-amz-date"] = minio.time.to_amz_date(date)
+        if self.credentials.session_token:
+            headers["X-Amz-Security-Token"] = self.credentials.session_token
+        return minio.signer.sign_v4_s3(
+            method=method,
+            url=url,
+            region=self.auth_options.get("region", DEFAULT_REGION),
+            headers=headers,
+            credentials=self.credentials,
+            content_sha256=UNSIGNED_PAYLOAD,
+            date=date,
+        )
+
+    async def _request(
+        self,
+        method: str,
+        bucket: Union[None, str] = None,
+        key: Union[None, str] = None,
+        params: Union[None, Dict] = None,
+        headers: Union[None, Dict] = None,
+        data: Union[None, bytes] = None,
+        readonly: bool = False,
+    ):
+        """
+        Sends a request with retries, see `policy`.
+
+        Returns:
+            tuple: The response headers and body.
+
+        Raises:
+            aiohttp.ClientResponseError: If the request failed, with the S3 error code as message.
+        """
+        url = self._url(bucket, key)
+        if params is not None:
+            url = f"{url}?{encode_query(params)}"
+        headers = dict(headers or {})
+        if data is not None:
+            headers["Content-MD5"] = base64.b64encode(
+                hashlib.md5(data).digest()
+            ).decode()
+
+        async def request(hedged):
+            if self._is_readonly(readonly):
+                signed = headers
+            else:
+                signed = self._sign(method, url, headers)
+            async with self.session.request(
+                method, yarl.URL(url, encoded=True), headers=signed, data=data
+            ) as response:
+                body = await response.read()
+                # copies and completed multipart uploads can fail after a 200 status
+                check_body = method == "POST" or "x-amz-copy-source" in headers
+                if response.status >= 400 or (check_body and b"<Error>" in body[:256]):
+                    raise aiohttp.ClientResponseError(
+                        response.request_info,
+                        response.history,
+                        status=response.status if response.status >= 400 else 500,
+                        message=_find_text(body, "Code") or response.reason,
+                        headers=response.headers,
+                    )
+                return response.headers, body
+
+        return await self.policy.run(request, hedge=False)
+
+    async def _get_versions(self, readonly: bool = False) -> None:
+        if self._is_readonly(readonly):
+            url = self._url(f"{self.benchmark}.overview")
+            allversions = [
+                obj["key"] async for obj in list_objects_public_async(self.session, url)
+            ]
+            pattern = "(\\d+).(\\d+)"
+            test_pattern = "test.(\\d+)"
+        else:
+            _, body = await self._request("GET")
+            allversions = [
+                element.text for element in etree.fromstring(body).iter("{*}Name")
+            ]
+            pattern = f"{self.benchmark}.(\\d+).(\\d+)"
+            test_pattern = f"{self.benchmark}.test.(\\d+)"
+        versions = list()
+        other_versions = list()
+        for version in allversions:
+            if re.match(pattern, version):
+                versions.append(Version(".".join(version.split(".")[-2:])))
+            elif re.match(test_pattern, version):
+                other_versions.append(".".join(version.split(".")[-2:]))
+        self.versions = versions
+        self.other_versions = other_versions
+
+    def _containername(self, version: Union[None, Version] = None) -> str:
+        if version is None:
+            version = self.version
+        if version is None:
+            raise ValueError("No version provided")
+        return f"{self.benchmark}.{version.major}.{version.minor}"
+
+    async def _iter_objects(self, readonly=False, version=None):
+        containername = self._containername(version)
+        links = await self._get_symlinks(containername, readonly)
+        sign = None
+        if not self._is_readonly(readonly):
+            sign = self._sign
+        objects = list_objects_public_async(
+            self.session, self._url(containername), sign=sign
+        )
+        async for obj in merge_symlinks_async(objects, links):
+            yield obj.pop("key"), obj
+
+    async def _get_symlinks(self, containername: str, readonly: bool = False):
+        try:
+            _, body = await self._request(
+                "GET", containername, SYMLINK_MANIFEST, readonly=readonly
+            )
+        except aiohttp.ClientResponseError as e:
+            if e.status == 404:
+                # no symlinks in this version
+                return []
+            raise
+        return list(read_manifest([body]))
+
+    async def get_meta(self, name, version=None):
+        headers, _ = await self._request("HEAD", self._containername(version), name)
+        mtime = headers.get("X-Amz-Meta-Mtime", headers.get("X-Object-Meta-Mtime"))
+        if mtime is not None:
+            mtime = datetime.datetime.fromtimestamp(float(mtime), datetime.timezone.utc)
+        return {
+            "hash": headers.get("ETag", "").replace('"', ""),
+            "size": int(headers.get("Content-Length", 0)),
+            "last_modified": headers.get("Last-Modified"),
+            "x-object-meta-mtime": mtime,
+        }
+
+    def _source(self, filename: str, version: Union[None, Version] = None):
+        # bucket and key an object is stored at, following symlinks
+        record = self.files.get(filename)
+        if record is not None and record["symlink_path"]:
+            return record["symlink_path"].split("/", 1)
+        return self._containername(version), filename
+
+    async def copy_objects(self, filenames=None, max_workers=ASYNC_MAX_WORKERS):
+        if self.version is None or self.version_new is None:
+            raise ValueError("No version provided")
+        if self.credentials is None:
+            raise ValueError("Copying objects requires credentials")
+        if filenames is None:
+            if len(self.files) == 0:
+                await self._get_objects()
+            filenames = list(self.files.keys())
+        return await _run_bounded(self._copy_object, filenames, max_workers, "Copying")
+
+    async def _copy_object(self, filename: str) -> None:
+        bucket, source = self._source(filename)
+        bucket_new = self._containername(self.version_new)
+        copy_source = quote(f"/{bucket}/{source}", safe="/-_.~")
+        if filename in self.files:
+            size = int(self.files[filename]["size"])
+        else:
+            size = (await self.get_meta(filename))["size"]
+        if size <= MAX_SINGLE_COPY_SIZE:
+            await self._request(
+                "PUT", bucket_new, filename, headers={"x-amz-copy-source": copy_source}
+            )
+            return
+
+        # objects above the single copy limit are copied part-wise, keep user metadata
+        headers, _ = await self._request("HEAD", bucket, source)
+        metadata = {
+            key: value
+            for key, value in headers.items()
+            if key.lower().startswith("x-amz-meta-")
+        }
+
+        async def copy_part(upload_id, number, start):
+            end = min(start + COPY_PART_SIZE, size) - 1
+            _, body = await self._request(
+                "PUT",
+                bucket_new,
+                filename,
+                params={"partNumber": str(number), "uploadId": upload_id},
+                headers={
+                    "x-amz-copy-source": copy_source,
+                    "x-amz-copy-source-range": f"bytes={start}-{end}",
+                },
+            )
+            return _find_text(body, "ETag")
+
+        parts = [
+            functools.partial(copy_part, start=start)
+            for start in range(0, size, COPY_PART_SIZE)
+        ]
+        await self._multipart(bucket_new, filename, metadata, parts)
+
+    async def upload_files(
+        self, filenames, max_workers=ASYNC_MAX_WORKERS, part_size=UPLOAD_PART_SIZE
+    ):
+        if self.credentials is None:
+            raise ValueError("Uploading files requires credentials")
+        bucket = self._containername()
+        # invalid object names fail the call before anything is uploaded
+        for filename in filenames:
+            object_name(filename)
+        upload = functools.partial(self._upload_file, bucket, part_size=part_size)
+        return await _run_bounded(upload, filenames, max_workers, "Uploading")
+
+    async def _upload_file(self, bucket: str, filename: str, part_size: int) -> None:
+        size = os.path.getsize(filename)
+        name = object_name(filename)
+        metadata = {"x-amz-meta-mtime": str(os.path.getmtime(filename))}
+        if size <= part_size:
+            data = await asyncio.to_thread(_read, filename, 0, size)
+            await self._request("PUT", bucket, name, headers=metadata, data=data)
+            return
+
+        async def upload_part(upload_id, number, offset):
+            data = await asyncio.to_thread(_read, filename, offset, part_size)
+            headers, _ = await self._request(
+                "PUT",
+                bucket,
+                name,
+                params={"partNumber": str(number), "uploadId": upload_id},
+                data=data,
+            )
+            return headers["ETag"]
+
+        parts = [
+            functools.partial(upload_part, offset=offset)
+            for offset in range(0, size, part_size)
+        ]
+        await self._multipart(bucket, name, metadata, parts)
+
+    async def _multipart(
+        self,
+        bucket: str,
+        key: str,
+        headers: Dict,
+        parts: List[Callable[..., Awaitable[str]]],
+    ) -> None:
+        """
+        Runs a multipart upload, aborting it if a part fails.
+
+        Args:
+            bucket (str): The bucket.
+            key (str): The object name.
+            headers (dict): The headers of the object, e.g. metadata.
+            parts (list): Coroutine functions sending a part given upload id and part number, returning its ETag.
+        """
+        _, body = await self._request(
+            "POST", bucket, key, params={"uploads": ""}, headers=headers
+        )
+        upload_id = _find_text(body, "UploadId")
+        etags = dict()
+
+        async def send(number):
+            etags[number] = await parts[number - 1](upload_id, number)
+
+        try:
+            failed = await _run_bounded(
+                send, range(1, len(parts) + 1), UPLOAD_PARALLEL_PARTS, "Sending part"
+            )
+            if len(failed) > 0:
+                raise Exception(f"Parts {failed} of {bucket}/{key} failed")
+            complete = "".join(
+                f"<Part><PartNumber>{number}</PartNumber><ETag>{etags[number]}</ETag></Part>"
+                for number in sorted(etags.keys())
+            )
+            await self._request(
+                "POST",
+                bucket,
+                key,
+                params={"uploadId": upload_id},
+                data=f"<CompleteMultipartUpload>{complete}</CompleteMultipartUpload>".encode(),
+            )
+        except BaseException:
+            try:
+                await self._request(
+                    "DELETE", bucket, key, params={"uploadId": upload_id}
+                )
+            except Exception as e:
+                logger.error(f"Aborting upload of {bucket}/{key} failed: {e}")
+            raise
+
+    async def download_files(self, filenames, max_workers=ASYNC_MAX_WORKERS):
+        return await _run_bounded(
+            self._download_file, filenames, max_workers, "Downloading"
+        )
+
+    async def _download_file(self, filename: str) -> None:
+        bucket, source = self._source(filename)
+        url = self._url(bucket, source)
+        part = f"{filename}.part"
+
+        async def request(hedged):
+            headers = None if self._is_readonly() else self._sign("GET", url)
+            async with self.session.get(
+                yarl.URL(url, encoded=True), headers=headers
+            ) as response:
+                response.raise_for_status()
+                size = response.headers.get("Content-Length")
+                verifier = ETagVerifier(
+                    response.headers.get("ETag", ""),
+                    int(size) if size is not None else None,
+                )
+                Path(filename).parent.mkdir(parents=True, exist_ok=True)
+                with open(part, "wb") as file:
+                    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                        file.write(chunk)
+                        verifier.update(chunk)
+            if not verifier.verify():
+                os.remove(part)
+                raise ValueError(f"MD5 checksum failed for {filename}")
+            os.replace(part, filename)
+
+        await self.policy.run(request, hedge=False)
+
+
+async def _run_bounded(
+    func: Callable[..., Awaitable], items: Iterable, max_workers: int, action: str
+) -> List:
+    # a fixed number of workers share one iterator, instead of a task per item
+    items = list(items)
+    iterator = iter(items)
+    failed = list()
+
+    async def worker():
+        for item in iterator:
+            try:
+                await func(item)
+            except Exception as e:
+                logger.error(f"{action} {item} failed: {e}")
+                failed.append(item)
+
+    await asyncio.gather(*[worker() for _ in range(min(max_workers, len(items)))])
+    return failed
+
+
+def _read(filename: str, offset: int, size: int) -> bytes:
+    with open(filename, "rb") as file:
+        file.seek(offset)
+        return file.read(size)
+
+
+def _find_text(body: bytes, tag: str) -> Union[None, str]:
+    # text of the first element with the tag in an S3 xml response, ignoring namespaces
+    match = re.search(rf"<{tag}>(.*?)</{tag}>".encode(), body, re.DOTALL)
+    if match is None:
+        return None
+    return match.group(1).decode().replace("&quot;", '"')
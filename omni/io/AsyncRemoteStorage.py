@@ -0,0 +1,207 @@
+"""Base class for asynchronous remote storage."""
+
+from abc import ABCMeta, abstractmethod
+from typing import AsyncIterator, Dict, List, Tuple, Union
+
+from packaging.version import Version
+
+from omni.io.index import FileIndex
+from omni.io.RemoteStorage import RemoteStorage
+
+
+class AsyncRemoteStorage(metaclass=ABCMeta):
+    """
+    A class representing a remote storage accessed asynchronously, the asyncio sibling of `RemoteStorage`.
+
+    All operations are coroutines, so the storage operations of many benchmarks can run on one event loop.
+    Use as async context manager, or call `connect` and `close`.
+
+    Attributes:
+    - version (Version): The current version of the benchmark.
+    - version_new (Version): The new version of the benchmark.
+    - versions (list): A list of versions.
+    - other_versions (list): A list of other (non standard, such as tests) versions.
+    - files (FileIndex): The file records of the objects of the current version by name.
+    - benchmark (str): The current benchmark.
+    - auth_options (dict): The authentication options.
+
+    Methods:
+    - __init__(auth_options, benchmark): Initializes the AsyncRemoteStorage object.
+    - connect(): Connects to the remote storage and retrieves the versions.
+    - close(): Closes the connection.
+    - _get_versions(readonly): Retrieves the available versions of the current benchmark.
+    - set_current_version(version): Sets the current version of the benchmark.
+    - set_new_version(version): Sets the new version of the benchmark.
+    - _iter_objects(readonly, version): Iterates over the objects of a version, sorted by name.
+    - _get_objects(readonly): Retrieves the objects of the current version.
+    - get_meta(name, version): Retrieves the metadata of an object.
+    - copy_objects(filenames): Copies objects from the current to the new version.
+    - upload_files(filenames): Uploads local files to the current version.
+    - download_files(filenames): Downloads objects of the current version.
+    """
+
+    def __init__(self, auth_options: Dict, benchmark: str):
+        self.version = None
+        self.version_new = None
+        self.versions = list()
+        self.other_versions = list()
+        self.files = FileIndex()
+        self._parse_benchmark(benchmark)
+        self._parse_auth_options(auth_options)
+
+    # validated like the synchronous storages
+    _parse_benchmark = RemoteStorage._parse_benchmark
+    _parse_auth_options = RemoteStorage._parse_auth_options
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    @abstractmethod
+    async def connect(self) -> None:
+        """
+        Connects to the storage service and retrieves the versions of the benchmark.
+        """
+        NotImplementedError
+
+    @abstractmethod
+    async def close(self) -> None:
+        """
+        Closes the connection to the storage service.
+        """
+        NotImplementedError
+
+    @abstractmethod
+    async def _get_versions(self, readonly: bool = False) -> None:
+        """
+        Retrieves the benchmark versions in the remote storage.
+
+        Args:
+            readonly (bool, optional): Whether to retrieve the versions in read-only mode. Defaults to False.
+        """
+        NotImplementedError
+
+    def set_current_version(self, version: Union[None, str] = None) -> None:
+        """
+        Sets the current version, the versions must have been retrieved (see `connect`).
+
+        Args:
+            version (None or str, optional): The version number as a string. Defaults to None which sets the latest version.
+
+        Raises:
+            ValueError: If version does not exist in the available versions.
+        """
+        if version is None:
+            if len(self.versions) == 0:
+                raise ValueError(f"No versions found in {self.benchmark}")
+            self.version = max(self.versions)
+            return
+        version = Version(version)
+        if version not in self.versions:
+            raise ValueError(f"Version {version} not found in {self.benchmark}")
+        self.version = version
+
+    def set_new_version(self, version_new: Union[None, str] = None) -> None:
+        """
+        Sets the new version, the versions must have been retrieved (see `connect`).
+
+        Args:
+            version_new (None or str, optional): The version number of the new version. Defaults to None which increments the minor version of the latest version.
+
+        Raises:
+            ValueError: If the version is not newer than all existing versions.
+        """
+        if version_new is None:
+            latest = max(self.versions)
+            self.version_new = Version(f"{latest.major}.{latest.minor + 1}")
+            return
+        version_new = Version(version_new)
+        if len(self.versions) > 0 and version_new <= max(self.versions):
+            raise ValueError(f"Version {version_new} not newest version")
+        self.version_new = version_new
+
+    @abstractmethod
+    def _iter_objects(
+        self, readonly: bool = False, version: Union[None, Version] = None
+    ) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Iterates over the objects of a version as they are listed, sorted by name.
+
+        Args:
+            readonly (bool, optional): Whether to list the objects in read-only mode. Defaults to False.
+            version (Version, optional): The version to list. Defaults to None which lists the current version.
+
+        Yields:
+            tuple: The object name and its file record.
+        """
+        NotImplementedError
+
+    async def _get_objects(self, readonly: bool = False) -> None:
+        """
+        Retrieves the objects of the current version and saves them in the `files` attribute.
+
+        Args:
+            readonly (bool, optional): Whether to retrieve the objects in read-only mode. Defaults to False.
+        """
+        self.files = FileIndex(
+            [(name, record) async for name, record in self._iter_objects(readonly)]
+        )
+
+    @abstractmethod
+    async def get_meta(self, name: str, version: Union[None, Version] = None) -> Dict:
+        """
+        Retrieves the metadata of an object without downloading it.
+
+        Args:
+            name (str): The object name.
+            version (Version, optional): The version of the object. Defaults to None which uses the current version.
+
+        Returns:
+            dict: The `hash`, `size`, `last_modified` and `x-object-meta-mtime` (None if not set) of the object.
+        """
+        NotImplementedError
+
+    @abstractmethod
+    async def copy_objects(self, filenames: Union[None, List[str]] = None) -> List[str]:
+        """
+        Copies objects from the current version to the new version.
+
+        Args:
+            filenames (list, optional): The objects to copy. Defaults to None which copies all objects in `files`.
+
+        Returns:
+            list: The names of the objects that failed to copy.
+        """
+        NotImplementedError
+
+    @abstractmethod
+    async def upload_files(self, filenames: List[str]) -> List[str]:
+        """
+        Uploads local files to the current version.
+
+        Args:
+            filenames (list): The paths of the files, relative paths are used as object names.
+
+        Returns:
+            list: The names of the files that failed to upload.
+
+        Raises:
+            ValueError: If a path is absolute or outside the working directory.
+        """
+        NotImplementedError
+
+    @abstractmethod
+    async def download_files(self, filenames: List[str]) -> List[str]:
+        """
+        Downloads objects of the current version to local files named like the objects.
+
+        Args:
+            filenames (list): The object names.
+
+        Returns:
+            list: The names of the objects that failed to download.
+        """
+        NotImplementedError
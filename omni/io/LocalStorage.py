@@ -0,0 +1,544 @@
+"""Local filesystem class for storage."""
+
+import concurrent.futures
+import logging
+import os
+import re
+import shutil
+import stat
+import uuid
+from typing import Union
+
+from packaging.version import Version
+
+from omni.io.cache import HashCache, hash_cache_path
+from omni.io.index import FileIndex
+from omni.io.layout import match_output, walk_outputs
+from omni.io.RemoteStorage import RemoteStorage
+from omni.io.symlinks import (
+    MANIFEST_CHUNK_SIZE,
+    SYMLINK_MANIFEST,
+    merge_symlinks,
+    read_manifest,
+    write_manifest,
+)
+from omni.io.utils import md5, object_name
+
+try:
+    import fcntl
+except ImportError:
+    # no reflinks on this platform
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# ioctl cloning a file (reflink), not exposed by fcntl before python 3.12
+FICLONE = getattr(fcntl, "FICLONE", 0x40049409)
+# directory below the root holding files while they are written, renamed into place once complete
+TMP_DIR = ".tmp"
+# maximum number of files copied or uploaded in parallel
+LOCAL_COPY_MAX_WORKERS = 8
+# maximum number of files hashed in parallel while listing, hashing releases the GIL
+LOCAL_HASH_MAX_WORKERS = 8
+# key the checksums of stored files are kept under in the hash cache
+LOCAL_ETAG = "local"
+
+
+def clone_file(source: str, destination: str, hardlink: bool = True) -> str:
+    """
+    Copies a file without copying data where the filesystem allows it.
+
+    A reflink (copy-on-write clone) is tried first, then a hardlink, then a plain copy. The modification
+    time is kept. Hardlinks share the data with the source, they are only safe for files never modified in place.
+
+    Args:
+        source (str): The file to copy.
+        destination (str): The path of the copy, must not exist.
+        hardlink (bool, optional): Whether a hardlink may be created. Defaults to True.
+
+    Returns:
+        str: The method used, "reflink", "hardlink" or "copy".
+    """
+    if fcntl is not None:
+        try:
+            with open(source, "rb") as src, open(destination, "xb") as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            shutil.copystat(source, destination)
+            return "reflink"
+        except OSError:
+            # not supported by the filesystem, or across filesystems
+            if os.path.exists(destination):
+                os.remove(destination)
+    if hardlink:
+        try:
+            os.link(source, destination)
+            return "hardlink"
+        except OSError:
+            pass
+    shutil.copy2(source, destination)
+    return "copy"
+
+
+class LocalStorage(RemoteStorage):
+    """
+    Storage on a local (or shared, e.g. NFS or Lustre) filesystem, with the layout of the remote storages.
+
+    Each container (bucket) is a directory below the root and each object a file below its container, named
+    like the object. Files are written below TMP_DIR and renamed into place, so objects are never modified
+    in place and copies between versions can share their data (reflinks or hardlinks, see `clone_file`).
+    Symlinks to previous versions are kept in a symlink manifest, as on the remote storages.
+    Checksums (ETags) of the files are computed when first listed and kept in a `HashCache`.
+
+    Attributes:
+    - root (str): The root directory of the storage.
+    - containers (list): The names of all containers.
+    - hash_cache (str): The path of the checksum cache.
+    """
+
+    def __init__(self, auth_options, benchmark, hash_cache=hash_cache_path):
+        super().__init__(auth_options, benchmark)
+        if not "root" in self.auth_options.keys():
+            raise KeyError("root")
+        self.hash_cache = hash_cache
+        self.containers = list()
+        self.connect()
+        self._test_connect()
+        self._get_benchmarks(update=False)
+        if not benchmark in self.benchmarks:
+            logger.warning(
+                f"Benchmark {benchmark} does not exist, creating new benchmark."
+            )
+            self._create_benchmark(benchmark, update=False)
+        self._get_versions(update=False)
+
+    def connect(self):
+        """
+        Creates the root directory if needed.
+
+        Returns:
+        - The root directory.
+        """
+        self.root = os.path.abspath(os.path.expanduser(self.auth_options["root"]))
+        os.makedirs(os.path.join(self.root, TMP_DIR), exist_ok=True)
+        return self.root
+
+    def _test_connect(self) -> None:
+        self._get_containers()
+
+    def _get_containers(self) -> None:
+        self.containers = sorted(
+            entry.name
+            for entry in os.scandir(self.root)
+            if entry.is_dir() and not entry.name.startswith(".")
+        )
+
+    def _path(self, containername: str, name: Union[None, str] = None) -> str:
+        if name is None:
+            return os.path.join(self.root, containername)
+        parts = name.split("/")
+        # object names are relative to their container and never lead out of it
+        if name.startswith("/") or ".." in parts:
+            raise ValueError(f"Invalid object name {name}")
+        return os.path.join(self.root, containername, *parts)
+
+    def _tmp_path(self) -> str:
+        return os.path.join(self.root, TMP_DIR, uuid.uuid4().hex)
+
+    def _make_container(self, containername: str) -> None:
+        os.makedirs(self._path(containername), exist_ok=True)
+        if containername not in self.containers:
+            self.containers = sorted(self.containers + [containername])
+
+    def _put_empty(self, containername: str, name: str) -> None:
+        tmp_path = self._tmp_path()
+        open(tmp_path, "wb").close()
+        self._place(tmp_path, containername, name)
+
+    def _place(self, tmp_path: str, containername: str, name: str) -> None:
+        path = self._path(containername, name)
+        # a symlinked directory in the container could lead out of it
+        container = os.path.realpath(self._path(containername))
+        if os.path.commonpath([container, os.path.realpath(path)]) != container:
+            raise ValueError(f"Object {name} is outside of {containername}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+
+    def _clone(
+        self, source: str, containername: str, name: str, hardlink: bool = True
+    ) -> None:
+        tmp_path = self._tmp_path()
+        try:
+            clone_file(source, tmp_path, hardlink=hardlink)
+            self._place(tmp_path, containername, name)
+        except BaseException:
+            # never leave a partial copy behind
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def _get_benchmarks(self, update: bool = True) -> None:
+        if update:
+            self._get_containers()
+        benchmarks = list()
+        for con in self.containers:
+            # remove major and minor version from benchmark name
+            bm = "".join(con.split(".")[:-2])
+            if bm not in benchmarks and bm != "":
+                benchmarks.append(bm)
+        self.benchmarks = benchmarks
+
+    def _create_benchmark(self, benchmark, update=True):
+        if update:
+            self._get_benchmarks()
+        if benchmark in self.benchmarks:
+            raise ValueError("Benchmark already exists")
+        for containername in [
+            f"{benchmark}.test.1",
+            f"{benchmark}.overview",
+            f"{benchmark}.0.1",
+            "benchmarks",
+        ]:
+            self._make_container(containername)
+        self._get_benchmarks(update=False)
+        self._update_overview(cleanup=True, benchmark=benchmark)
+
+        # add benchmark to overview
+        self._put_empty("benchmarks", benchmark)
+
+    def _get_versions(self, update=True, readonly=False):
+        if update:
+            self._get_containers()
+        versions = list()
+        other_versions = list()
+        for con in self.containers:
+            if re.match(f"{self.benchmark}.(\\d+).(\\d+)", con):
+                versions.append(Version(".".join(con.split(".")[-2:])))
+            elif re.match(f"{self.benchmark}.test.(\\d+)", con):
+                other_versions.append(".".join(con.split(".")[-2:]))
+        self.versions = versions
+        self.other_versions = other_versions
+
+    def _update_overview(self, cleanup=True, benchmark=None):
+        if benchmark is None:
+            benchmark = self.benchmark
+        overview = self._path(f"{benchmark}.overview")
+        in_overview = {entry.name for entry in os.scandir(overview)}
+        available = set()
+        for con in self.containers:
+            if re.match(f"{benchmark}.(\\d+).(\\d+)$", con) or re.match(
+                f"{benchmark}.test.(\\d+)$", con
+            ):
+                available.add(".".join(con.split(".")[-2:]))
+        for name in sorted(available - in_overview):
+            self._put_empty(f"{benchmark}.overview", name)
+        if cleanup:
+            for name in sorted(in_overview - available):
+                os.remove(os.path.join(overview, name))
+
+    def _create_new_version(self):
+        if self.version_new is None:
+            raise ValueError("No version provided")
+        if self.version_new in self.versions:
+            raise ValueError("Version already exists")
+        self._make_container(
+            f"{self.benchmark}.{self.version_new.major}.{self.version_new.minor}"
+        )
+        self._get_versions(update=False)
+        self._update_overview()
+        if not self.version_new in self.versions:
+            raise ValueError("Version creation failed")
+
+    def _get_objects(
+        self, readonly=False, meta=True, cache=False, stage=None, module=None, root=""
+    ):
+        # the filesystem is listed directly, there is no listing cache
+        self.files = FileIndex(
+            self._iter_objects(
+                readonly=readonly, meta=meta, stage=stage, module=module, root=root
+            )
+        )
+
+    def _iter_objects(
+        self, readonly=False, meta=True, version=None, stage=None, module=None, root=""
+    ):
+        """
+        Iterates over the objects of a version, sorted by name.
+
+        The checksums of files not listed before are computed in parallel, the modification time of the
+        files is their `last_modified` time, so no metadata has to be retrieved separately.
+
+        Args:
+            readonly (bool, optional): Unused, the filesystem is listed directly. Defaults to False.
+            meta (bool, optional): Unused, the metadata is part of the listing. Defaults to True.
+            version (Version, optional): The version to list. Defaults to None which lists the current version.
+            stage (str, optional): Only list the outputs of this stage. Defaults to None.
+            module (str, optional): Only list the outputs of this module. Defaults to None.
+            root (str, optional): The directory of the outputs (see `omni.io.layout`). Defaults to "".
+
+        Yields:
+            tuple: The object name and its file record.
+        """
+        if version is None:
+            version = self.version
+        if version is None:
+            raise ValueError("No version provided")
+        containername = f"{self.benchmark}.{version.major}.{version.minor}"
+        if stage is not None or module is not None:
+            names = [
+                record["key"]
+                for record in walk_outputs(
+                    lambda prefix: self._list_level(containername, prefix),
+                    stage,
+                    module,
+                    root=root,
+                )
+            ]
+            links = (
+                link
+                for link in self._iter_symlinks(containername)
+                if match_output(link["key"], stage, module, root=root)
+            )
+        else:
+            names = sorted(
+                name for name in self._walk(containername) if name != SYMLINK_MANIFEST
+            )
+            links = self._iter_symlinks(containername)
+        objects = merge_symlinks(self._stat_objects(containername, names), links)
+        for obj in objects:
+            yield obj.pop("key"), obj
+
+    def _walk(self, containername):
+        root = self._path(containername)
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                yield object_name(
+                    os.path.relpath(os.path.join(dirpath, filename), root)
+                )
+
+    def _list_level(self, containername, prefix):
+        objects = list()
+        prefixes = list()
+        try:
+            entries = list(
+                os.scandir(self._path(containername, prefix.rstrip("/") or None))
+            )
+        except FileNotFoundError:
+            return objects, prefixes
+        for entry in entries:
+            if entry.is_dir():
+                prefixes.append(f"{prefix}{entry.name}/")
+            else:
+                objects.append({"key": f"{prefix}{entry.name}"})
+        return objects, prefixes
+
+    def _stat_objects(self, containername, names, max_workers=LOCAL_HASH_MAX_WORKERS):
+        records = list()
+        missing = list()
+        with HashCache(self.hash_cache) as hash_cache:
+            for name in names:
+                path = self._path(containername, name)
+                st = os.stat(path)
+                records.append(
+                    {
+                        "key": name,
+                        "hash": hash_cache.get(path, LOCAL_ETAG, st),
+                        "size": st.st_size,
+                        # epoch milliseconds
+                        "last_modified": st.st_mtime_ns // 1000000,
+                        "symlink_path": "",
+                    }
+                )
+                if records[-1]["hash"] is None:
+                    missing.append((records[-1], path, st))
+            with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+                for (record, path, st), digest in zip(
+                    missing, executor.map(md5, [path for _, path, _ in missing])
+                ):
+                    record["hash"] = digest
+                    hash_cache.put(path, LOCAL_ETAG, st, digest)
+        return records
+
+    def _iter_symlinks(self, containername, readonly=False):
+        """
+        Iterates over the symlinks of a container as stored in its symlink manifest.
+
+        Args:
+            containername (str): The name of the container.
+            readonly (bool, optional): Unused. Defaults to False.
+
+        Yields:
+            dict: A symlink record.
+        """
+        try:
+            file = open(self._path(containername, SYMLINK_MANIFEST), "rb")
+        except FileNotFoundError:
+            return
+        with file:
+            yield from read_manifest(iter(lambda: file.read(MANIFEST_CHUNK_SIZE), b""))
+
+    def copy_objects(self, type="copy", max_workers=LOCAL_COPY_MAX_WORKERS):
+        """
+        Copies the flagged objects from the current to the new version.
+
+        With type "copy" files are cloned (reflink, else hardlink, else copied, see `clone_file`) by a bounded
+        pool of threads, checksums are carried over. With type "symlink" the new version gets a symlink manifest.
+        The outcome is recorded per object in `files` (`copied` and on failure `copy_error`),
+        already copied objects are skipped.
+
+        Args:
+            type (str, optional): The type of copying to perform. Defaults to "copy".
+            max_workers (int, optional): The maximum number of concurrent copies. Defaults to LOCAL_COPY_MAX_WORKERS.
+
+        Returns:
+            list: The names of the objects that failed to copy.
+        """
+        if type not in ["copy", "symlink"]:
+            raise ValueError("Invalid type")
+        if self.version is None or self.version_new is None:
+            raise ValueError("No version provided")
+
+        failed = list()
+        if type == "copy":
+            copied = set(self.files.flagged("copied"))
+            filenames = [
+                filename
+                for filename in self.files.flagged("copy")
+                if filename not in copied
+            ]
+            with HashCache(self.hash_cache) as hash_cache:
+                with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+                    futures = {
+                        executor.submit(self._copy_object, filename): filename
+                        for filename in filenames
+                    }
+                    for future in concurrent.futures.as_completed(futures):
+                        filename = futures[future]
+                        try:
+                            path, st = future.result()
+                            hash_cache.put(
+                                path, LOCAL_ETAG, st, self.files[filename]["hash"]
+                            )
+                            self.files[filename]["copied"] = True
+                            self.files[filename].pop("copy_error", None)
+                        except Exception as e:
+                            logger.error(f"Copying {filename} failed: {e}")
+                            self.files[filename]["copied"] = False
+                            self.files[filename]["copy_error"] = str(e)
+                            failed.append(filename)
+        if type == "symlink":
+            filenames = self.files.flagged("copy")
+            try:
+                self._put_symlinks(self._symlinks(filenames))
+                for filename in filenames:
+                    self.files[filename]["copied"] = True
+                    self.files[filename].pop("copy_error", None)
+            except Exception as e:
+                logger.error(f"Writing symlinks failed: {e}")
+                for filename in filenames:
+                    self.files[filename]["copied"] = False
+                    self.files[filename]["copy_error"] = str(e)
+                failed.extend(filenames)
+        return failed
+
+    def _put_symlinks(self, links):
+        tmp_path = self._tmp_path()
+        with open(tmp_path, "wb") as file:
+            write_manifest(links, file)
+        self._place(
+            tmp_path,
+            f"{self.benchmark}.{self.version_new.major}.{self.version_new.minor}",
+            SYMLINK_MANIFEST,
+        )
+
+    def _copy_object(self, filename):
+        container_new = (
+            f"{self.benchmark}.{self.version_new.major}.{self.version_new.minor}"
+        )
+        # symlinks are materialized from the version they link to
+        container, source = self._source(filename)
+        self._clone(self._path(container, source), container_new, filename)
+        path = self._path(container_new, filename)
+        return path, os.stat(path)
+
+    def upload_files(self, filenames, max_workers=LOCAL_COPY_MAX_WORKERS):
+        """
+        Uploads local files to the current version.
+
+        Files are cloned (reflink, else copied, see `clone_file`) by a bounded pool of threads. Files are
+        never hardlinked, as the local files may be modified in place. The modification time is kept.
+
+        Args:
+            filenames (list): The paths of the files, relative paths are used as object names.
+            max_workers (int, optional): The maximum number of concurrent uploads. Defaults to LOCAL_COPY_MAX_WORKERS.
+
+        Returns:
+            list: The names of the files that failed to upload.
+
+        Raises:
+            ValueError: If a path is absolute or outside the working directory.
+        """
+        if self.version is None:
+            raise ValueError("No version provided")
+        container = f"{self.benchmark}.{self.version.major}.{self.version.minor}"
+        # invalid object names fail the call before anything is uploaded
+        for filename in filenames:
+            object_name(filename)
+
+        def upload(filename):
+            self._clone(filename, container, object_name(filename), hardlink=False)
+
+        failed = list()
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            futures = {
+                executor.submit(upload, filename): filename for filename in filenames
+            }
+            for future in concurrent.futures.as_completed(futures):
+                filename = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"Uploading {filename} failed: {e}")
+                    failed.append(filename)
+        return failed
+
+    def archive_version(self, version):
+        """
+        Archives a version by removing the write permissions of its directories.
+
+        No objects can be added, replaced or removed afterwards. The permissions of the files are kept, as
+        files can be hardlinked into other versions and share their permissions.
+
+        Args:
+            version (str): The version to archive.
+        """
+        version = Version(version)
+        if version not in self.versions:
+            raise ValueError(f"Version {version} not found in {self.benchmark}")
+        root = self._path(f"{self.benchmark}.{version.major}.{version.minor}")
+        write = stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
+        for dirpath, _, _ in os.walk(root, topdown=False):
+            os.chmod(dirpath, stat.S_IMODE(os.stat(dirpath).st_mode) & ~write)
+
+    def delete_version(self, version):
+        """
+        Deletes a version and removes it from the overview.
+
+        Args:
+            version (str): The version to delete.
+        """
+        version = Version(version)
+        if version not in self.versions:
+            raise ValueError(f"Version {version} not found in {self.benchmark}")
+        containername = f"{self.benchmark}.{version.major}.{version.minor}"
+        # archived versions are writable again, to remove their files
+        for dirpath, _, _ in os.walk(self._path(containername)):
+            os.chmod(dirpath, stat.S_IMODE(os.stat(dirpath).st_mode) | stat.S_IWUSR)
+        shutil.rmtree(self._path(containername))
+        self.containers = [con for con in self.containers if con != containername]
+        self._get_versions(update=False)
+        self._update_overview(cleanup=True)
+
+
+RemoteStorage.register(LocalStorage)
@@ -1,37 +1,83 @@
 """MinIO class for remote storage."""
 
+import collections
+import concurrent.futures
 import datetime
 import io
 import json
 import logging
+import os
 import re
+import tempfile
+import time
 from typing import Union
 from urllib.parse import urlparse
 
 import dateutil.parser
 import minio
+import minio.commonconfig
 import minio.deleteobjects
-import requests
-from bs4 import BeautifulSoup
+import minio.error
+import urllib3
 from packaging.version import Version
 
+from omni.io.cache import ListingCache, listing_fingerprint
+from omni.io.index import FileIndex, parse_timestamp
+from omni.io.layout import match_output, walk_outputs
+from omni.io.listing import list_objects_public
 from omni.io.RemoteStorage import RemoteStorage
 from omni.io.S3config import bucket_readonly_policy
+from omni.io.session import get_pool_manager, get_session
+from omni.io.symlinks import (
+    MANIFEST_CHUNK_SIZE,
+    SYMLINK_MANIFEST,
+    merge_symlinks,
+    read_manifest,
+    write_manifest,
+)
+from omni.io.transfer import ByteBudget, retry
+from omni.io.utils import object_name
 
 logging.basicConfig(level=logging.ERROR)
 logging.getLogger("requests").setLevel(logging.DEBUG)
 logging.getLogger("minio").setLevel(logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-
-def get_meta_mtime(preauthurl, containername, objectname):
+# maximum number of concurrent metadata (HEAD) requests
+META_MAX_WORKERS = 16
+# maximum number of concurrent server side copies
+COPY_MAX_WORKERS = 8
+# objects larger than this can not be copied with a single request (S3 limit)
+MAX_SINGLE_COPY_SIZE = 5 * 1024**3
+# maximum number of concurrent file uploads
+UPLOAD_MAX_WORKERS = 16
+# number of parts of a multipart upload sent in parallel
+UPLOAD_PARALLEL_PARTS = 2
+# part size of multipart uploads, files up to this size are sent with a single request
+UPLOAD_PART_SIZE = 16 * 1024**2
+# maximum number of bytes buffered by uploads in flight
+UPLOAD_MAX_INFLIGHT_BYTES = 1024**3
+# time in seconds loaded containers, benchmarks and versions are reused
+BUCKETS_TTL = 60
+# maximum number of concurrent requests updating the overview of a benchmark
+OVERVIEW_MAX_WORKERS = 8
+# maximum number of objects deleted with a single request (S3 limit)
+DELETE_BATCH_SIZE = 1000
+# errors worth retrying a transfer for
+RETRY_EXCEPTIONS = (minio.error.MinioException, urllib3.exceptions.HTTPError)
+
+
+def get_meta_mtime(preauthurl, containername, objectname, session=None):
     """
     Retrieves the metadata modification time and access time of a file from a MinIO storage.
 
+    Only the headers of the object are requested (HEAD), the content is not downloaded.
+
     Args:
         preauthurl (str): The pre-authenticated URL of the MinIO storage.
         containername (str): The name of the container where the file is stored.
         objectname (str): The name of the file.
+        session (requests.Session, optional): The session to use for the request. Defaults to None which uses the shared session.
 
     Returns:
         tuple: A tuple containing the file's metadata modification time and access time.
@@ -40,13 +86,20 @@ def get_meta_mtime(preauthurl, containername, objectname):
         requests.HTTPError: If the HTTP request to retrieve the file fails.
     """
     urlfile = f"{preauthurl}/{containername}/{objectname}"
-    response = requests.get(urlfile)
+    if session is None:
+        session = get_session()
+    response = session.head(urlfile)
     if response.ok:
         response_headers = response.headers
         if "X-Object-Meta-Mtime" in response_headers.keys():
             file_time = datetime.datetime.fromtimestamp(
                 float(response_headers["X-Object-Meta-Mtime"]), datetime.timezone.utc
             )
+        elif "X-Amz-Meta-Mtime" in response_headers.keys():
+            # mtime of objects uploaded with upload_files
+            file_time = datetime.datetime.fromtimestamp(
+                float(response_headers["X-Amz-Meta-Mtime"]), datetime.timezone.utc
+            )
         elif "X-Object-Meta-Last-Modified" in response_headers.keys():
             file_time = dateutil.parser.parse(
                 response_headers["X-Object-Meta-Last-Modified"]
@@ -59,33 +112,147 @@ def get_meta_mtime(preauthurl, containername, objectname):
         response.raise_for_status()
 
 
+def get_meta_mtimes(preauthurl, containername, objects, max_workers=META_MAX_WORKERS):
+    """
+    Retrieves the metadata modification and access times of many files concurrently.
+
+    HEAD requests are sent by a bounded pool of threads over the shared connection pool,
+    results are yielded in the order of `objects` while further requests are in flight.
+
+    Args:
+        preauthurl (str): The pre-authenticated URL of the MinIO storage.
+        containername (str): The name of the container where the files are stored.
+        objects (Iterable[dict]): Listing records with the object name as `key` and optionally a `symlink_path`.
+        max_workers (int, optional): The maximum number of concurrent requests. Defaults to META_MAX_WORKERS.
+
+    Yields:
+        tuple: The listing record and a tuple of the file's metadata modification time and access time.
+
+    Raises:
+        requests.HTTPError: If the HTTP request to retrieve a file fails.
+    """
+    session = get_session()
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+        pending = collections.deque()
+        for obj in objects:
+            if obj.get("symlink_path", ""):
+                # metadata of the linked object
+                container, objectname = obj["symlink_path"].split("/", 1)
+            else:
+                container, objectname = containername, obj["key"]
+            future = executor.submit(
+                get_meta_mtime, preauthurl, container, objectname, session
+            )
+            pending.append((obj, future))
+            # bound the number of queued requests, keep listing while they run
+            if len(pending) >= 4 * max_workers:
+                obj, future = pending.popleft()
+                yield obj, future.result()
+        while len(pending) > 0:
+            obj, future = pending.popleft()
+            yield obj, future.result()
+
+
+def endpoint_url(auth_options, containername=None):
+    """
+    Builds the url of the endpoint, or of a container, from the auth options.
+
+    The scheme is https unless `secure` is False, the default of `minio.Minio` used by `MinIOStorage.connect`.
+
+    Args:
+        auth_options (dict): The auth options with the `endpoint`, with or without scheme.
+        containername (str, optional): The name of the container. Defaults to None which returns the endpoint url.
+
+    Returns:
+        str: The url, without trailing slash.
+    """
+    endpoint = auth_options["endpoint"]
+    if "://" not in endpoint:
+        endpoint = f"http://{endpoint}"
+    scheme = "https" if auth_options.get("secure", True) else "http"
+    url = urlparse(endpoint)._replace(scheme=scheme).geturl().rstrip("/")
+    if containername is None:
+        return url
+    return f"{url}/{containername}"
+
+
 def set_bucket_public_readonly(client, bucket_name):
     policy = bucket_readonly_policy(bucket_name)
     client.set_bucket_policy(bucket_name, json.dumps(policy))
 
 
+class _LazyAttribute:
+    """
+    Attribute of a storage loaded on first access and reloaded once it is older than the storage's `ttl`.
+
+    Assigning the attribute stores the value with the current time, loaders assign the attributes they load.
+    """
+
+    def __init__(self, load):
+        self.load = load
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        entry = obj._lazy.get(self.name)
+        if entry is None or time.monotonic() - entry[1] > obj.ttl:
+            self.load(obj)
+            entry = obj._lazy[self.name]
+        return entry[0]
+
+    def __set__(self, obj, value):
+        obj._lazy[self.name] = (value, time.monotonic())
+
+
 class MinIOStorage(RemoteStorage):
-    def __init__(self, auth_options, benchmark):
+    """
+    Remote storage on MinIO (or another S3 compatible service).
+
+    Containers, benchmarks and versions are loaded on first access. They are all derived from a
+    single snapshot of the buckets (or the overview of the benchmark in read-only mode), which is
+    reused for `ttl` seconds or until `invalidate` is called. A read-only storage does not send
+    any request before data is needed.
+
+    Attributes:
+    - ttl (float): The time in seconds loaded containers, benchmarks and versions are reused.
+    - containers (list): The names of all buckets, empty in read-only mode.
+    - client (minio.Minio): The MinIO client, only with credentials.
+    - listing_cache (ListingCache): The local cache of object listings.
+    """
+
+    containers = _LazyAttribute(lambda self: self._get_containers())
+    benchmarks = _LazyAttribute(lambda self: self._get_benchmarks(update=False))
+    versions = _LazyAttribute(lambda self: self._get_versions(update=False))
+    other_versions = _LazyAttribute(lambda self: self._get_versions(update=False))
+
+    def __init__(self, auth_options, benchmark, ttl=BUCKETS_TTL):
+        self.ttl = ttl
+        self._lazy = dict()
         super().__init__(auth_options, benchmark)
-        self.containers = list()
+        if not "endpoint" in self.auth_options.keys():
+            raise KeyError("endpoint")
+        # nothing is loaded yet
+        self.invalidate()
+        self.listing_cache = ListingCache()
         if "access_key" in self.auth_options.keys():
             self.client = self.connect()
+            # the bucket snapshot all further state is derived from
             self._test_connect()
-            self._get_benchmarks()
 
             if not benchmark in self.benchmarks:
                 logger.warning(
                     f"Benchmark {benchmark} does not exist, creating new benchmark."
                 )
-                self._create_benchmark(benchmark)
-                self._get_containers()
-                self._get_benchmarks()
+                self._create_benchmark(benchmark, update=False)
 
-            self._get_versions()
-        else:
-            self._get_versions(readonly=True)
-            # read-only mode
-            pass
+    def invalidate(self) -> None:
+        """
+        Drops the loaded containers, benchmarks and versions, they are loaded again on next access.
+        """
+        self._lazy.clear()
 
     def connect(self):
         """
@@ -99,34 +266,43 @@ class MinIOStorage(RemoteStorage):
             and "access_key" in self.auth_options.keys()
             and "secret_key" in self.auth_options.keys()
         ):
+            # share connections with all other clients
+            options = {"http_client": get_pool_manager(), **self.auth_options}
             try:
-                return minio.Minio(**self.auth_options)
+                return minio.Minio(**options)
             except Exception as e:
-                tmp_auth_options = self.auth_options.copy()
-                url = urlparse(tmp_auth_options["endpoint"])
-                tmp_auth_options["endpoint"] = url.netloc
-                return minio.Minio(**tmp_auth_options)
+                url = urlparse(options["endpoint"])
+                options["endpoint"] = url.netloc
+                return minio.Minio(**options)
         else:
             raise ValueError("Invalid auth options")
 
     def _test_connect(self) -> None:
-        try:
-            _ = self.client.list_buckets()
-        except Exception as e:
-            raise e
+        self._get_containers()
 
     def _get_containers(self) -> None:
-        try:
-            containers = list()
-            for bucket in self.client.list_buckets():
-                containers.append(bucket.name)
-            self.containers = containers
-
-        except Exception as e:
-            logger.error(e.value)
+        if self._is_readonly():
+            # listing buckets requires credentials
+            self.containers = list()
+            return
+        self.containers = self._list_buckets()
+        # benchmarks and versions are derived from the new snapshot on next access
+        for name in ["benchmarks", "versions", "other_versions"]:
+            self._lazy.pop(name, None)
+
+    def _list_buckets(self):
+        return [bucket.name for bucket in self.client.list_buckets()]
+
+    def _add_containers(self, containers) -> None:
+        # record created buckets in the snapshot instead of listing all buckets again
+        self.containers = self.containers + [
+            con for con in containers if con not in self.containers
+        ]
+        for name in ["benchmarks", "versions", "other_versions"]:
+            self._lazy.pop(name, None)
 
     def _get_benchmarks(self, update: bool = True) -> None:
-        if len(self.containers) == 0 or update:
+        if update:
             self._get_containers()
         benchmarks = list()
         for con in self.containers:
@@ -137,44 +313,37 @@ class MinIOStorage(RemoteStorage):
         self.benchmarks = benchmarks
 
     def _create_benchmark(self, benchmark, update=True):
-        if len(self.benchmarks) == 0 or update:
+        if update:
             self._get_benchmarks()
         if benchmark in self.benchmarks:
             raise ValueError("Benchmark already exists")
         # create new version
-        self.client.make_bucket(bucket_name=f"{benchmark}.test.1")
-        set_bucket_public_readonly(self.client, f"{benchmark}.test.1")
-        if not self.client.bucket_exists(f"{benchmark}.test.1"):
-            raise Exception(f"Benchmark creation of {benchmark}.test.1 failed")
-        self.client.make_bucket(bucket_name=f"{benchmark}.overview")
-        set_bucket_public_readonly(self.client, f"{benchmark}.overview")
-        if not self.client.bucket_exists(f"{benchmark}.overview"):
-            raise Exception(f"Benchmark creation of {benchmark}.overview failed")
-
-        self.client.make_bucket(bucket_name=f"{benchmark}.0.1")
-        set_bucket_public_readonly(self.client, f"{benchmark}.0.1")
-        if not self.client.bucket_exists(f"{benchmark}.0.1"):
-            raise Exception(f"Benchmark creation of {benchmark}.0.1 failed")
+        self._make_bucket(f"{benchmark}.test.1")
+        self._make_bucket(f"{benchmark}.overview")
+        self._make_bucket(f"{benchmark}.0.1")
+        self._add_containers(
+            [f"{benchmark}.test.1", f"{benchmark}.overview", f"{benchmark}.0.1"]
+        )
         self._update_overview(cleanup=True)
 
         # add benchmark to overview
-        self.client.put_object("benchmarks", benchmark, io.BytesIO(b""), 0)
+        self._put_empty("benchmarks", benchmark)
+
+    def _make_bucket(self, bucket):
+        # new buckets are publicly readable
+        self.client.make_bucket(bucket_name=bucket)
+        set_bucket_public_readonly(self.client, bucket)
+        if not self.client.bucket_exists(bucket):
+            raise Exception(f"Benchmark creation of {bucket} failed")
 
     def _get_versions(self, update=True, readonly=False):
         if not "secret_key" in self.auth_options.keys() or readonly:
-            url = urlparse(f"{self.auth_options['endpoint']}/{self.benchmark}.overview")
-            if self.auth_options["secure"]:
-                url = url._replace(scheme="https")
-            else:
-                url = url._replace(scheme="http")
-            params = {"format": "xml"}
-            response = requests.get(url.geturl(), params=params)
-            if response.ok:
-                response_text = response.text
-            else:
-                response.raise_for_status()
-            soup = BeautifulSoup(response_text, "xml")
-            allversions = [obj.find("Key").text for obj in soup.find_all("Contents")]
+            allversions = [
+                obj["key"]
+                for obj in list_objects_public(
+                    self._public_url(f"{self.benchmark}.overview")
+                )
+            ]
             versions = list()
             other_versions = list()
             for version in allversions:
@@ -198,106 +367,88 @@ class MinIOStorage(RemoteStorage):
             self.versions = versions
             self.other_versions = other_versions
 
-    def _update_overview(self, cleanup=True):
-        # check versions in overview
-        all_versions_in_overview = []
-        for element in self.client.list_objects(f"{self.benchmark}.overview"):
-            all_versions_in_overview.append(element.object_name)
-
-        versions_in_overview = []
-        other_versions_in_overview = []
-        for v in all_versions_in_overview:
-            try:
-                versions_in_overview.append(Version(v))
-            except:
-                other_versions_in_overview.append(v)
-
-        # available benchmark versions
-        self._get_versions()
+    def _update_overview(self, cleanup=True, max_workers=OVERVIEW_MAX_WORKERS):
+        """
+        Updates the overview of versions of the benchmark.
 
-        # missing versions
-        versions_not_in_overview = [
-            v for v in self.versions if v not in versions_in_overview
-        ]
-        other_versions_not_in_overview = [
-            v for v in self.other_versions if v not in other_versions_in_overview
-        ]
+        The overview is listed once and compared with the available versions as sets. Missing versions
+        are added with concurrent requests and, with cleanup, unavailable versions are removed in
+        concurrent batches of DELETE_BATCH_SIZE. Failed requests are retried with backoff.
 
-        # create missing versions
-        for v in versions_not_in_overview:
-            result = self.client.put_object(
-                f"{self.benchmark}.overview", f"{v.major}.{v.minor}", io.BytesIO(b""), 0
-            )
-        for v in other_versions_not_in_overview:
-            result = self.client.put_object(
-                f"{self.benchmark}.overview", v, io.BytesIO(b""), 0
-            )
+        Args:
+            cleanup (bool, optional): Whether to remove versions that are not available from the overview. Defaults to True.
+            max_workers (int, optional): The maximum number of concurrent requests. Defaults to OVERVIEW_MAX_WORKERS.
 
-        # remove unavailable versions
-        if cleanup:
-            all_versions_in_overview = []
-            for element in self.client.list_objects(f"{self.benchmark}.overview"):
-                all_versions_in_overview.append(element.object_name)
-            versions_in_overview = []
-            other_versions_in_overview = []
-            for v in all_versions_in_overview:
+        Raises:
+            Exception: If adding or removing any version failed, listing all failures.
+        """
+        overview = f"{self.benchmark}.overview"
+        in_overview = {obj["key"] for obj in self._list_objects(overview)}
+        # available benchmark versions, from the bucket snapshot
+        self._get_versions(update=False)
+        available = {f"{v.major}.{v.minor}" for v in self.versions}
+        available.update(self.other_versions)
+
+        missing = sorted(available - in_overview)
+        unavailable = sorted(in_overview - available) if cleanup else []
+        errors = list()
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            futures = {
+                executor.submit(
+                    retry,
+                    self._put_empty,
+                    overview,
+                    name,
+                    exceptions=RETRY_EXCEPTIONS,
+                ): name
+                for name in missing
+            }
+            for i in range(0, len(unavailable), DELETE_BATCH_SIZE):
+                batch = unavailable[i : i + DELETE_BATCH_SIZE]
+                future = executor.submit(
+                    retry,
+                    self._remove_objects,
+                    overview,
+                    batch,
+                    exceptions=RETRY_EXCEPTIONS,
+                )
+                futures[future] = ", ".join(batch)
+            for future in concurrent.futures.as_completed(futures):
                 try:
-                    versions_in_overview.append(Version(v))
-                except:
-                    other_versions_in_overview.append(v)
-
-            versions_in_overview_but_unavailable = []
-            for v in versions_in_overview:
-                if v not in self.versions:
-                    versions_in_overview_but_unavailable.append(f"{v.major}.{v.minor}")
-            other_versions_in_overview_but_unavailable = []
-            for v in other_versions_in_overview:
-                if v not in self.other_versions:
-                    other_versions_in_overview_but_unavailable.append(v)
-
-            deletes = self.client.remove_objects(
-                f"{self.benchmark}.overview",
-                [
-                    minio.deleteobjects.DeleteObject(v)
-                    for v in versions_in_overview_but_unavailable
-                ],
+                    errors.extend(
+                        f"Deletion failed: {error}" for error in future.result() or []
+                    )
+                except Exception as e:
+                    errors.append(f"{futures[future]}: {e}")
+        if len(errors) > 0:
+            raise Exception(
+                f"Updating overview of {self.benchmark} failed: " + "; ".join(errors)
             )
-            for obj in deletes:
-                raise Exception(f"Deletion failed: {obj}")
-
-            deletes = self.client.remove_objects(
-                f"{self.benchmark}.overview",
-                [
-                    minio.deleteobjects.DeleteObject(v)
-                    for v in other_versions_in_overview_but_unavailable
-                ],
+
+    def _put_empty(self, bucket, name):
+        self.client.put_object(bucket, name, io.BytesIO(b""), 0)
+
+    def _remove_objects(self, bucket, names):
+        # remove_objects is lazy, the returned errors must be consumed
+        return list(
+            self.client.remove_objects(
+                bucket, [minio.deleteobjects.DeleteObject(name) for name in names]
             )
-            for delete in deletes:
-                raise Exception(f"Deletion failed: {delete}")
+        )
 
     def _create_new_version(self):
         if self.version_new is None:
             raise ValueError("No version provided")
 
-        # update
-        self._get_versions()
         # check if version exists
         if not self.version_new in self.versions:
             # create new version
-            self.client.make_bucket(
-                bucket_name=f"{self.benchmark}.{self.version_new.major}.{self.version_new.minor}"
+            self._make_bucket(
+                f"{self.benchmark}.{self.version_new.major}.{self.version_new.minor}"
             )
-            set_bucket_public_readonly(
-                self.client,
-                f"{self.benchmark}.{self.version_new.major}.{self.version_new.minor}",
+            self._add_containers(
+                [f"{self.benchmark}.{self.version_new.major}.{self.version_new.minor}"]
             )
-            if not self.client.bucket_exists(
-                f"{self.benchmark}.{self.version_new.major}.{self.version_new.minor}"
-            ):
-                raise Exception(
-                    f"Benchmark creation of {self.benchmark}.{self.version_new.major}.{self.version_new.minor} failed"
-                )
-            # update
             self._update_overview()
         else:
             raise ValueError("Version already exists")
@@ -305,151 +456,425 @@ class MinIOStorage(RemoteStorage):
         if not self.version_new in self.versions:
             raise ValueError("Version creation failed")
 
-    def _get_objects(self, readonly=False):
+    def _get_objects(
+        self, readonly=False, meta=True, cache=False, stage=None, module=None, root=""
+    ):
+        scoped = stage is not None or module is not None
+        if not cache or not meta:
+            # without metadata, revalidating takes a full listing, a cached listing saves no request
+            self.files = FileIndex(
+                self._iter_objects(
+                    readonly=readonly, meta=meta, stage=stage, module=module, root=root
+                )
+            )
+            return
+
         if self.version is None:
             raise ValueError("No version provided")
-        if not "secret_key" in self.auth_options.keys() or readonly:
-            containername = (
-                f"{self.benchmark}.{self.version.major}.{self.version.minor}"
-            )
-            url = urlparse(f"{self.auth_options['endpoint']}/{containername}")
-            if self.auth_options["secure"]:
-                url = url._replace(scheme="https")
-            else:
-                url = url._replace(scheme="http")
-            params = {"format": "xml"}
-            response = requests.get(url.geturl(), params=params)
-            if response.ok:
-                response_text = response.text
+        endpoint = self.auth_options["endpoint"]
+        containername = f"{self.benchmark}.{self.version.major}.{self.version.minor}"
+        entry = self.listing_cache.load(endpoint, containername)
+        if scoped:
+            # a fresh listing of the whole version is filtered, a scoped listing is not cached
+            if (
+                entry is not None
+                and entry["meta"]
+                and self.listing_cache.is_fresh(entry)
+            ):
+                self.files = FileIndex(
+                    (name, dict(record))
+                    for name, record in entry["files"].items()
+                    if match_output(name, stage, module, root=root)
+                )
             else:
-                response.raise_for_status()
-            soup = BeautifulSoup(response_text, "xml")
-            # names = [obj.find('Key').text for obj in soup.find_all('Contents')]
-            names = soup.find_all("Contents")
-
-            files = dict()
-            for obj in names:
-                url = urlparse(f"{self.auth_options['endpoint']}")
-                if self.auth_options["secure"]:
-                    url = url._replace(scheme="https")
-                else:
-                    url = url._replace(scheme="http")
-                mtime, accesstime = get_meta_mtime(
-                    url.geturl(), containername, obj.find("Key").text
+                self.files = FileIndex(
+                    self._iter_objects(
+                        readonly=readonly,
+                        meta=meta,
+                        stage=stage,
+                        module=module,
+                        root=root,
+                    )
                 )
-                files[obj.find("Key").text] = {
-                    "hash": obj.find("ETag").text.replace('"', ""),
-                    "size": int(obj.find("Size").text),
-                    "last_modified": obj.find("LastModified").text,
-                    "symlink_path": (
-                        obj.find("symlink_path").text
-                        if obj.find("symlink_path") is not None
-                        else ""
-                    ),
-                    "x-object-meta-mtime": mtime,
-                    "accesstime": accesstime,
-                }
+            return
+        if entry is not None and entry["meta"]:
+            if self.listing_cache.is_fresh(entry):
+                self.files = entry["files"]
+                return
+            # revalidate with a plain listing, without per object metadata requests
+            files = FileIndex(self._iter_objects(readonly=readonly, meta=False))
+            if listing_fingerprint(files) == entry["fingerprint"]:
+                self.listing_cache.touch(endpoint, containername, entry)
+                self.files = entry["files"]
+                return
+            if not self._is_readonly(readonly):
+                self.listing_cache.store(endpoint, containername, files, meta)
+                self.files = files
+                return
+            # only retrieve metadata of new or changed objects
+            cached = entry["files"]
+            stale = list()
+            for name, record in files.items():
+                if name in cached and (
+                    cached[name]["hash"] == record["hash"]
+                    and cached[name]["size"] == record["size"]
+                ):
+                    files[name] = cached[name]
+                else:
+                    stale.append({"key": name, "symlink_path": record["symlink_path"]})
+            for obj, (mtime, accesstime) in get_meta_mtimes(
+                self._public_url(), containername, stale
+            ):
+                files[obj["key"]]["x-object-meta-mtime"] = mtime
+                files[obj["key"]]["accesstime"] = accesstime
+            self.listing_cache.store(endpoint, containername, files, meta)
             self.files = files
+            return
 
+        self.files = FileIndex(self._iter_objects(readonly=readonly, meta=meta))
+        self.listing_cache.store(endpoint, containername, self.files, meta)
+
+    def _iter_objects(
+        self, readonly=False, meta=True, version=None, stage=None, module=None, root=""
+    ):
+        """
+        Iterates over the objects of a version as they are listed, sorted by name.
+
+        With a stage or module, only their outputs are listed, following the output layout with
+        delimited listings of the directories leading to them (see `omni.io.layout.walk_outputs`).
+
+        Args:
+            readonly (bool, optional): Whether to list the objects in read-only mode. Defaults to False.
+            meta (bool, optional): Whether to retrieve the metadata modification time of each object in read-only mode.
+                If False, the `LastModified` time of the listing is used. Defaults to True.
+            version (Version, optional): The version to list. Defaults to None which lists the current version.
+            stage (str, optional): Only list the outputs of this stage. Defaults to None.
+            module (str, optional): Only list the outputs of this module. Defaults to None.
+            root (str, optional): The directory of the outputs (see `omni.io.layout`). Defaults to "".
+
+        Yields:
+            tuple: The object name and its file record.
+        """
+        if version is None:
+            version = self.version
+        if version is None:
+            raise ValueError("No version provided")
+        containername = f"{self.benchmark}.{version.major}.{version.minor}"
+        if stage is not None or module is not None:
+            objects = merge_symlinks(
+                walk_outputs(
+                    lambda prefix: self._list_level(containername, prefix, readonly),
+                    stage,
+                    module,
+                    root=root,
+                ),
+                (
+                    link
+                    for link in self._iter_symlinks(containername, readonly=readonly)
+                    if match_output(link["key"], stage, module, root=root)
+                ),
+            )
+            if meta and self._is_readonly(readonly):
+                objects = (
+                    dict(
+                        obj, **{"x-object-meta-mtime": mtime, "accesstime": accesstime}
+                    )
+                    for obj, (mtime, accesstime) in get_meta_mtimes(
+                        self._public_url(), containername, objects
+                    )
+                )
+        elif self._is_readonly(readonly):
+            objects = merge_symlinks(
+                list_objects_public(self._public_url(containername)),
+                self._iter_symlinks(containername, readonly=True),
+            )
+            if meta:
+                objects = (
+                    dict(
+                        obj, **{"x-object-meta-mtime": mtime, "accesstime": accesstime}
+                    )
+                    for obj, (mtime, accesstime) in get_meta_mtimes(
+                        self._public_url(), containername, objects
+                    )
+                )
         else:
-            files = dict()
-            # get all objects
+            objects = merge_symlinks(
+                self._list_objects(containername), self._iter_symlinks(containername)
+            )
+        for obj in objects:
+            yield obj.pop("key"), obj
 
-            for element in self.client.list_objects(
-                f"{self.benchmark}.{self.version.major}.{self.version.minor}",
-                recursive=True,
-            ):
-                if type(element.last_modified) is str:
-                    files[element.object_name] = {
-                        "size": element.size,
-                        "last_modified": element.last_modified,
-                        "hash": element.etag.replace('"', ""),
-                        "symlink_path": "",
-                    }
-                elif type(element.last_modified) is datetime.datetime:
-                    files[element.object_name] = {
-                        "size": element.size,
-                        "last_modified": element.last_modified.strftime(
-                            "%Y-%m-%dT%H:%M:%S.%f"
-                        ),
-                        "hash": element.etag.replace('"', ""),
-                        "symlink_path": "",
-                    }
-                else:
-                    ValueError("Invalid last_modified")
+    def _list_objects(self, containername, prefix=None, recursive=True):
+        for element in self.client.list_objects(
+            containername, prefix=prefix, recursive=recursive
+        ):
+            if element.is_dir:
+                yield {"prefix": element.object_name}
+                continue
+            if not type(element.last_modified) in [str, datetime.datetime]:
+                raise ValueError("Invalid last_modified")
+            yield {
+                "key": element.object_name,
+                "size": element.size,
+                # parsed once here, to epoch milliseconds
+                "last_modified": parse_timestamp(element.last_modified),
+                "hash": element.etag.replace('"', ""),
+                "symlink_path": "",
+            }
+
+    def _list_level(self, containername, prefix, readonly=False):
+        """
+        Lists the objects and common prefixes directly below a prefix (delimiter `/`).
 
-            self.files = files
+        Args:
+            containername (str): The name of the container.
+            prefix (str): The prefix, empty or ending with `/`.
+            readonly (bool, optional): Whether to list in read-only mode. Defaults to False.
 
-    def find_objects_to_copy(self, reference_time=None, tagging_type="all"):
-        if tagging_type not in ["all"]:
-            raise ValueError("Invalid tagging type")
-        if tagging_type == "all":
-            if reference_time is None:
-                reference_time = datetime.datetime.now()
-            elif not type(reference_time) is datetime.datetime:
-                raise ValueError("Invalid reference time, must be datetime object")
-            if len(self.files) == 0:
-                self._get_objects()
-
-            if len(self.files) == 0:
-                return
+        Returns:
+            tuple: The records of the objects and the common prefixes.
+        """
+        if self._is_readonly(readonly):
+            records = list_objects_public(
+                self._public_url(containername), prefix=prefix or None, delimiter="/"
+            )
+        else:
+            records = self._list_objects(
+                containername, prefix=prefix or None, recursive=False
+            )
+        objects = list()
+        prefixes = list()
+        for record in records:
+            if "prefix" in record:
+                prefixes.append(record["prefix"])
             else:
-                for filename in self.files.keys():
-                    if "x-object-meta-mtime" in self.files[filename].keys():
-                        file_time = datetime.datetime.fromtimestamp(
-                            float(self.files[filename]["x-object-meta-mtime"])
-                        )
-                    elif "x-object-meta-last-modified" in self.files[filename].keys():
-                        file_time = dateutil.parser.parse(
-                            self.files[filename]["x-object-meta-last-modified"]
-                        )
-                    else:
-                        file_time = dateutil.parser.parse(
-                            self.files[filename]["last_modified"]
-                        )
-                    if file_time < reference_time:
-                        self.files[filename]["copy"] = True
-                    else:
-                        self.files[filename]["copy"] = False
-
-    def copy_objects(self, type="copy"):
+                objects.append(record)
+        return objects, prefixes
+
+    def _iter_symlinks(self, containername, readonly=False):
+        """
+        Iterates over the symlinks of a container as stored in its symlink manifest.
+
+        Args:
+            containername (str): The name of the container.
+            readonly (bool, optional): Whether to read the manifest in read-only mode. Defaults to False.
+
+        Yields:
+            dict: A symlink record.
+        """
+        if self._is_readonly(readonly):
+            url = f"{self._public_url(containername)}/{SYMLINK_MANIFEST}"
+            with get_session().get(url, stream=True) as response:
+                if response.status_code == 404:
+                    return
+                if not response.ok:
+                    response.raise_for_status()
+                yield from read_manifest(response.iter_content(MANIFEST_CHUNK_SIZE))
+        else:
+            try:
+                response = self.client.get_object(containername, SYMLINK_MANIFEST)
+            except minio.error.S3Error as e:
+                if e.code == "NoSuchKey":
+                    return
+                raise e
+            try:
+                yield from read_manifest(response.stream(MANIFEST_CHUNK_SIZE))
+            finally:
+                response.close()
+                response.release_conn()
+
+    def _is_readonly(self, readonly: bool = False) -> bool:
+        return not "secret_key" in self.auth_options.keys() or readonly
+
+    def _public_url(self, containername: Union[None, str] = None) -> str:
+        """
+        Builds the public (anonymous) url of the endpoint or of a container.
+
+        Args:
+            containername (str, optional): The name of the container. Defaults to None which returns the endpoint url.
+
+        Returns:
+            str: The url.
+        """
+        return endpoint_url(self.auth_options, containername)
+
+    def copy_objects(self, type="copy", max_workers=COPY_MAX_WORKERS):
+        """
+        Copies the flagged objects from the current to the new version.
+
+        With type "copy" objects are copied server side by a bounded pool of threads, failed copies are retried with backoff.
+        With type "symlink" no data is copied, the new version gets a manifest of symlinks to the objects of the
+        current version (or the objects they link to), see `omni.io.symlinks`.
+        The outcome is recorded per object in `files` (`copied` and on failure `copy_error`),
+        already copied objects are skipped so a partial run can be resumed by calling the method again.
+
+        Args:
+            type (str, optional): The type of copying to perform. Defaults to "copy".
+            max_workers (int, optional): The maximum number of concurrent copies. Defaults to COPY_MAX_WORKERS.
+
+        Returns:
+            list: The names of the objects that failed to copy.
+        """
         if type not in ["copy", "symlink"]:
             raise ValueError("Invalid type")
         if self.version is None or self.version_new is None:
             raise ValueError("No version provided")
 
+        failed = list()
         if type == "copy":
+            copied = set(self.files.flagged("copied"))
             filenames = [
                 filename
-                for filename in self.files.keys()
-                if self.files[filename]["copy"]
+                for filename in self.files.flagged("copy")
+                if filename not in copied
             ]
-            for filename in filenames:
-                out = self.client.copy_object(
-                    f"{self.benchmark}.{self.version_new.major}.{self.version_new.minor}",
-                    filename,
-                    minio.commonconfig.CopySource(
-                        bucket_name=f"{self.benchmark}.{self.version.major}.{self.version.minor}",
-                        object_name=filename,
-                    ),
-                )
-                self.files[out.object_name]["copied"] = True
+            with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+                futures = {
+                    executor.submit(
+                        retry,
+                        self._copy_object,
+                        filename,
+                        exceptions=RETRY_EXCEPTIONS,
+                    ): filename
+                    for filename in filenames
+                }
+                for future in concurrent.futures.as_completed(futures):
+                    filename = futures[future]
+                    try:
+                        future.result()
+                        self.files[filename]["copied"] = True
+                        self.files[filename].pop("copy_error", None)
+                    except Exception as e:
+                        logger.error(f"Copying {filename} failed: {e}")
+                        self.files[filename]["copied"] = False
+                        self.files[filename]["copy_error"] = str(e)
+                        failed.append(filename)
         if type == "symlink":
-            raise NotImplementedError("Symlink copying not implemented")
-
-    def create_new_version(
+            filenames = self.files.flagged("copy")
+            try:
+                retry(
+                    self._put_symlinks,
+                    self._symlinks(filenames),
+                    exceptions=RETRY_EXCEPTIONS,
+                )
+                for filename in filenames:
+                    self.files[filename]["copied"] = True
+                    self.files[filename].pop("copy_error", None)
+            except Exception as e:
+                logger.error(f"Writing symlinks failed: {e}")
+                for filename in filenames:
+                    self.files[filename]["copied"] = False
+                    self.files[filename]["copy_error"] = str(e)
+                failed.extend(filenames)
+        return failed
+
+    def _put_symlinks(self, links):
+        bucket_new = (
+            f"{self.benchmark}.{self.version_new.major}.{self.version_new.minor}"
+        )
+        with tempfile.SpooledTemporaryFile(max_size=64 * 1024**2) as file:
+            length = write_manifest(links, file)
+            file.seek(0)
+            return self.client.put_object(bucket_new, SYMLINK_MANIFEST, file, length)
+
+    def _copy_object(self, filename):
+        bucket_new = (
+            f"{self.benchmark}.{self.version_new.major}.{self.version_new.minor}"
+        )
+        # symlinks are materialized from the version they link to
+        bucket, source = self._source(filename)
+        if self.files[filename]["size"] <= MAX_SINGLE_COPY_SIZE:
+            return self.client.copy_object(
+                bucket_new,
+                filename,
+                minio.commonconfig.CopySource(bucket_name=bucket, object_name=source),
+            )
+        # objects above the single copy limit are copied part-wise, keep user metadata
+        stat = self.client.stat_object(bucket, source)
+        metadata = {
+            key: value
+            for key, value in stat.metadata.items()
+            if key.lower().startswith("x-amz-meta-")
+        }
+        return self.client.compose_object(
+            bucket_new,
+            filename,
+            [minio.commonconfig.ComposeSource(bucket_name=bucket, object_name=source)],
+            metadata=metadata,
+        )
+
+    def upload_files(
         self,
-        version_new: Union[None, str] = None,
-        tagging_type: str = "all",
-        copy_type: str = "copy",
+        filenames,
+        max_workers=UPLOAD_MAX_WORKERS,
+        part_size=UPLOAD_PART_SIZE,
+        max_inflight_bytes=UPLOAD_MAX_INFLIGHT_BYTES,
     ):
-        self.set_current_version()
-        self.set_new_version(version_new)
+        """
+        Uploads local files to the current version.
+
+        Files are uploaded by a bounded pool of threads, files larger than part_size as multipart uploads
+        with UPLOAD_PARALLEL_PARTS parts in parallel. The bytes buffered by uploads in flight are capped
+        by max_inflight_bytes. Failed uploads are retried with backoff.
+        The modification time of each file is stored as `mtime` metadata (`X-Amz-Meta-Mtime`).
+
+        Args:
+            filenames (list): The paths of the files, relative paths are used as object names.
+            max_workers (int, optional): The maximum number of concurrent uploads. Defaults to UPLOAD_MAX_WORKERS.
+            part_size (int, optional): The part size of multipart uploads in bytes (at least 5 MiB). Defaults to UPLOAD_PART_SIZE.
+            max_inflight_bytes (int, optional): The maximum number of bytes in flight. Defaults to UPLOAD_MAX_INFLIGHT_BYTES.
 
-        self._create_new_version()
-        self._get_objects()
-        self.find_objects_to_copy(tagging_type=tagging_type)
-        self.copy_objects(copy_type)
+        Returns:
+            list: The names of the files that failed to upload.
+
+        Raises:
+            ValueError: If a path is absolute or outside the working directory.
+        """
+        if self.version is None:
+            raise ValueError("No version provided")
+        bucket = f"{self.benchmark}.{self.version.major}.{self.version.minor}"
+        # invalid object names fail the call before anything is uploaded
+        for filename in filenames:
+            object_name(filename)
+        budget = ByteBudget(max_inflight_bytes)
+
+        def upload(filename):
+            size = os.path.getsize(filename)
+            with budget.reserve(min(size, part_size * UPLOAD_PARALLEL_PARTS)):
+                return retry(
+                    self._upload_file,
+                    bucket,
+                    filename,
+                    part_size,
+                    exceptions=RETRY_EXCEPTIONS,
+                )
+
+        failed = list()
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            futures = {
+                executor.submit(upload, filename): filename for filename in filenames
+            }
+            for future in concurrent.futures.as_completed(futures):
+                filename = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"Uploading {filename} failed: {e}")
+                    failed.append(filename)
+        # the listing of the version changed
+        self.listing_cache.invalidate(self.auth_options["endpoint"], bucket)
+        return failed
+
+    def _upload_file(self, bucket, filename, part_size):
+        mtime = os.path.getmtime(filename)
+        return self.client.fput_object(
+            bucket,
+            object_name(filename),
+            filename,
+            metadata={"mtime": str(mtime)},
+            part_size=part_size,
+            num_parallel_uploads=UPLOAD_PARALLEL_PARTS,
+        )
 
     def archive_version(self, version):
         NotImplementedError
@@ -1,10 +1,13 @@
 """Base class for remote storage."""
 
+import datetime
 from abc import ABCMeta, abstractmethod
-from typing import Dict, Union
+from typing import Dict, List, Tuple, Union
 
 from packaging.version import Version
 
+from omni.io.index import FileIndex
+
 
 class RemoteStorage(metaclass=ABCMeta):
     """
@@ -16,7 +19,7 @@ class RemoteStorage(metaclass=ABCMeta):
     - benchmarks (list): A list of benchmarks.
     - versions (list): A list of versions.
     - other_versions (list): A list of other (non standard, such as tests) versions.
-    - files (dict): A dictionary of files.
+    - files (FileIndex): The file records of the objects of the current version by name.
     - benchmark (str): The current benchmark.
     - auth_options (dict): The authentication options.
 
@@ -36,9 +39,13 @@ class RemoteStorage(metaclass=ABCMeta):
     - set_new_version(version): Sets the new version of the benchmark.
     - _update_overview(): Updates the overview of the benchmark.
     - _create_new_version(): Creates a new version of the benchmark.
-    - _get_objects(readonly): Retrieves the objects in the storage for the current benchmark.
-    - find_objects_to_copy(reference_time, tagging_type): Finds objects to copy based on a reference time.
+    - _get_objects(readonly, meta, cache, stage, module): Retrieves the objects in the storage for the current benchmark.
+    - _iter_objects(readonly, meta, version, stage, module): Iterates over the objects of a version, sorted by name.
+    - find_objects_to_copy(reference_time, tagging_type, ...): Finds objects to copy based on a reference time and selection predicates.
     - copy_objects(type): Copies the objects from the current benchmark version to the new benchmark version.
+    - _source(filename): Returns the container and name an object of the current version is read from.
+    - _symlinks(filenames): Returns the symlink records of objects of the current version for the new version.
+    - upload_files(filenames): Uploads local files to the current benchmark version.
     - create_new_version(version_new, tagging_type, copy_type): Creates a new version of the benchmark and copies the objects.
     - archive_version(version): Archives a specific benchmark version.
     - delete_version(version): Deletes a specific benchmark version.
@@ -50,7 +57,7 @@ class RemoteStorage(metaclass=ABCMeta):
         self.benchmarks = list()
         self.versions = list()
         self.other_versions = list()
-        self.files = dict()
+        self.files = FileIndex()
         self._parse_benchmark(benchmark)
         self._parse_auth_options(auth_options)
 
@@ -214,28 +221,120 @@ class RemoteStorage(metaclass=ABCMeta):
         NotImplementedError
 
     @abstractmethod
-    def _get_objects(self, readonly=False):
+    def _get_objects(
+        self, readonly=False, meta=True, cache=False, stage=None, module=None, root=""
+    ):
         """
         Retrieves the objects in the storage for the current benchmark version.
 
         Args:
             readonly (bool, optional): Whether to retrieve the objects in read-only mode. Defaults to False.
+            meta (bool, optional): Whether to retrieve per object metadata (e.g. `x-object-meta-mtime`). Defaults to True.
+            cache (bool, optional): Whether to serve and store the listing from/in the local listing cache. Defaults to False.
+            stage (str, optional): Only retrieve the outputs of this stage. Defaults to None.
+            module (str, optional): Only retrieve the outputs of this module. Defaults to None.
+            root (str, optional): The directory of the outputs (see `omni.io.layout`). Defaults to "".
         """
         NotImplementedError
 
     @abstractmethod
-    def find_objects_to_copy(self, reference_time=None, tagging_type="all"):
+    def _iter_objects(
+        self, readonly=False, meta=True, version=None, stage=None, module=None, root=""
+    ):
+        """
+        Iterates over the objects of a version as they are listed, sorted by name.
+
+        Args:
+            readonly (bool, optional): Whether to list the objects in read-only mode. Defaults to False.
+            meta (bool, optional): Whether to retrieve per object metadata. Defaults to True.
+            version (Version, optional): The version to list. Defaults to None which lists the current version.
+            stage (str, optional): Only list the outputs of this stage (see `omni.io.layout`). Defaults to None.
+            module (str, optional): Only list the outputs of this module. Defaults to None.
+            root (str, optional): The directory of the outputs (see `omni.io.layout`). Defaults to "".
+
+        Yields:
+            tuple: The object name and its file record.
+        """
+        NotImplementedError
+
+    def find_objects_to_copy(
+        self,
+        reference_time=None,
+        tagging_type="all",
+        prefix=None,
+        min_size=None,
+        max_size=None,
+        modified_after=None,
+        etags=None,
+    ):
         """
-        Finds objects to copy based on the reference time and tagging type.
+        Flags the objects to copy into the new version (`copy` of each file record).
+
+        Objects modified before the reference time that match all given predicates are selected in a single
+        pass over the file index (see `FileIndex.select`), timestamps are not parsed again.
 
         Args:
-            reference_time (datetime.datetime, optional): The reference time to compare with the object's time. Defaults to None.
-            tagging_type (str, optional): The tagging type to consider. Defaults to "all".
+            reference_time (datetime.datetime, optional): Select objects modified before this time. Defaults to None (now).
+            tagging_type (str, optional): The tagging type, only "all" is supported. Defaults to "all".
+            prefix (str, optional): Select objects whose name starts with prefix. Defaults to None.
+            min_size (int, optional): Select objects of at least this size in bytes. Defaults to None.
+            max_size (int, optional): Select objects of at most this size in bytes. Defaults to None.
+            modified_after (datetime.datetime, optional): Select objects modified at or after this time. Defaults to None.
+            etags (Iterable[str], optional): Select objects with one of these hashes (ETags). Defaults to None.
 
         Raises:
             ValueError: If the tagging type is invalid or the reference time is not a datetime object.
         """
-        NotImplementedError
+        if tagging_type not in ["all"]:
+            raise ValueError("Invalid tagging type")
+        if reference_time is None:
+            reference_time = datetime.datetime.now()
+        elif not type(reference_time) is datetime.datetime:
+            raise ValueError("Invalid reference time, must be datetime object")
+        if len(self.files) == 0:
+            self._get_objects()
+        if len(self.files) == 0:
+            return
+        selected = self.files.select(
+            prefix=prefix,
+            min_size=min_size,
+            max_size=max_size,
+            modified_after=modified_after,
+            modified_before=reference_time,
+            etags=etags,
+        )
+        self.files.set_flag("copy", selected)
+
+    def _source(self, filename: str) -> Tuple[str, str]:
+        # symlinked objects are read from the version they link to
+        if filename in self.files and self.files[filename]["symlink_path"]:
+            return tuple(self.files[filename]["symlink_path"].split("/", 1))
+        return f"{self.benchmark}.{self.version.major}.{self.version.minor}", filename
+
+    def _symlinks(self, filenames: List[str]) -> List[Dict]:
+        """
+        Returns the symlinks of the new version to objects of the current version, see `omni.io.symlinks`.
+
+        Objects of the current version that are symlinks themselves are linked to the object they link to.
+
+        Args:
+            filenames (list): The object names.
+
+        Returns:
+            list: The symlink records, a list so that retries can write them again.
+        """
+        container = f"{self.benchmark}.{self.version.major}.{self.version.minor}"
+        return [
+            {
+                "key": filename,
+                "symlink_path": self.files[filename]["symlink_path"]
+                or f"{container}/{filename}",
+                "hash": self.files[filename]["hash"],
+                "size": self.files[filename]["size"],
+                "last_modified": self.files[filename]["last_modified"],
+            }
+            for filename in filenames
+        ]
 
     @abstractmethod
     def copy_objects(self, type="copy"):
@@ -244,10 +343,28 @@ class RemoteStorage(metaclass=ABCMeta):
 
         Args:
             type (str): The type of copying to perform. Valid values are "copy" and "symlink".
+
+        Returns:
+            list: The names of the objects that failed to copy.
         """
         NotImplementedError
 
     @abstractmethod
+    def upload_files(self, filenames):
+        """
+        Upload local files to the current version.
+
+        Args:
+            filenames (list): The paths of the files, relative paths are used as object names.
+
+        Returns:
+            list: The names of the files that failed to upload.
+
+        Raises:
+            ValueError: If a path is absolute or outside the working directory.
+        """
+        NotImplementedError
+
     def create_new_version(
         self,
         version_new: Union[None, str] = None,
@@ -262,7 +379,13 @@ class RemoteStorage(metaclass=ABCMeta):
             tagging_type (str, optional): The type of tagging to apply. Defaults to "all".
             copy_type (str, optional): The type of copying to perform. Defaults to "copy".
         """
-        NotImplementedError
+        self.set_current_version()
+        self.set_new_version(version_new)
+
+        self._create_new_version()
+        self._get_objects()
+        self.find_objects_to_copy(tagging_type=tagging_type)
+        self.copy_objects(copy_type)
 
     @abstractmethod
     def archive_version(self, version):
@@ -0,0 +1,361 @@
+"""S3 class for remote storage, based on boto3 and its managed transfers."""
+
+import concurrent.futures
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from urllib.parse import urlparse
+
+from omni.io.index import parse_timestamp
+from omni.io.MinIOStorage import BUCKETS_TTL, MinIOStorage
+from omni.io.RemoteStorage import RemoteStorage
+from omni.io.S3config import bucket_readonly_policy
+from omni.io.symlinks import (
+    MANIFEST_CHUNK_SIZE,
+    SYMLINK_MANIFEST,
+    read_manifest,
+    write_manifest,
+)
+from omni.io.utils import object_name
+
+try:
+    import boto3
+    import botocore.config
+    from boto3.s3.transfer import TransferConfig, create_transfer_manager
+except ImportError:
+    # optional dependency, the `s3` extra
+    boto3 = None
+
+logger = logging.getLogger(__name__)
+
+# maximum number of concurrent requests of the managed transfers of a call
+S3_MAX_CONCURRENCY = 32
+# files and objects from this size on are transferred in parts
+S3_MULTIPART_THRESHOLD = 16 * 1024**2
+# part size of multipart transfers
+S3_MULTIPART_CHUNKSIZE = 16 * 1024**2
+# maximum number of attempts of a request, retried by botocore with backoff
+S3_MAX_ATTEMPTS = 5
+
+
+class S3Storage(MinIOStorage):
+    """
+    Remote storage on S3 (or another S3 compatible service), based on boto3.
+
+    Uploads, downloads and server side copies are managed transfers (`boto3.s3.transfer`): the transfers
+    of a call share one transfer manager, files are transferred concurrently and large files in parts in
+    parallel, within `max_concurrency` requests of the transfer configuration. Containers, versions,
+    listings, symlinks and the read-only (anonymous) access work as in `MinIOStorage`.
+
+    Attributes:
+    - client (botocore.client.S3): The boto3 client, only with credentials.
+    - transfer_config (boto3.s3.transfer.TransferConfig): The configuration of managed transfers.
+    """
+
+    def __init__(self, auth_options, benchmark, ttl=BUCKETS_TTL, transfer_config=None):
+        if boto3 is None:
+            raise ImportError("S3Storage requires boto3, install the `s3` extra")
+        if transfer_config is None:
+            transfer_config = TransferConfig(
+                multipart_threshold=S3_MULTIPART_THRESHOLD,
+                multipart_chunksize=S3_MULTIPART_CHUNKSIZE,
+                max_concurrency=S3_MAX_CONCURRENCY,
+            )
+        self.transfer_config = transfer_config
+        super().__init__(auth_options, benchmark, ttl)
+
+    def connect(self):
+        """
+        Connects to the S3 storage.
+
+        Returns:
+        - A boto3 S3 client object.
+        """
+        if (
+            "endpoint" in self.auth_options.keys()
+            and "access_key" in self.auth_options.keys()
+            and "secret_key" in self.auth_options.keys()
+        ):
+            endpoint = self.auth_options["endpoint"]
+            if urlparse(endpoint).scheme not in ["http", "https"]:
+                scheme = "https" if self.auth_options.get("secure", True) else "http"
+                endpoint = f"{scheme}://{endpoint}"
+            config = botocore.config.Config(
+                # one connection per concurrent request of the managed transfers
+                max_pool_connections=self.transfer_config.max_concurrency,
+                retries={"mode": "standard", "max_attempts": S3_MAX_ATTEMPTS},
+                s3={"addressing_style": "path"},
+            )
+            return boto3.client(
+                "s3",
+                endpoint_url=endpoint,
+                aws_access_key_id=self.auth_options["access_key"],
+                aws_secret_access_key=self.auth_options["secret_key"],
+                region_name=self.auth_options.get("region", "us-east-1"),
+                config=config,
+            )
+        else:
+            raise ValueError("Invalid auth options")
+
+    def _list_buckets(self):
+        return [bucket["Name"] for bucket in self.client.list_buckets()["Buckets"]]
+
+    def _make_bucket(self, bucket):
+        # new buckets are publicly readable
+        self.client.create_bucket(Bucket=bucket)
+        self.client.put_bucket_policy(
+            Bucket=bucket, Policy=json.dumps(bucket_readonly_policy(bucket))
+        )
+        # raises if the bucket does not exist
+        self.client.head_bucket(Bucket=bucket)
+
+    def _put_empty(self, bucket, name):
+        self.client.put_object(Bucket=bucket, Key=name, Body=b"")
+
+    def _remove_objects(self, bucket, names):
+        response = self.client.delete_objects(
+            Bucket=bucket,
+            Delete={"Objects": [{"Key": name} for name in names], "Quiet": True},
+        )
+        return response.get("Errors", [])
+
+    def _list_objects(self, containername, prefix=None, recursive=True):
+        params = {"Bucket": containername}
+        if prefix is not None:
+            params["Prefix"] = prefix
+        if not recursive:
+            params["Delimiter"] = "/"
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(**params):
+            for common_prefix in page.get("CommonPrefixes", []):
+                yield {"prefix": common_prefix["Prefix"]}
+            for obj in page.get("Contents", []):
+                yield {
+                    "key": obj["Key"],
+                    "size": obj["Size"],
+                    # parsed once here, to epoch milliseconds
+                    "last_modified": parse_timestamp(obj["LastModified"]),
+                    "hash": obj["ETag"].replace('"', ""),
+                    "symlink_path": "",
+                }
+
+    def _iter_symlinks(self, containername, readonly=False):
+        """
+        Iterates over the symlinks of a container as stored in its symlink manifest.
+
+        Args:
+            containername (str): The name of the container.
+            readonly (bool, optional): Whether to read the manifest in read-only mode. Defaults to False.
+
+        Yields:
+            dict: A symlink record.
+        """
+        if self._is_readonly(readonly):
+            yield from super()._iter_symlinks(containername, readonly=True)
+            return
+        try:
+            response = self.client.get_object(
+                Bucket=containername, Key=SYMLINK_MANIFEST
+            )
+        except self.client.exceptions.NoSuchKey:
+            return
+        body = response["Body"]
+        try:
+            yield from read_manifest(body.iter_chunks(MANIFEST_CHUNK_SIZE))
+        finally:
+            body.close()
+
+    def _put_symlinks(self, links):
+        bucket_new = (
+            f"{self.benchmark}.{self.version_new.major}.{self.version_new.minor}"
+        )
+        with tempfile.SpooledTemporaryFile(max_size=64 * 1024**2) as file:
+            write_manifest(links, file)
+            file.seek(0)
+            return self.client.put_object(
+                Bucket=bucket_new, Key=SYMLINK_MANIFEST, Body=file
+            )
+
+    def copy_objects(self, type="copy", config=None):
+        """
+        Copies the flagged objects from the current to the new version.
+
+        With type "copy" objects are copied server side with managed copies, objects from the multipart
+        threshold on are copied in parts in parallel, keeping their user metadata. With type "symlink"
+        the new version gets a symlink manifest, see `MinIOStorage.copy_objects`.
+        The outcome is recorded per object in `files` (`copied` and on failure `copy_error`),
+        already copied objects are skipped.
+
+        Args:
+            type (str, optional): The type of copying to perform. Defaults to "copy".
+            config (TransferConfig, optional): The transfer configuration. Defaults to None which uses `transfer_config`.
+
+        Returns:
+            list: The names of the objects that failed to copy.
+        """
+        if type == "symlink":
+            return super().copy_objects(type)
+        if type not in ["copy"]:
+            raise ValueError("Invalid type")
+        if self.version is None or self.version_new is None:
+            raise ValueError("No version provided")
+        if config is None:
+            config = self.transfer_config
+        bucket_new = (
+            f"{self.benchmark}.{self.version_new.major}.{self.version_new.minor}"
+        )
+        copied = set(self.files.flagged("copied"))
+        filenames = [
+            filename
+            for filename in self.files.flagged("copy")
+            if filename not in copied
+        ]
+
+        # multipart copies do not copy the user metadata, it is read beforehand, concurrently
+        large = [
+            filename
+            for filename in filenames
+            if self.files[filename]["size"] >= config.multipart_threshold
+        ]
+        metadata = dict()
+        errors = dict()
+        with concurrent.futures.ThreadPoolExecutor(config.max_concurrency) as executor:
+            futures = {
+                executor.submit(self._metadata, filename): filename
+                for filename in large
+            }
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    metadata[futures[future]] = future.result()
+                except Exception as e:
+                    errors[futures[future]] = e
+
+        with create_transfer_manager(self.client, config) as manager:
+            futures = dict()
+            for filename in filenames:
+                if filename in errors:
+                    continue
+                bucket, source = self._source(filename)
+                extra_args = None
+                if filename in metadata:
+                    extra_args = {"Metadata": metadata[filename]}
+                future = manager.copy(
+                    {"Bucket": bucket, "Key": source},
+                    bucket_new,
+                    filename,
+                    extra_args=extra_args,
+                )
+                futures[future] = filename
+            for future, filename in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    errors[filename] = e
+
+        failed = list()
+        for filename in filenames:
+            if filename in errors:
+                logger.error(f"Copying {filename} failed: {errors[filename]}")
+                self.files[filename]["copied"] = False
+                self.files[filename]["copy_error"] = str(errors[filename])
+                failed.append(filename)
+            else:
+                self.files[filename]["copied"] = True
+                self.files[filename].pop("copy_error", None)
+        return failed
+
+    def _metadata(self, filename):
+        bucket, source = self._source(filename)
+        return self.client.head_object(Bucket=bucket, Key=source)["Metadata"]
+
+    def upload_files(self, filenames, config=None):
+        """
+        Uploads local files to the current version with managed uploads.
+
+        Files are uploaded concurrently, files from the multipart threshold on in parts in parallel.
+        The modification time of each file is stored as `mtime` metadata (`X-Amz-Meta-Mtime`).
+
+        Args:
+            filenames (list): The paths of the files, relative paths are used as object names.
+            config (TransferConfig, optional): The transfer configuration. Defaults to None which uses `transfer_config`.
+
+        Returns:
+            list: The names of the files that failed to upload.
+
+        Raises:
+            ValueError: If a path is absolute or outside the working directory.
+        """
+        if self.version is None:
+            raise ValueError("No version provided")
+        if config is None:
+            config = self.transfer_config
+        bucket = f"{self.benchmark}.{self.version.major}.{self.version.minor}"
+        # invalid object names fail the call before anything is uploaded
+        for filename in filenames:
+            object_name(filename)
+
+        failed = list()
+        with create_transfer_manager(self.client, config) as manager:
+            futures = dict()
+            for filename in filenames:
+                try:
+                    mtime = os.path.getmtime(filename)
+                except OSError as e:
+                    logger.error(f"Uploading {filename} failed: {e}")
+                    failed.append(filename)
+                    continue
+                future = manager.upload(
+                    filename,
+                    bucket,
+                    object_name(filename),
+                    extra_args={"Metadata": {"mtime": str(mtime)}},
+                )
+                futures[future] = filename
+            for future, filename in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"Uploading {filename} failed: {e}")
+                    failed.append(filename)
+        # the listing of the version changed
+        self.listing_cache.invalidate(self.auth_options["endpoint"], bucket)
+        return failed
+
+    def download_files(self, filenames, config=None):
+        """
+        Downloads objects of the current version to local files named like the objects, with managed downloads.
+
+        Objects are downloaded concurrently, objects from the multipart threshold on with parallel range requests.
+        Symlinked objects are downloaded from the version they link to (see `files`).
+
+        Args:
+            filenames (list): The object names.
+            config (TransferConfig, optional): The transfer configuration. Defaults to None which uses `transfer_config`.
+
+        Returns:
+            list: The names of the objects that failed to download.
+        """
+        if self.version is None:
+            raise ValueError("No version provided")
+        if config is None:
+            config = self.transfer_config
+
+        failed = list()
+        with create_transfer_manager(self.client, config) as manager:
+            futures = dict()
+            for filename in filenames:
+                bucket, source = self._source(filename)
+                Path(filename).parent.mkdir(parents=True, exist_ok=True)
+                futures[manager.download(bucket, source, filename)] = filename
+            for future, filename in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"Downloading {filename} failed: {e}")
+                    failed.append(filename)
+        return failed
+
+
+RemoteStorage.register(S3Storage)
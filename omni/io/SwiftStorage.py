@@ -0,0 +1,708 @@
+"""Swift class for remote storage, based on the SwiftService of python-swiftclient."""
+
+import collections
+import concurrent.futures
+import json
+import logging
+import re
+import tempfile
+import threading
+
+from packaging.version import Version
+
+from omni.io.index import FileIndex, parse_timestamp
+from omni.io.layout import match_output, walk_outputs
+from omni.io.MinIOStorage import get_meta_mtimes
+from omni.io.RemoteStorage import RemoteStorage
+from omni.io.symlinks import (
+    MANIFEST_CHUNK_SIZE,
+    SYMLINK_MANIFEST,
+    merge_symlinks,
+    read_manifest,
+    write_manifest,
+)
+from omni.io.utils import object_name
+
+try:
+    import swiftclient.client
+    import swiftclient.service
+    from swiftclient.service import (
+        SwiftCopyObject,
+        SwiftService,
+        SwiftUploadObject,
+    )
+except ImportError:
+    # optional dependency, the `swift` extra
+    swiftclient = None
+
+logger = logging.getLogger(__name__)
+
+# maximum number of concurrent object requests (uploads, downloads, copies and deletes)
+SWIFT_MAX_WORKERS = 16
+# maximum number of segments of a large object transferred in parallel
+SWIFT_SEGMENT_THREADS = 8
+# files larger than this are uploaded as segmented large objects, in segments of this size
+SWIFT_SEGMENT_SIZE = 256 * 1024**2
+# suffix of the container holding the segments of the large objects of a container
+SEGMENTS_SUFFIX = "_segments"
+# read ACL of the containers, public with listings
+PUBLIC_READ_ACL = ".r:*,.rlistings"
+# token of anonymous requests, an empty token is not authenticated
+ANONYMOUS_TOKEN = ""
+# authentication options passed to the SwiftService as they are, see `swiftclient.service`
+SWIFT_AUTH_OPTIONS = ["auth", "auth_version", "user", "key", "insecure"]
+
+
+class SwiftStorage(RemoteStorage):
+    """
+    Remote storage on OpenStack Swift.
+
+    Objects are transferred with a `SwiftService`, which runs the requests of a call concurrently. Files larger
+    than `segment_size` are uploaded as segmented large objects, static (SLO, default) or dynamic (DLO), with
+    their segments in parallel, stored in the container `<container>_segments`. Copies between versions are
+    server side, segmented objects get their segments copied in parallel and a manifest of their own, so versions
+    never share segments. Deleting objects uses bulk deletes where the cluster supports them.
+
+    The endpoint is the storage url of the account (`<proxy>/v1/AUTH_<account>`). Without credentials
+    (`key`, `os_password` or `os_auth_token`), the storage is read-only and the public containers are
+    listed anonymously.
+
+    Attributes:
+    - containers (list): The names of all containers, empty in read-only mode.
+    - service (SwiftService): The Swift service, only with credentials.
+    - segment_size (int): The size of the segments of large objects.
+    - use_slo (bool): Whether large objects are static (SLO) or dynamic (DLO) large objects.
+    """
+
+    def __init__(
+        self, auth_options, benchmark, segment_size=SWIFT_SEGMENT_SIZE, use_slo=True
+    ):
+        if swiftclient is None:
+            raise ImportError(
+                "SwiftStorage requires python-swiftclient, install the `swift` extra"
+            )
+        super().__init__(auth_options, benchmark)
+        if not "endpoint" in self.auth_options.keys():
+            raise KeyError("endpoint")
+        self.segment_size = segment_size
+        self.use_slo = use_slo
+        self.containers = list()
+        self._local = threading.local()
+        if not self._is_readonly():
+            self.service = self.connect()
+            self._test_connect()
+            self._get_benchmarks(update=False)
+            if not benchmark in self.benchmarks:
+                logger.warning(
+                    f"Benchmark {benchmark} does not exist, creating new benchmark."
+                )
+                self._create_benchmark(benchmark, update=False)
+        self._get_versions(update=False)
+
+    def connect(self):
+        """
+        Connects to the Swift storage.
+
+        Returns:
+        - A SwiftService object.
+        """
+        options = {
+            "os_storage_url": self.auth_options["endpoint"],
+            "object_uu_threads": SWIFT_MAX_WORKERS,
+            "object_dd_threads": SWIFT_MAX_WORKERS,
+            "segment_threads": SWIFT_SEGMENT_THREADS,
+        }
+        for key, value in self.auth_options.items():
+            if key in SWIFT_AUTH_OPTIONS or key.startswith("os_"):
+                options[key] = value
+        return SwiftService(options=options)
+
+    def _is_readonly(self, readonly: bool = False) -> bool:
+        return (
+            not any(
+                key in self.auth_options.keys()
+                for key in ["key", "os_password", "os_auth_token"]
+            )
+            or readonly
+        )
+
+    def _conn(self):
+        # one connection per thread, for requests the SwiftService does not offer
+        if not hasattr(self._local, "conn"):
+            self._local.conn = swiftclient.service.get_conn(self.service._options)
+        return self._local.conn
+
+    def _test_connect(self) -> None:
+        self._get_containers()
+
+    def _get_containers(self) -> None:
+        if self._is_readonly():
+            # listing containers requires credentials
+            self.containers = list()
+            return
+        containers = list()
+        for page in self.service.list():
+            _raise_failed(page)
+            containers.extend(item["name"] for item in page["listing"])
+        self.containers = containers
+
+    def _get_benchmarks(self, update: bool = True) -> None:
+        if update:
+            self._get_containers()
+        benchmarks = list()
+        for con in self.containers:
+            match = re.fullmatch(r"(.+)\.(\d+\.\d+|test\.\d+|overview)", con)
+            if match and match.group(1) not in benchmarks:
+                benchmarks.append(match.group(1))
+        self.benchmarks = benchmarks
+
+    def _make_container(self, container, segments=False):
+        # containers are publicly readable, including the segments of large objects
+        names = (
+            [container, f"{container}{SEGMENTS_SUFFIX}"] if segments else [container]
+        )
+        for name in names:
+            self._conn().put_container(
+                name, headers={"X-Container-Read": PUBLIC_READ_ACL}
+            )
+        self.containers = self.containers + [
+            name for name in names if name not in self.containers
+        ]
+
+    def _create_benchmark(self, benchmark: str, update: bool = True) -> None:
+        if update:
+            self._get_benchmarks()
+        if benchmark in self.benchmarks:
+            raise ValueError("Benchmark already exists")
+        self._make_container(f"{benchmark}.test.1", segments=True)
+        self._make_container(f"{benchmark}.overview")
+        self._make_container(f"{benchmark}.0.1", segments=True)
+        self._make_container("benchmarks")
+        self._get_benchmarks(update=False)
+        self._update_overview(cleanup=True, benchmark=benchmark)
+
+        # add benchmark to overview
+        self._put_empty("benchmarks", [benchmark])
+
+    def _get_versions(self, update: bool = True, readonly: bool = False) -> None:
+        if self._is_readonly(readonly):
+            names = [
+                obj["key"]
+                for obj in self._list_objects(f"{self.benchmark}.overview", True)
+            ]
+        else:
+            if update:
+                self._get_containers()
+            prefix = f"{self.benchmark}."
+            names = [
+                con[len(prefix) :] for con in self.containers if con.startswith(prefix)
+            ]
+        versions = list()
+        other_versions = list()
+        for name in names:
+            if re.fullmatch(r"\d+\.\d+", name):
+                versions.append(Version(name))
+            elif re.fullmatch(r"test\.\d+", name):
+                other_versions.append(name)
+        self.versions = sorted(versions)
+        self.other_versions = other_versions
+
+    def _update_overview(self, cleanup=True, benchmark=None):
+        """
+        Updates the overview of versions of the benchmark.
+
+        The overview is listed once and compared with the available versions as sets. Missing versions
+        are added with concurrent uploads and, with cleanup, unavailable versions are removed with bulk deletes.
+
+        Args:
+            cleanup (bool, optional): Whether to remove versions that are not available from the overview. Defaults to True.
+            benchmark (str, optional): The benchmark. Defaults to None which updates the current benchmark.
+
+        Raises:
+            Exception: If adding or removing any version failed, listing all failures.
+        """
+        if benchmark is None:
+            benchmark = self.benchmark
+        overview = f"{benchmark}.overview"
+        in_overview = {obj["key"] for obj in self._list_objects(overview)}
+        available = set()
+        for con in self.containers:
+            match = re.fullmatch(rf"{re.escape(benchmark)}\.(\d+\.\d+|test\.\d+)", con)
+            if match:
+                available.add(match.group(1))
+
+        errors = self._put_empty(overview, sorted(available - in_overview))
+        if cleanup and len(in_overview - available) > 0:
+            for result in self.service.delete(
+                container=overview, objects=sorted(in_overview - available)
+            ):
+                if not result["success"]:
+                    errors.append(f"Deletion failed: {result['error']}")
+        if len(errors) > 0:
+            raise Exception(
+                f"Updating overview of {benchmark} failed: " + "; ".join(errors)
+            )
+
+    def _put_empty(self, container, names):
+        # empty objects, uploaded concurrently
+        errors = list()
+        for result in self.service.upload(
+            container,
+            [SwiftUploadObject(None, object_name=name) for name in names],
+            options={"skip_container_put": True},
+        ):
+            if not result["success"]:
+                errors.append(f"{result.get('object')}: {result['error']}")
+        return errors
+
+    def _create_new_version(self):
+        if self.version_new is None:
+            raise ValueError("No version provided")
+        if self.version_new in self.versions:
+            raise ValueError("Version already exists")
+        self._make_container(
+            f"{self.benchmark}.{self.version_new.major}.{self.version_new.minor}",
+            segments=True,
+        )
+        self._get_versions(update=False)
+        self._update_overview()
+        if not self.version_new in self.versions:
+            raise ValueError("Version creation failed")
+
+    def _get_objects(
+        self, readonly=False, meta=True, cache=False, stage=None, module=None, root=""
+    ):
+        # listings are not cached
+        self.files = FileIndex(
+            self._iter_objects(
+                readonly=readonly, meta=meta, stage=stage, module=module, root=root
+            )
+        )
+
+    def _iter_objects(
+        self, readonly=False, meta=True, version=None, stage=None, module=None, root=""
+    ):
+        """
+        Iterates over the objects of a version as they are listed, sorted by name.
+
+        Args:
+            readonly (bool, optional): Whether to list the objects in read-only mode. Defaults to False.
+            meta (bool, optional): Whether to retrieve the metadata modification time of each object in read-only mode.
+                If False, the `last_modified` time of the listing is used. Defaults to True.
+            version (Version, optional): The version to list. Defaults to None which lists the current version.
+            stage (str, optional): Only list the outputs of this stage. Defaults to None.
+            module (str, optional): Only list the outputs of this module. Defaults to None.
+            root (str, optional): The directory of the outputs (see `omni.io.layout`). Defaults to "".
+
+        Yields:
+            tuple: The object name and its file record.
+        """
+        if version is None:
+            version = self.version
+        if version is None:
+            raise ValueError("No version provided")
+        containername = f"{self.benchmark}.{version.major}.{version.minor}"
+        readonly = self._is_readonly(readonly)
+        if stage is not None or module is not None:
+            objects = merge_symlinks(
+                walk_outputs(
+                    lambda prefix: self._list_level(containername, prefix, readonly),
+                    stage,
+                    module,
+                    root=root,
+                ),
+                (
+                    link
+                    for link in self._iter_symlinks(containername, readonly)
+                    if match_output(link["key"], stage, module, root=root)
+                ),
+            )
+        else:
+            objects = merge_symlinks(
+                self._list_objects(containername, readonly),
+                self._iter_symlinks(containername, readonly),
+            )
+        if meta and readonly:
+            objects = (
+                dict(obj, **{"x-object-meta-mtime": mtime, "accesstime": accesstime})
+                for obj, (mtime, accesstime) in get_meta_mtimes(
+                    self.auth_options["endpoint"], containername, objects
+                )
+            )
+        for obj in objects:
+            yield obj.pop("key"), obj
+
+    def _list_objects(self, containername, readonly=False, prefix=None, delimiter=None):
+        if self._is_readonly(readonly):
+            _, listing = swiftclient.client.get_container(
+                self.auth_options["endpoint"],
+                ANONYMOUS_TOKEN,
+                containername,
+                prefix=prefix,
+                delimiter=delimiter,
+                full_listing=True,
+            )
+        else:
+            options = {"prefix": prefix, "delimiter": delimiter}
+            listing = list()
+            for page in self.service.list(container=containername, options=options):
+                _raise_failed(page)
+                listing.extend(page["listing"])
+        for item in listing:
+            if "subdir" in item:
+                yield {"prefix": item["subdir"]}
+                continue
+            yield {
+                "key": item["name"],
+                "hash": item["hash"],
+                "size": item["bytes"],
+                # parsed once here, to epoch milliseconds
+                "last_modified": parse_timestamp(item["last_modified"]),
+                "symlink_path": "",
+            }
+
+    def _list_level(self, containername, prefix, readonly=False):
+        objects = list()
+        prefixes = list()
+        for record in self._list_objects(
+            containername, readonly, prefix=prefix or None, delimiter="/"
+        ):
+            if "prefix" in record:
+                prefixes.append(record["prefix"])
+            else:
+                objects.append(record)
+        return objects, prefixes
+
+    def _iter_symlinks(self, containername, readonly=False):
+        """
+        Iterates over the symlinks of a container as stored in its symlink manifest.
+
+        Args:
+            containername (str): The name of the container.
+            readonly (bool, optional): Whether to read the manifest in read-only mode. Defaults to False.
+
+        Yields:
+            dict: A symlink record.
+        """
+        try:
+            if self._is_readonly(readonly):
+                _, body = swiftclient.client.get_object(
+                    self.auth_options["endpoint"],
+                    ANONYMOUS_TOKEN,
+                    containername,
+                    SYMLINK_MANIFEST,
+                    resp_chunk_size=MANIFEST_CHUNK_SIZE,
+                )
+            else:
+                _, body = self._conn().get_object(
+                    containername, SYMLINK_MANIFEST, resp_chunk_size=MANIFEST_CHUNK_SIZE
+                )
+        except swiftclient.client.ClientException as e:
+            if e.http_status == 404:
+                return
+            raise e
+        yield from read_manifest(body)
+
+    def copy_objects(self, type="copy", max_workers=SWIFT_MAX_WORKERS):
+        """
+        Copies the flagged objects from the current to the new version.
+
+        With type "copy" objects are copied server side (COPY) by the SwiftService, concurrently. Objects larger than
+        `segment_size` that are segmented large objects get their segments copied in parallel and a new manifest.
+        With type "symlink" no data is copied, the new version gets a symlink manifest (see `omni.io.symlinks`).
+        The outcome is recorded per object in `files` (`copied` and on failure `copy_error`),
+        already copied objects are skipped.
+
+        Args:
+            type (str, optional): The type of copying to perform. Defaults to "copy".
+            max_workers (int, optional): The maximum number of segmented objects copied concurrently. Defaults to SWIFT_MAX_WORKERS.
+
+        Returns:
+            list: The names of the objects that failed to copy.
+        """
+        if type not in ["copy", "symlink"]:
+            raise ValueError("Invalid type")
+        if self.version is None or self.version_new is None:
+            raise ValueError("No version provided")
+        container_new = (
+            f"{self.benchmark}.{self.version_new.major}.{self.version_new.minor}"
+        )
+
+        errors = dict()
+        if type == "copy":
+            copied = set(self.files.flagged("copied"))
+            filenames = [
+                filename
+                for filename in self.files.flagged("copy")
+                if filename not in copied
+            ]
+            large = [f for f in filenames if self.files[f]["size"] > self.segment_size]
+            # the service copies from one container per call
+            by_container = collections.defaultdict(list)
+            for filename in filenames:
+                if self.files[filename]["size"] <= self.segment_size:
+                    container, source = self._source(filename)
+                    by_container[container].append((source, filename))
+            for container, objects in by_container.items():
+                for result in self.service.copy(
+                    container,
+                    [
+                        SwiftCopyObject(
+                            source,
+                            options={"destination": f"/{container_new}/{filename}"},
+                        )
+                        for source, filename in objects
+                    ],
+                ):
+                    if result["action"] != "copy_object":
+                        continue
+                    filename = result["destination"].split("/", 2)[2]
+                    if not result["success"]:
+                        errors[filename] = str(result["error"])
+            with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+                futures = {
+                    executor.submit(self._copy_large_object, filename): filename
+                    for filename in large
+                }
+                for future in concurrent.futures.as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        errors[futures[future]] = str(e)
+        if type == "symlink":
+            filenames = self.files.flagged("copy")
+            try:
+                self._put_symlinks(self._symlinks(filenames))
+            except Exception as e:
+                errors = {filename: str(e) for filename in filenames}
+
+        failed = list()
+        for filename in filenames:
+            if filename in errors:
+                logger.error(f"Copying {filename} failed: {errors[filename]}")
+                self.files[filename]["copied"] = False
+                self.files[filename]["copy_error"] = errors[filename]
+                failed.append(filename)
+            else:
+                self.files[filename]["copied"] = True
+                self.files[filename].pop("copy_error", None)
+        return failed
+
+    def _copy_large_object(self, filename):
+        conn = self._conn()
+        container, source = self._source(filename)
+        container_new = (
+            f"{self.benchmark}.{self.version_new.major}.{self.version_new.minor}"
+        )
+        segments_new = f"{container_new}{SEGMENTS_SUFFIX}"
+        headers = conn.head_object(container, source)
+        # keep the user metadata, e.g. the mtime
+        meta = {k: v for k, v in headers.items() if k.startswith("x-object-meta-")}
+        if headers.get("x-static-large-object", "").lower() == "true":
+            _, body = conn.get_object(
+                container, source, query_string="multipart-manifest=get"
+            )
+            segments = [
+                (segment["name"], segment["hash"], segment["bytes"])
+                for segment in json.loads(body)
+            ]
+        elif "x-object-manifest" in headers:
+            segment_container, segment_prefix = headers["x-object-manifest"].split(
+                "/", 1
+            )
+            _, listing = conn.get_container(
+                segment_container, prefix=segment_prefix, full_listing=True
+            )
+            segments = [
+                (f"/{segment_container}/{item['name']}", item["hash"], item["bytes"])
+                for item in listing
+            ]
+        else:
+            # not segmented
+            conn.copy_object(container, source, f"/{container_new}/{filename}")
+            return
+
+        prefix = f"{filename}/{parse_timestamp(headers['last-modified'])}"
+        manifest = [
+            {
+                "path": f"/{segments_new}/{prefix}/{i:08d}",
+                "etag": etag,
+                "size_bytes": size,
+            }
+            for i, (_, etag, size) in enumerate(segments)
+        ]
+        with concurrent.futures.ThreadPoolExecutor(SWIFT_SEGMENT_THREADS) as executor:
+            futures = [
+                executor.submit(self._copy_segment, path, segment["path"])
+                for (path, _, _), segment in zip(segments, manifest)
+            ]
+            # raises the first failure, the manifest is only written if all segments were copied
+            for future in futures:
+                future.result()
+        if self.use_slo:
+            conn.put_object(
+                container_new,
+                filename,
+                json.dumps(manifest),
+                headers=meta,
+                query_string="multipart-manifest=put",
+            )
+        else:
+            conn.put_object(
+                container_new,
+                filename,
+                b"",
+                headers=dict(
+                    meta, **{"x-object-manifest": f"{segments_new}/{prefix}/"}
+                ),
+            )
+
+    def _copy_segment(self, path, destination):
+        segment_container, segment_name = path.lstrip("/").split("/", 1)
+        self._conn().copy_object(segment_container, segment_name, destination)
+
+    def _put_symlinks(self, links):
+        container_new = (
+            f"{self.benchmark}.{self.version_new.major}.{self.version_new.minor}"
+        )
+        with tempfile.SpooledTemporaryFile(max_size=64 * 1024**2) as file:
+            length = write_manifest(links, file)
+            file.seek(0)
+            self._conn().put_object(
+                container_new, SYMLINK_MANIFEST, file, content_length=length
+            )
+
+    def upload_files(self, filenames):
+        """
+        Uploads local files to the current version with the SwiftService.
+
+        Files are uploaded concurrently, files larger than `segment_size` as segmented large objects (SLO, or DLO)
+        with their segments in parallel. The modification time of each file is stored as `mtime` metadata
+        (`X-Object-Meta-Mtime`).
+
+        Args:
+            filenames (list): The paths of the files, relative paths are used as object names.
+
+        Returns:
+            list: The names of the files that failed to upload.
+
+        Raises:
+            ValueError: If a path is absolute or outside the working directory.
+        """
+        if self.version is None:
+            raise ValueError("No version provided")
+        container = f"{self.benchmark}.{self.version.major}.{self.version.minor}"
+        options = {
+            "segment_size": self.segment_size,
+            "use_slo": self.use_slo,
+            "segment_container": f"{container}{SEGMENTS_SUFFIX}",
+            "skip_container_put": True,
+        }
+        objects = {object_name(filename): filename for filename in filenames}
+        failed = list()
+        for result in self.service.upload(
+            container,
+            [
+                SwiftUploadObject(filename, object_name=name)
+                for name, filename in objects.items()
+            ],
+            options=options,
+        ):
+            if result["action"] == "upload_object" and not result["success"]:
+                logger.error(f"Uploading {result['path']} failed: {result['error']}")
+                failed.append(objects[result["object"]])
+        return failed
+
+    def download_files(self, filenames):
+        """
+        Downloads objects of the current version to local files named like the objects, with the SwiftService.
+
+        Objects are downloaded concurrently and checked against their checksum. Symlinked objects are downloaded
+        from the version they link to (see `files`).
+
+        Args:
+            filenames (list): The object names.
+
+        Returns:
+            list: The names of the objects that failed to download.
+        """
+        if self.version is None:
+            raise ValueError("No version provided")
+        # the service downloads from one container per call, to files named like the objects
+        by_container = collections.defaultdict(list)
+        for filename in filenames:
+            container, source = self._source(filename)
+            by_container[(container, source == filename)].append((source, filename))
+        failed = list()
+        for (container, same_name), objects in by_container.items():
+            if same_name:
+                calls = [(objects, {})]
+            else:
+                # objects named differently are downloaded one per call
+                calls = [([obj], {"out_file": obj[1]}) for obj in objects]
+            for objs, options in calls:
+                names = dict(objs)
+                for result in self.service.download(container, list(names), options):
+                    if not result["success"]:
+                        filename = names.get(result["object"], result["object"])
+                        logger.error(
+                            f"Downloading {filename} failed: {result['error']}"
+                        )
+                        failed.append(filename)
+        return failed
+
+    def archive_version(self, version):
+        """
+        Archives a version by removing the write ACL of its container and segments container.
+
+        Users granted write access by the ACL can no longer change the version, the account itself still can.
+
+        Args:
+            version (str): The version to archive.
+        """
+        version = Version(version)
+        if version not in self.versions:
+            raise ValueError(f"Version {version} not found in {self.benchmark}")
+        container = f"{self.benchmark}.{version.major}.{version.minor}"
+        for name in [container, f"{container}{SEGMENTS_SUFFIX}"]:
+            if name in self.containers:
+                self._conn().post_container(
+                    name, headers={"X-Remove-Container-Write": "x"}
+                )
+
+    def delete_version(self, version):
+        """
+        Deletes a version, its objects (with bulk deletes) and segments, and removes it from the overview.
+
+        Args:
+            version (str): The version to delete.
+        """
+        version = Version(version)
+        if version not in self.versions:
+            raise ValueError(f"Version {version} not found in {self.benchmark}")
+        container = f"{self.benchmark}.{version.major}.{version.minor}"
+        errors = list()
+        for name in [container, f"{container}{SEGMENTS_SUFFIX}"]:
+            if name not in self.containers:
+                continue
+            for result in self.service.delete(container=name):
+                if not result["success"]:
+                    errors.append(f"{result.get('object', name)}: {result['error']}")
+        if len(errors) > 0:
+            raise Exception(f"Deleting {container} failed: " + "; ".join(errors))
+        self.containers = [
+            con
+            for con in self.containers
+            if con not in [container, f"{container}{SEGMENTS_SUFFIX}"]
+        ]
+        self._get_versions(update=False)
+        self._update_overview(cleanup=True)
+
+
+def _raise_failed(result):
+    # results of SwiftService calls report errors instead of raising them
+    if not result["success"]:
+        raise result["error"]
+
+
+RemoteStorage.register(SwiftStorage)
@@ -0,0 +1,224 @@
+"""Local caches for remote storage listings and file checksums."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, Union
+
+from omni.config import bench_dir
+from omni.io.index import FileIndex
+
+listing_cache_dir = os.path.join(bench_dir, "listings")
+hash_cache_path = os.path.join(bench_dir, "hashes.sqlite")
+
+# time cached listings are served without revalidation, short to show newly pushed outputs soon
+LISTING_CACHE_TTL = 5 * 60
+# version of the format of cached listings, entries of other formats are ignored
+LISTING_CACHE_FORMAT = 3
+
+
+def listing_fingerprint(files: Dict) -> Dict:
+    """
+    Computes a fingerprint of a listing used to revalidate cached listings.
+
+    Args:
+        files (dict): The file records of a listing.
+
+    Returns:
+        dict: The number of objects, the newest `last_modified` and a digest over names, hashes and sizes.
+    """
+    digest = hashlib.sha256()
+    newest = ""
+    for name in sorted(files.keys()):
+        digest.update(
+            f"{name}\0{files[name]['hash']}\0{files[name]['size']}\n".encode()
+        )
+        newest = max(newest, str(files[name]["last_modified"]))
+    return {"count": len(files), "newest": newest, "digest": digest.hexdigest()}
+
+
+class ListingCache:
+    """
+    A persistent on-disk cache of bucket listings, keyed by endpoint and bucket (benchmark and version).
+
+    Attributes:
+    - cache_dir (str): The directory the listings are stored in.
+    - ttl (float): The time in seconds a cached listing is served without revalidation.
+    """
+
+    def __init__(
+        self, cache_dir: str = listing_cache_dir, ttl: float = LISTING_CACHE_TTL
+    ):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+
+    def _path(self, endpoint: str, bucket: str) -> str:
+        key = hashlib.sha256(f"{endpoint}/{bucket}".encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def load(self, endpoint: str, bucket: str) -> Union[None, Dict]:
+        """
+        Loads a cached listing.
+
+        Args:
+            endpoint (str): The endpoint of the remote storage.
+            bucket (str): The bucket name.
+
+        Returns:
+            dict or None: The cache entry with the keys `meta`, `fetched`, `fingerprint` and `files` (a `FileIndex`),
+                None if not cached.
+        """
+        try:
+            with open(self._path(endpoint, bucket), "r") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if (
+            entry.get("format") != LISTING_CACHE_FORMAT
+            or entry.get("endpoint") != endpoint
+            or entry.get("bucket") != bucket
+        ):
+            return None
+        entry["files"] = FileIndex.from_columns(entry["files"])
+        return entry
+
+    def is_fresh(self, entry: Dict) -> bool:
+        """
+        Checks if a cache entry can be served without revalidation.
+
+        Args:
+            entry (dict): The cache entry.
+
+        Returns:
+            bool: Whether the entry is younger than the ttl.
+        """
+        return time.time() - entry["fetched"] < self.ttl
+
+    def store(self, endpoint: str, bucket: str, files: Dict, meta: bool) -> None:
+        """
+        Stores a listing in the cache.
+
+        Args:
+            endpoint (str): The endpoint of the remote storage.
+            bucket (str): The bucket name.
+            files (dict): The file records of the listing, preferably a `FileIndex`.
+            meta (bool): Whether the records contain per object metadata.
+        """
+        if not isinstance(files, FileIndex):
+            files = FileIndex(files)
+        entry = {
+            "format": LISTING_CACHE_FORMAT,
+            "endpoint": endpoint,
+            "bucket": bucket,
+            "meta": meta,
+            "fetched": time.time(),
+            "fingerprint": listing_fingerprint(files),
+            # stored as columns, much smaller than a record per object
+            "files": files.to_columns(),
+        }
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(endpoint, bucket)
+        # write to temporary file and rename to never leave a partial entry
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def touch(self, endpoint: str, bucket: str, entry: Dict) -> None:
+        """
+        Marks a revalidated cache entry as fresh.
+
+        Args:
+            endpoint (str): The endpoint of the remote storage.
+            bucket (str): The bucket name.
+            entry (dict): The revalidated cache entry.
+        """
+        self.store(endpoint, bucket, entry["files"], entry["meta"])
+
+    def invalidate(self, endpoint: str, bucket: str) -> None:
+        """
+        Removes a cached listing.
+
+        Args:
+            endpoint (str): The endpoint of the remote storage.
+            bucket (str): The bucket name.
+        """
+        try:
+            os.remove(self._path(endpoint, bucket))
+        except FileNotFoundError:
+            pass
+
+
+class HashCache:
+    """
+    A persistent on-disk cache of local file checksums, so unchanged files are not hashed again.
+
+    A checksum is reused as long as path, size, inode and modification time (in ns) of the file did not change.
+    Checksums are stored per remote ETag, as single and multipart ETags of the same file differ.
+    Use as context manager, entries are committed on exit.
+
+    Attributes:
+    - path (str): The sqlite database file.
+    """
+
+    def __init__(self, path: str = hash_cache_path):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS hashes ("
+            "path TEXT PRIMARY KEY, size INTEGER, inode INTEGER, mtime_ns INTEGER, etag TEXT, digest TEXT)"
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def get(self, fname: str, etag: str, stat: os.stat_result) -> Union[None, str]:
+        """
+        Looks up the checksum of a file.
+
+        Args:
+            fname (str): The file.
+            etag (str): The remote ETag the checksum was computed for.
+            stat (os.stat_result): The current stat of the file.
+
+        Returns:
+            str or None: The checksum, None if not cached or the file changed.
+        """
+        row = self.connection.execute(
+            "SELECT digest FROM hashes WHERE path = ? AND size = ? AND inode = ? AND mtime_ns = ? AND etag = ?",
+            (os.path.abspath(fname), stat.st_size, stat.st_ino, stat.st_mtime_ns, etag),
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def put(self, fname: str, etag: str, stat: os.stat_result, digest: str) -> None:
+        """
+        Stores the checksum of a file.
+
+        Args:
+            fname (str): The file.
+            etag (str): The remote ETag the checksum was computed for.
+            stat (os.stat_result): The stat of the file taken before hashing it.
+            digest (str): The checksum.
+        """
+        self.connection.execute(
+            "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                os.path.abspath(fname),
+                stat.st_size,
+                stat.st_ino,
+                stat.st_mtime_ns,
+                etag,
+                digest,
+            ),
+        )
+
+    def close(self) -> None:
+        """Commits the stored checksums and closes the database."""
+        self.connection.commit()
+        self.connection.close()
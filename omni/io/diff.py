@@ -0,0 +1,127 @@
+"""Differences between benchmark versions."""
+
+import collections
+from typing import Dict, Iterable, Iterator, Tuple, Union
+
+from packaging.version import Version
+
+from omni.io.layout import STAGE_DEPTH, output_parts
+from omni.io.RemoteStorage import RemoteStorage
+
+
+def diff_objects(
+    old: Iterable[Tuple[str, Dict]], new: Iterable[Tuple[str, Dict]]
+) -> Iterator[Tuple[str, str, Union[None, Dict], Union[None, Dict]]]:
+    """
+    Compares two listings with a sorted merge, holding only one record of each in memory.
+
+    Both inputs must be sorted by name. Objects are changed if their hash (ETag) or size differ.
+
+    Args:
+        old (Iterable[tuple]): The object names and file records of the reference version.
+        new (Iterable[tuple]): The object names and file records of the version to compare with.
+
+    Yields:
+        tuple: The status ("added", "removed" or "changed"), the object name and its old and new record
+            (None if added or removed).
+    """
+    old = iter(old)
+    new = iter(new)
+    old_item = next(old, None)
+    new_item = next(new, None)
+    while old_item is not None or new_item is not None:
+        if new_item is None or (old_item is not None and old_item[0] < new_item[0]):
+            yield "removed", old_item[0], old_item[1], None
+            old_item = next(old, None)
+        elif old_item is None or new_item[0] < old_item[0]:
+            yield "added", new_item[0], None, new_item[1]
+            new_item = next(new, None)
+        else:
+            name, old_record = old_item
+            new_record = new_item[1]
+            if (
+                old_record["hash"] != new_record["hash"]
+                or old_record["size"] != new_record["size"]
+            ):
+                yield "changed", name, old_record, new_record
+            old_item = next(old, None)
+            new_item = next(new, None)
+
+
+def group_name(name: str, root: str = "") -> str:
+    """
+    Returns the group of an object, the stage and module of an output, see `omni.io.layout.match_output`.
+
+    Outputs are grouped by the last `{stage}/{module}` of their path, outputs of nested stages by their own stage.
+    Objects outside the output layout are grouped by their directory.
+
+    Args:
+        name (str): The object name.
+        root (str, optional): The directory of the outputs, e.g. "out". Defaults to "" for outputs at the top level.
+
+    Returns:
+        str: The group, `{stage}/{module}` or the directory, "" for objects at the top level.
+    """
+    parts = output_parts(name, root)
+    if parts is not None:
+        return "/".join(parts[-STAGE_DEPTH - 1 : -STAGE_DEPTH + 1])
+    return "/".join(name.split("/")[:-1])
+
+
+def summarize_diff(
+    changes: Iterable[Tuple[str, str, Union[None, Dict], Union[None, Dict]]],
+    root: str = "",
+) -> Dict[str, Dict[str, int]]:
+    """
+    Counts changes and their sizes per group, see `group_name`.
+
+    Args:
+        changes (Iterable[tuple]): The changes as yielded by `diff_objects`.
+        root (str, optional): The directory of the outputs, see `group_name`. Defaults to "".
+
+    Returns:
+        dict: Per group (sorted), the number of added, removed and changed objects and their bytes
+            (`added_bytes`, `removed_bytes` and `changed_bytes`, the new size of changed objects).
+    """
+    groups = collections.defaultdict(collections.Counter)
+    for status, name, old_record, new_record in changes:
+        record = old_record if status == "removed" else new_record
+        group = groups[group_name(name, root)]
+        group[status] += 1
+        group[f"{status}_bytes"] += int(record["size"])
+    return {group: dict(groups[group]) for group in sorted(groups.keys())}
+
+
+def diff_versions(
+    storage: RemoteStorage,
+    version1: Union[str, Version],
+    version2: Union[str, Version],
+    readonly: bool = False,
+) -> Iterator[Tuple[str, str, Union[None, Dict], Union[None, Dict]]]:
+    """
+    Compares two versions of a benchmark, streaming both listings.
+
+    Objects referenced by symlinks (see `omni.io.symlinks`) are compared by the records of their manifest.
+
+    Args:
+        storage (RemoteStorage): The storage of the benchmark.
+        version1 (str or Version): The reference version.
+        version2 (str or Version): The version to compare with.
+        readonly (bool, optional): Whether to list the versions in read-only mode. Defaults to False.
+
+    Yields:
+        tuple: The changes, see `diff_objects`.
+
+    Raises:
+        ValueError: If a version does not exist.
+    """
+    versions = []
+    for version in [version1, version2]:
+        version = Version(str(version))
+        if version not in storage.versions:
+            raise ValueError(f"Version {version} not found in {storage.benchmark}")
+        versions.append(version)
+    return diff_objects(
+        storage._iter_objects(readonly=readonly, meta=False, version=versions[0]),
+        storage._iter_objects(readonly=readonly, meta=False, version=versions[1]),
+    )
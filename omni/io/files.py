@@ -1,21 +1,49 @@
 """Functions to manage files"""
 
 import asyncio
+import concurrent.futures
+import json
+import os
 import re
 import warnings
 from pathlib import Path
-from typing import List, Union
+from typing import AsyncIterator, List, Tuple, Union
 from urllib.parse import urlparse
 
 import aiohttp
-import requests
 import tqdm
-from bs4 import BeautifulSoup
 from packaging.version import Version
 
-from omni.io.utils import get_storage, md5
+from omni.io.cache import HashCache
+from omni.io.layout import match_output
+from omni.io.listing import list_objects_public, list_objects_public_async
+from omni.io.session import client_session, get_session, is_retryable
+from omni.io.transfer import AdaptiveLimiter, TransferPolicy
+from omni.io.utils import ETagVerifier, file_etag, get_storage, parse_etag
 from omni.sync import get_bench_definition
 
+# size of the chunks downloads are streamed to disk in
+CHUNK_SIZE = 1024 * 1024
+# suffix of partially downloaded files
+PART_SUFFIX = ".part"
+# number of files hashed in parallel, hashing releases the GIL
+CHECKSUM_MAX_WORKERS = 8
+# maximum number of concurrent downloads
+DOWNLOAD_MAX_WORKERS = 64
+# maximum and initial number of concurrent downloads per host, adapted to throughput and errors
+DOWNLOAD_MAX_WORKERS_PER_HOST = 32
+DOWNLOAD_INITIAL_WORKERS_PER_HOST = 8
+# deadline in seconds of a download attempt, plus the time needed at DOWNLOAD_MIN_RATE (bytes per second)
+DOWNLOAD_DEADLINE = 60
+DOWNLOAD_MIN_RATE = 1024**2
+# downloads of files up to this size still running past this quantile of download times are hedged
+DOWNLOAD_HEDGE_MAX_SIZE = 8 * 1024**2
+DOWNLOAD_HEDGE_QUANTILE = 0.95
+# suffix of the partial files of hedged downloads
+HEDGE_SUFFIX = ".hedge.part"
+# local manifest of synced files (size, ETag and mtime per file), per benchmark
+SYNC_MANIFEST = ".omnibenchmark_sync.json"
+
 
 def list_files(
     benchmark: str,
@@ -25,8 +53,17 @@ def list_files(
     file_id: str = None,
     version: Union[None, str] = None,
     verbose: bool = False,
+    cache: bool = False,
+    root: str = "",
 ):
-    """List all available files for a certain benchmark, version and stage"""
+    """
+    List all available files for a certain benchmark, version and stage
+
+    With a stage or module, only the directories of their outputs are listed (see `omni.io.layout`),
+    the file id is matched (`fnmatch`) against the file names of the outputs. Outputs stored below a
+    directory (e.g. "out") are found with this directory as root.
+    Listings without metadata are never served from the listing cache, newly pushed outputs are listed at once.
+    """
 
     # TODO: for testing until get_bench_definition is implemented
     if __name__ == "__main__":
@@ -42,21 +79,25 @@ def list_files(
     ss = get_storage(bench_yaml["storage_type"], bench_yaml["auth_options"], benchmark)
     # set version
     ss.set_current_version(version)
-    # list objects of version
-    ss._get_objects()
+    # list objects of version, size and hash of the listing suffice
+    ss._get_objects(meta=False, cache=cache, stage=stage, module=module, root=root)
 
     # get urls
     names = list(ss.files.keys())
-
-    # TODO: filter by arguments
-    # names = ...
+    if file_id is not None:
+        names = [
+            name for name in names if match_output(name, file_id=file_id, root=root)
+        ]
 
     # create urls
     urls = {}
     for name in names:
-        url = urlparse(
-            f"{ss.auth_options['endpoint']}/{ss.benchmark}.{ss.major_version}.{ss.minor_version}/{name}"
-        )
+        if ss.files[name]["symlink_path"]:
+            # symlinked objects are stored in a previous version
+            path = ss.files[name]["symlink_path"]
+        else:
+            path = f"{ss.benchmark}.{ss.version.major}.{ss.version.minor}/{name}"
+        url = urlparse(f"{ss.auth_options['endpoint']}/{path}")
         if "secure" in ss.auth_options.keys() and not ss.auth_options["secure"]:
             url = url._replace(scheme="http")
         else:
@@ -70,54 +111,252 @@ def list_files(
 
 
 # adapted from https://realpython.com/python-download-file-from-url/#performing-parallel-file-downloads
-async def retrieve_file(url: str):
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as response:
-            # to remove schema
-            urlp = urlparse(url)
-            # to remove benchmark name
-            filename = re.sub("^/[a-zA-Z0-9._-]*/", "", urlp.path)
-            # create missing directories
-            Path(filename).parent.mkdir(parents=True, exist_ok=True)
-            # download file
-            with open(filename, mode="wb") as file:
-                while True:
-                    chunk = await response.content.read()
-                    if not chunk:
-                        break
-                    file.write(chunk)
-            return response.headers
-
-
-async def retrieve_files(urls: List[str], verbose: bool = False):
+async def retrieve_file(
+    url: str, session: aiohttp.ClientSession = None, part_suffix: str = PART_SUFFIX
+):
+    """
+    Download a file in chunks, resuming a previously interrupted download.
+
+    The file is written to `<filename><part_suffix>` and renamed once complete. The ETag of the object is stored
+    and size of the object are stored next to the partial file, an existing partial file is continued with a range
+    request that is only served if the object did not change in the meantime (`If-Range`), otherwise the download
+    starts over. Not every server honours `If-Range`, partial responses of another ETag or size also start over.
+
+    The checksum is computed on the chunks while they are written, the file is not read again. For objects
+    uploaded in parts the multipart ETag is rebuilt (`<md5>-<parts>`), inferring the part size.
+
+    Returns the response headers and the checksum of the file in the form of its ETag.
+    """
+    if session is None:
+        async with client_session() as session:
+            return await retrieve_file(url, session, part_suffix)
+
+    filename = _local_filename(url)
+    # create missing directories
+    Path(filename).parent.mkdir(parents=True, exist_ok=True)
+    part = f"{filename}{part_suffix}"
+    part_etag = f"{part}.etag"
+
+    headers = {}
+    offset = 0
+    etag, size = "", None
+    if os.path.exists(part) and os.path.exists(part_etag):
+        etag, size = _read_part_etag(part_etag)
+        if etag != "":
+            offset = os.path.getsize(part)
+            headers = {"Range": f"bytes={offset}-", "If-Range": etag}
+
+    async with session.get(url, headers=headers) as response:
+        if response.status == 416:
+            # partial file does not match the object, start over
+            os.remove(part)
+            return await retrieve_file(url, session, part_suffix)
+        response.raise_for_status()
+        if response.status == 206 and (
+            parse_etag(response.headers.get("ETag", "")) != parse_etag(etag)
+            or (size is not None and _object_size(response.headers) != size)
+        ):
+            # the object changed, but the range was served anyway
+            _remove_part(filename, part_suffix)
+            return await retrieve_file(url, session, part_suffix)
+        verifier = ETagVerifier(
+            response.headers.get("ETag", ""), _object_size(response.headers)
+        )
+        if response.status == 206:
+            if _content_range_start(response.headers) != offset:
+                raise ValueError(f"Invalid range returned for {url}")
+            mode = "ab"
+            # include the previously downloaded part in the checksum
+            with open(part, "rb") as file:
+                for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+                    verifier.update(chunk)
+        else:
+            # complete object, either new download or the object changed
+            mode = "wb"
+            with open(part_etag, "w") as f:
+                f.write(response.headers.get("ETag", ""))
+                size = _object_size(response.headers)
+                if size is not None:
+                    f.write(f"\n{size}")
+        with open(part, mode=mode) as file:
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                file.write(chunk)
+                verifier.update(chunk)
+        os.replace(part, filename)
+        os.remove(part_etag)
+        return response.headers, verifier.hexdigest()
+
+
+def _local_filename(url: str) -> str:
+    # to remove schema
+    urlp = urlparse(url)
+    # to remove benchmark name
+    return re.sub("^/[a-zA-Z0-9._-]*/", "", urlp.path)
+
+
+def _read_part_etag(part_etag: str) -> Tuple[str, Union[None, int]]:
+    # ETag and, on a second line, size of the object of a partial download
+    with open(part_etag, "r") as f:
+        lines = f.read().splitlines()
+    etag = lines[0] if len(lines) > 0 else ""
+    size = int(lines[1]) if len(lines) > 1 and lines[1].isdigit() else None
+    return etag, size
+
+
+def _content_range_start(headers) -> Union[None, int]:
+    # Content-Range: bytes <start>-<end>/<size>
+    match = re.match(r"bytes (\d+)-", headers.get("Content-Range", ""))
+    return int(match.group(1)) if match else None
+
+
+def _object_size(headers) -> Union[None, int]:
+    # total size of the object, also for partial responses
+    match = re.match(r"bytes \d+-\d+/(\d+)", headers.get("Content-Range", ""))
+    if match:
+        return int(match.group(1))
+    if "Content-Length" in headers:
+        return int(headers["Content-Length"])
+    return None
+
+
+async def retrieve_files(
+    urls: List[str],
+    verbose: bool = False,
+    sizes: Union[None, List[int]] = None,
+    max_workers: int = DOWNLOAD_MAX_WORKERS,
+    max_workers_per_host: int = DOWNLOAD_MAX_WORKERS_PER_HOST,
+    policy: TransferPolicy = None,
+):
+    """
+    Download files concurrently.
+
+    A fixed number of workers takes the files from a queue, so only as many sockets and files are open as
+    there are workers. Per host, the number of concurrent downloads adapts to the observed throughput and
+    errors (see `omni.io.transfer.AdaptiveLimiter`). If sizes are given, the largest files are started first
+    and the small ones fill the gaps.
+
+    Failed downloads are retried with backoff (resuming the partial file). If sizes are given, each attempt
+    has a deadline that grows with the file size. Small files still running past the `DOWNLOAD_HEDGE_QUANTILE` of recent
+    download times are hedged with a second request. Retries and hedges are counted in `omni.io.transfer.stats`.
+
+    Returns the results of `retrieve_file` in the order of the urls. If downloads fail, the first error is
+    raised once all other downloads are done.
+    """
     if verbose:
         print("Downloading files...")
-    tasks = [retrieve_file(url) for url in urls]
-    from tqdm.asyncio import tqdm_asyncio
 
-    headers = await tqdm_asyncio.gather(*tasks, delay=5, disable=not verbose)
-    return headers
+    order = list(range(len(urls)))
+    if sizes is not None:
+        order.sort(key=lambda i: sizes[i], reverse=True)
+    queue = asyncio.Queue()
+    for i in order:
+        queue.put_nowait(i)
+
+    limiters = dict()
+    for url in urls:
+        host = urlparse(url).netloc
+        if host not in limiters:
+            limiters[host] = AdaptiveLimiter(
+                max_workers_per_host, initial=DOWNLOAD_INITIAL_WORKERS_PER_HOST
+            )
+
+    if policy is None:
+        policy = TransferPolicy(
+            hedge_quantile=DOWNLOAD_HEDGE_QUANTILE, retryable=is_retryable
+        )
+    results = [None] * len(urls)
+    errors = []
+    progress = tqdm.tqdm(total=len(urls), delay=5, disable=not verbose)
 
+    async def worker(session):
+        while not queue.empty():
+            i = queue.get_nowait()
+            limiter = limiters[urlparse(urls[i]).netloc]
+            await limiter.acquire()
+            try:
+                results[i] = await _retrieve_file_hedged(
+                    urls[i], session, policy, sizes[i] if sizes is not None else None
+                )
+            except Exception as e:
+                await limiter.release(error=True)
+                errors.append(e)
+            else:
+                headers = results[i][0]
+                nbytes = sizes[i] if sizes is not None else 0
+                await limiter.release(int(headers.get("Content-Length", nbytes)))
+            progress.update()
 
-def get_file(url: Union[str, list[str]], verbose: bool = False):
-    """Download specific file(s) based on its url"""
+    # one session for all files to reuse connections
+    async with client_session() as session:
+        workers = [worker(session) for _ in range(min(max_workers, len(urls)))]
+        await asyncio.gather(*workers)
+    progress.close()
+    if len(errors) > 0:
+        raise errors[0]
+    return results
+
+
+async def _retrieve_file_hedged(
+    url: str,
+    session: aiohttp.ClientSession,
+    policy: TransferPolicy,
+    size: Union[None, int] = None,
+):
+    filename = _local_filename(url)
+
+    async def request(hedged):
+        # hedged requests download to a separate partial file
+        part_suffix = HEDGE_SUFFIX if hedged else PART_SUFFIX
+        try:
+            return await retrieve_file(url, session, part_suffix)
+        except asyncio.CancelledError:
+            if hedged:
+                _remove_part(filename, part_suffix)
+            raise
+
+    # large downloads take long anyway, only hedge small files
+    hedge = size is not None and size <= DOWNLOAD_HEDGE_MAX_SIZE
+    # without a size, a fixed deadline would cut off large downloads
+    deadline = None
+    if size is not None:
+        deadline = DOWNLOAD_DEADLINE + size / DOWNLOAD_MIN_RATE
+    result = await policy.run(request, deadline=deadline, hedge=hedge)
+    # the partial file of the losing request
+    for part_suffix in [PART_SUFFIX, HEDGE_SUFFIX]:
+        _remove_part(filename, part_suffix)
+    return result
+
+
+def _remove_part(filename: str, part_suffix: str) -> None:
+    for path in [f"{filename}{part_suffix}", f"{filename}{part_suffix}.etag"]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def get_file(
+    url: Union[str, list[str]],
+    verbose: bool = False,
+    sizes: Union[None, List[int]] = None,
+):
+    """Download specific file(s) based on its url, optionally with their sizes to schedule large files first"""
     if type(url) is str:
-        headers = asyncio.run(retrieve_file(url))
-        filenames = re.sub("^/[a-zA-Z0-9._-]*/", "", urlparse(url).path)
+        results = [asyncio.run(retrieve_file(url))]
+        filenames = [_local_filename(url)]
     elif type(url) is list:
-        headers = asyncio.run(retrieve_files(url))
-        filenames = [re.sub("^/[a-zA-Z0-9._-]*/", "", urlparse(u).path) for u in url]
+        results = asyncio.run(retrieve_files(url, verbose=verbose, sizes=sizes))
+        filenames = [_local_filename(u) for u in url]
     else:
         raise ValueError("url must be a string or a list of strings")
 
-    # md5 checksum
-    if verbose:
-        print("Checking MD5 checksums...")
-    for i in tqdm.tqdm(len(filenames), delay=5, disable=not verbose):
-        md5sum_val = md5(filenames[i])
-        if not headers[i]["ETag"].replace('"', "") == md5sum_val:
-            warnings.warn(f"MD5 checksum failed for {filenames[i]}", Warning)
+    # checksums are computed during download
+    for filename, (headers, etag) in zip(filenames, results):
+        if not parse_etag(headers["ETag"]) == parse_etag(etag):
+            warnings.warn(f"MD5 checksum failed for {filename}", Warning)
 
+    if type(url) is str:
+        return filenames[0]
     return filenames
 
 
@@ -129,13 +368,161 @@ def download_files(
     file_id: str = None,
     version: str = None,
     verbose: bool = False,
+    cache: bool = False,
+    root: str = "",
 ):
     """Download all available files for a certain benchmark, version and stage"""
-    urls = list_files(benchmark, type, stage, module, file_id, version, verbose=verbose)
-    filenames = get_file([urls[i]["url"] for i in urls.keys()], verbose=verbose)
+    urls = list_files(
+        benchmark,
+        type,
+        stage,
+        module,
+        file_id,
+        version,
+        verbose=verbose,
+        cache=cache,
+        root=root,
+    )
+    filenames = get_file(
+        [urls[i]["url"] for i in urls.keys()],
+        verbose=verbose,
+        sizes=[urls[i]["size"] for i in urls.keys()],
+    )
     return filenames
 
 
+def sync_files(
+    benchmark: str,
+    type: str = None,
+    stage: str = None,
+    module: str = None,
+    file_id: str = None,
+    version: str = None,
+    verbose: bool = False,
+    cache: bool = False,
+    delete: bool = False,
+    root: str = "",
+):
+    """
+    Synchronize local files with the available files for a certain benchmark, version and stage.
+
+    Only new or changed files are downloaded. Files are compared by size and ETag with a local manifest
+    (`SYNC_MANIFEST` in the working directory), files unchanged since the last sync are not read.
+    Existing files missing in the manifest are checksummed once. With delete, local files downloaded by previous
+    syncs that were removed remotely are deleted, only within the stage, module and file id of this sync.
+    Files not downloaded by a sync are never deleted.
+
+    Returns the downloaded and deleted files.
+    """
+    urls = list_files(
+        benchmark,
+        type,
+        stage,
+        module,
+        file_id,
+        version,
+        verbose=verbose,
+        cache=cache,
+        root=root,
+    )
+    manifest = _load_sync_manifest()
+    synced = manifest.setdefault(benchmark, dict())
+
+    to_download = []
+    for name, record in urls.items():
+        filename = _local_filename(record["url"])
+        try:
+            stat = os.stat(filename)
+        except FileNotFoundError:
+            to_download.append(name)
+            continue
+        entry = synced.get(filename)
+        if (
+            entry is not None
+            and entry["etag"] == record["md5"]
+            and entry["size"] == stat.st_size
+            and entry["mtime_ns"] == stat.st_mtime_ns
+        ):
+            continue
+        if stat.st_size == record["size"] and parse_etag(
+            file_etag(filename, record["md5"])
+        ) == parse_etag(record["md5"]):
+            # an existing file stays owned by whoever created it
+            owned = entry is not None and entry.get("downloaded", False)
+            synced[filename] = _sync_entry(record["md5"], stat, owned)
+            continue
+        to_download.append(name)
+
+    downloaded = []
+    if len(to_download) > 0:
+        results = asyncio.run(
+            retrieve_files(
+                [urls[name]["url"] for name in to_download],
+                verbose=verbose,
+                sizes=[urls[name]["size"] for name in to_download],
+            )
+        )
+        for name, (headers, etag) in zip(to_download, results):
+            filename = _local_filename(urls[name]["url"])
+            if parse_etag(headers["ETag"]) == parse_etag(etag):
+                synced[filename] = _sync_entry(etag, os.stat(filename))
+                downloaded.append(filename)
+            else:
+                # checksum again on the next sync
+                synced.pop(filename, None)
+                warnings.warn(f"MD5 checksum failed for {filename}", Warning)
+
+    deleted = []
+    if delete:
+        remote = {_local_filename(record["url"]) for record in urls.values()}
+        filtered = stage is not None or module is not None or file_id is not None
+        candidates = [
+            filename
+            for filename, entry in synced.items()
+            if entry.get("downloaded", False) and filename not in remote
+            # local file names are the object names
+            and (not filtered or match_output(filename, stage, module, file_id, root))
+        ]
+        for filename in sorted(candidates):
+            try:
+                os.remove(filename)
+            except FileNotFoundError:
+                pass
+            synced.pop(filename)
+            deleted.append(filename)
+            if verbose:
+                print(f"Deleted {filename}")
+
+    _store_sync_manifest(manifest)
+    return downloaded, deleted
+
+
+def _sync_entry(etag: str, stat: os.stat_result, downloaded: bool = True) -> dict:
+    # only downloaded files may be deleted by a sync
+    return {
+        "etag": etag,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "downloaded": downloaded,
+    }
+
+
+def _load_sync_manifest() -> dict:
+    try:
+        with open(SYNC_MANIFEST, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return dict()
+
+
+def _store_sync_manifest(manifest: dict) -> None:
+    # write to temporary file and rename to never leave a partial manifest
+    tmp_path = f"{SYNC_MANIFEST}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, SYNC_MANIFEST)
+
+
 def checksum_files(
     benchmark: str,
     type: str,
@@ -144,21 +531,48 @@ def checksum_files(
     file_id: str,
     version: str,
     verbose: bool = False,
+    cache: bool = False,
+    max_workers: int = CHECKSUM_MAX_WORKERS,
+    root: str = "",
 ):
-    """Compare md5 checksums of available files for a certain benchmark, version and stage with local versions"""
+    """
+    Compare md5 checksums of available files for a certain benchmark, version and stage with local versions
 
-    urls = list_files(benchmark, type, stage, module, file_id, version)
+    Files are hashed in parallel, checksums of unchanged files are served from a local cache.
+    """
 
-    for i in tqdm.tqdm(urls.keys(), delay=5, disable=not verbose):
-        # to remove schema
-        urlp = urlparse(urls[i]["url"])
-        # to remove benchmark name
-        filename = re.sub("^/[a-zA-Z0-9._-]*/", "", urlp.path)
-        if Path(filename).exists():
-            md5_local = md5(filename)
-        else:
-            md5_local = None
-        urls[filename]["md5_local"] = md5_local
+    urls = list_files(
+        benchmark, type, stage, module, file_id, version, cache=cache, root=root
+    )
+
+    with HashCache() as hash_cache, concurrent.futures.ThreadPoolExecutor(
+        max_workers=max_workers
+    ) as executor:
+        futures = dict()
+        for i in urls.keys():
+            filename = _local_filename(urls[i]["url"])
+            try:
+                # stat before hashing, a file changed meanwhile is hashed again on the next run
+                stat = os.stat(filename)
+            except FileNotFoundError:
+                urls[i]["md5_local"] = None
+                continue
+            md5_local = hash_cache.get(filename, urls[i]["md5"], stat)
+            if md5_local is None:
+                future = executor.submit(file_etag, filename, urls[i]["md5"])
+                futures[future] = (i, filename, stat)
+            else:
+                urls[i]["md5_local"] = md5_local
+
+        for future in tqdm.tqdm(
+            concurrent.futures.as_completed(futures),
+            total=len(futures),
+            delay=5,
+            disable=not verbose,
+        ):
+            i, filename, stat = futures[future]
+            urls[i]["md5_local"] = future.result()
+            hash_cache.put(filename, urls[i]["md5"], stat, urls[i]["md5_local"])
 
     failed_checksums = []
     for i in urls.keys():
@@ -172,17 +586,11 @@ def checksum_files(
 def get_benchmarks_public(endpoint: str) -> List[str]:
     """List all available benchmarks"""
     url = urlparse(f"{endpoint}/benchmarks")
-    response = requests.get(url.geturl(), params={"format": "xml"})
-    if response.ok:
-        response_text = response.text
-    else:
-        response.raise_for_status()
-    soup = BeautifulSoup(response_text, "xml")
-    benchmark_names = [obj.find("Key").text for obj in soup.find_all("Contents")]
+    benchmark_names = [obj["key"] for obj in list_objects_public(url.geturl())]
     benchmarks = []
     for benchmark in benchmark_names:
         url = urlparse(f"{endpoint}/{benchmark}.overview")
-        response = requests.get(url.geturl(), params={"format": "xml"})
+        response = get_session().get(url.geturl(), params={"format": "xml"})
         if response.ok:
             benchmarks.append(benchmark)
     return benchmarks
@@ -190,16 +598,49 @@ def get_benchmarks_public(endpoint: str) -> List[str]:
 
 def get_benchmark_versions_public(benchmark: str, endpoint: str) -> List[str]:
     url = urlparse(f"{endpoint}/{benchmark}.overview")
-    response = requests.get(url.geturl(), params={"format": "xml"})
-    if response.ok:
-        soup = BeautifulSoup(response.text, "xml")
-        buckets = [obj.find("Key").text for obj in soup.find_all("Contents")]
-        versions = []
-        for bucket in buckets:
-            if re.search(r"(\d+\.\d+)", bucket):
-                versions.append(bucket)
-
-        versions.sort(key=Version)
-        return versions
-    else:
-        response.raise_for_status()
+    buckets = [obj["key"] for obj in list_objects_public(url.geturl())]
+    return _parse_versions(buckets)
+
+
+def _parse_versions(buckets: List[str]) -> List[str]:
+    versions = []
+    for bucket in buckets:
+        if re.search(r"(\d+\.\d+)", bucket):
+            versions.append(bucket)
+
+    versions.sort(key=Version)
+    return versions
+
+
+async def iter_benchmark_versions_public(
+    endpoint: str,
+) -> AsyncIterator[Tuple[str, List[str]]]:
+    """
+    List all available benchmarks and their versions.
+
+    The overview buckets of all benchmarks are fetched concurrently (and only once),
+    benchmarks are yielded in the order their versions arrive.
+    """
+    async with client_session() as session:
+        url = urlparse(f"{endpoint}/benchmarks")
+        benchmark_names = [
+            obj["key"] async for obj in list_objects_public_async(session, url.geturl())
+        ]
+
+        async def get_versions(benchmark):
+            url = urlparse(f"{endpoint}/{benchmark}.overview")
+            try:
+                buckets = [
+                    obj["key"]
+                    async for obj in list_objects_public_async(session, url.geturl())
+                ]
+            except aiohttp.ClientResponseError:
+                # no overview, not a benchmark
+                return benchmark, None
+            return benchmark, _parse_versions(buckets)
+
+        tasks = [get_versions(benchmark) for benchmark in benchmark_names]
+        for task in asyncio.as_completed(tasks):
+            benchmark, versions = await task
+            if versions is not None:
+                yield benchmark, versions
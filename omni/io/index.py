@@ -0,0 +1,569 @@
+"""Compact, column oriented index of the objects of a benchmark version."""
+
+import array
+import bisect
+import datetime
+import sys
+import time
+from collections.abc import Mapping, MutableMapping
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+
+import dateutil.parser
+
+# timestamp column value of records without timestamp
+NO_TIME = -(2**63)
+# fields of every record, stored in columns
+CORE_FIELDS = ("hash", "size", "last_modified", "symlink_path")
+# optional timestamp fields stored in columns, as epoch milliseconds
+TIME_FIELDS = ("x-object-meta-mtime", "x-object-meta-last-modified", "accesstime")
+# optional boolean fields stored in columns
+FLAG_FIELDS = ("copy", "copied")
+
+# flag column value of records without the flag
+_NO_FLAG = -1
+# parts column value of hashes that are not (multipart) md5 hex digests
+_RAW_HASH = -1
+_EMPTY_DIGEST = bytes(16)
+# default of `FileIndex.pop`, to tell no default from None
+_NO_DEFAULT = object()
+
+
+def parse_timestamp(value: Union[None, str, int, datetime.datetime]) -> int:
+    """
+    Converts a timestamp to epoch milliseconds.
+
+    Args:
+        value (None, str, int or datetime.datetime): An ISO 8601 or HTTP date string, a datetime or epoch milliseconds
+            (returned as they are). Naive datetimes and strings without time zone are taken as UTC.
+
+    Returns:
+        int: The epoch milliseconds, NO_TIME for None or an empty string.
+    """
+    if value is None or value == "":
+        return NO_TIME
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        try:
+            if value.endswith("Z"):
+                value = value[:-1] + "+00:00"
+            value = datetime.datetime.fromisoformat(value)
+        except ValueError:
+            value = dateutil.parser.parse(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return round(value.timestamp() * 1000)
+
+
+def format_timestamp(ms: int) -> str:
+    """
+    Formats epoch milliseconds like the `LastModified` time of S3 listings.
+
+    Args:
+        ms (int): The epoch milliseconds.
+
+    Returns:
+        str: The ISO 8601 UTC time with milliseconds, e.g. `2024-06-20T09:10:11.123Z`, an empty string for NO_TIME.
+    """
+    if ms == NO_TIME:
+        return ""
+    seconds, millis = divmod(ms, 1000)
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds)) + f".{millis:03d}Z"
+
+
+def _to_datetime(ms: int) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(ms / 1000, datetime.timezone.utc)
+
+
+class FileRecord(MutableMapping):
+    """
+    The file record of an object, a live view on a row of a `FileIndex`.
+
+    Reading and assigning fields reads and writes the columns of the index. A view goes stale when its
+    object is deleted from the index, reading it then raises a KeyError (or reads a record added again
+    under the same name). Keep a `dict(record)` copy to use a record after deleting it.
+    """
+
+    __slots__ = ("_index", "_name")
+
+    def __init__(self, index: "FileIndex", name: str):
+        self._index = index
+        self._name = name
+
+    def __getitem__(self, field):
+        return self._index._get(self._index._position(self._name), field)
+
+    def __setitem__(self, field, value):
+        self._index._set(self._index._position(self._name), field, value)
+
+    def __delitem__(self, field):
+        self._index._delete(self._index._position(self._name), field)
+
+    def __iter__(self):
+        return iter(self._index._fields(self._index._position(self._name)))
+
+    def __len__(self):
+        return len(self._index._fields(self._index._position(self._name)))
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class FileIndex(MutableMapping):
+    """
+    A compact mapping of object names to file records, sorted by name.
+
+    Instead of a dict per object, fields are stored in columns: interned names, md5 digests as bytes,
+    sizes and timestamps (epoch milliseconds) in arrays. Records are returned as `FileRecord` views
+    with the fields of the listings (`hash`, `size`, `last_modified` as string and `symlink_path`), so
+    the index can be used like a dict of dicts. Rarely set fields are kept per object in a sparse dict.
+    `pop` and `popitem` return dict copies of the removed records, as views on them would be stale.
+
+    Attributes:
+    - names (list): The object names, sorted.
+    """
+
+    def __init__(
+        self, records: Union[None, Mapping, Iterable[Tuple[str, Mapping]]] = None
+    ):
+        self.names = list()
+        self._digests = bytearray()
+        self._parts = array.array("i")
+        self._sizes = array.array("q")
+        self._modified = array.array("q")
+        self._symlinks = list()
+        self._times = {field: array.array("q") for field in TIME_FIELDS}
+        self._flags = {field: array.array("b") for field in FLAG_FIELDS}
+        self._extra = dict()
+        if records is not None:
+            if isinstance(records, Mapping):
+                records = records.items()
+            ordered = True
+            for name, record in records:
+                # append and sort once instead of inserting unsorted records one by one
+                if len(self.names) > 0 and name <= self.names[-1]:
+                    ordered = False
+                i = len(self.names)
+                self._append(name)
+                for field, value in record.items():
+                    self._set(i, field, value)
+            if not ordered:
+                self._sort()
+
+    def _position(self, name: str) -> int:
+        i = bisect.bisect_left(self.names, name)
+        if i == len(self.names) or self.names[i] != name:
+            raise KeyError(name)
+        return i
+
+    def __getitem__(self, name: str) -> FileRecord:
+        self._position(name)
+        return FileRecord(self, name)
+
+    def __setitem__(self, name: str, record: Mapping) -> None:
+        record = dict(record)
+        if len(self.names) == 0 or name > self.names[-1]:
+            # listings are sorted, append
+            i = len(self.names)
+            self._insert(i, name)
+        else:
+            i = bisect.bisect_left(self.names, name)
+            if i < len(self.names) and self.names[i] == name:
+                self._clear(i)
+            else:
+                self._insert(i, name)
+        for field, value in record.items():
+            self._set(i, field, value)
+
+    def __delitem__(self, name: str) -> None:
+        i = self._position(name)
+        del self.names[i]
+        del self._digests[16 * i : 16 * (i + 1)]
+        del self._parts[i]
+        del self._sizes[i]
+        del self._modified[i]
+        del self._symlinks[i]
+        for column in self._times.values():
+            del column[i]
+        for column in self._flags.values():
+            del column[i]
+        self._extra.pop(name, None)
+
+    def pop(self, name: str, default=_NO_DEFAULT):
+        try:
+            record = dict(self[name])
+        except KeyError:
+            if default is _NO_DEFAULT:
+                raise
+            return default
+        del self[name]
+        return record
+
+    def popitem(self) -> Tuple[str, Dict]:
+        if len(self.names) == 0:
+            raise KeyError("popitem(): index is empty")
+        # like a dict, the last object; removing it does not shift the columns
+        name = self.names[-1]
+        return name, self.pop(name)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name) -> bool:
+        i = bisect.bisect_left(self.names, name)
+        return i < len(self.names) and self.names[i] == name
+
+    def __repr__(self):
+        return f"FileIndex({len(self)} objects)"
+
+    def _insert(self, i: int, name: str) -> None:
+        if i == len(self.names):
+            self._append(name)
+            return
+        self.names.insert(i, sys.intern(name))
+        self._digests[16 * i : 16 * i] = _EMPTY_DIGEST
+        self._parts.insert(i, _RAW_HASH)
+        self._sizes.insert(i, 0)
+        self._modified.insert(i, NO_TIME)
+        self._symlinks.insert(i, "")
+        for column in self._times.values():
+            column.insert(i, NO_TIME)
+        for column in self._flags.values():
+            column.insert(i, _NO_FLAG)
+
+    def _append(self, name: str) -> None:
+        self.names.append(sys.intern(name))
+        self._digests += _EMPTY_DIGEST
+        self._parts.append(_RAW_HASH)
+        self._sizes.append(0)
+        self._modified.append(NO_TIME)
+        self._symlinks.append("")
+        for column in self._times.values():
+            column.append(NO_TIME)
+        for column in self._flags.values():
+            column.append(_NO_FLAG)
+
+    def _sort(self) -> None:
+        order = sorted(range(len(self.names)), key=self.names.__getitem__)
+        # of duplicate names the last record wins, like in a dict
+        order = [
+            i
+            for k, i in enumerate(order)
+            if k + 1 == len(order) or self.names[order[k + 1]] != self.names[i]
+        ]
+        self.names = [self.names[i] for i in order]
+        digests = self._digests
+        self._digests = bytearray().join(digests[16 * i : 16 * (i + 1)] for i in order)
+        self._parts = array.array("i", (self._parts[i] for i in order))
+        self._sizes = array.array("q", (self._sizes[i] for i in order))
+        self._modified = array.array("q", (self._modified[i] for i in order))
+        self._symlinks = [self._symlinks[i] for i in order]
+        for field, column in self._times.items():
+            self._times[field] = array.array("q", (column[i] for i in order))
+        for field, column in self._flags.items():
+            self._flags[field] = array.array("b", (column[i] for i in order))
+
+    def _clear(self, i: int) -> None:
+        self._digests[16 * i : 16 * (i + 1)] = _EMPTY_DIGEST
+        self._parts[i] = _RAW_HASH
+        self._sizes[i] = 0
+        self._modified[i] = NO_TIME
+        self._symlinks[i] = ""
+        for column in self._times.values():
+            column[i] = NO_TIME
+        for column in self._flags.values():
+            column[i] = _NO_FLAG
+        self._extra.pop(self.names[i], None)
+
+    def _get(self, i: int, field: str):
+        if field == "hash":
+            if self._parts[i] == _RAW_HASH:
+                return self._extra.get(self.names[i], {}).get("hash", "")
+            digest = self._digests[16 * i : 16 * (i + 1)].hex()
+            if self._parts[i] > 0:
+                return f"{digest}-{self._parts[i]}"
+            return digest
+        if field == "size":
+            return self._sizes[i]
+        if field == "last_modified":
+            return format_timestamp(self._modified[i])
+        if field == "symlink_path":
+            return self._symlinks[i]
+        if field in self._times:
+            if self._times[field][i] == NO_TIME:
+                raise KeyError(field)
+            return _to_datetime(self._times[field][i])
+        if field in self._flags:
+            if self._flags[field][i] == _NO_FLAG:
+                raise KeyError(field)
+            return bool(self._flags[field][i])
+        return self._extra.get(self.names[i], {})[field]
+
+    def _set(self, i: int, field: str, value) -> None:
+        if field == "hash":
+            self._set_hash(i, value)
+        elif field == "size":
+            self._sizes[i] = int(value)
+        elif field == "last_modified":
+            self._modified[i] = parse_timestamp(value)
+        elif field == "symlink_path":
+            self._symlinks[i] = value
+        elif field in self._times:
+            # None (unknown) is stored as not set
+            self._times[field][i] = parse_timestamp(value)
+        elif field in self._flags:
+            self._flags[field][i] = int(bool(value))
+        else:
+            self._extra.setdefault(self.names[i], {})[field] = value
+
+    def _set_hash(self, i: int, value: str) -> None:
+        digest, _, parts = value.partition("-")
+        # upper case or otherwise not canonical hex digests are kept as they are
+        if (
+            len(digest) == 32
+            and digest == digest.lower()
+            and (parts == "" or parts.isdigit())
+        ):
+            try:
+                raw = bytes.fromhex(digest)
+            except ValueError:
+                raw = b""
+            if len(raw) == 16:
+                self._digests[16 * i : 16 * (i + 1)] = raw
+                self._parts[i] = int(parts or 0)
+                if self.names[i] in self._extra:
+                    self._extra_pop(i, "hash")
+                return
+        self._digests[16 * i : 16 * (i + 1)] = _EMPTY_DIGEST
+        self._parts[i] = _RAW_HASH
+        self._extra.setdefault(self.names[i], {})["hash"] = value
+
+    def _extra_pop(self, i: int, field: str) -> None:
+        extra = self._extra.get(self.names[i])
+        if extra is not None:
+            extra.pop(field, None)
+            if len(extra) == 0:
+                del self._extra[self.names[i]]
+
+    def _delete(self, i: int, field: str) -> None:
+        if field in CORE_FIELDS:
+            raise KeyError(f"{field} can not be removed")
+        if field in self._times:
+            if self._times[field][i] == NO_TIME:
+                raise KeyError(field)
+            self._times[field][i] = NO_TIME
+        elif field in self._flags:
+            if self._flags[field][i] == _NO_FLAG:
+                raise KeyError(field)
+            self._flags[field][i] = _NO_FLAG
+        else:
+            if field not in self._extra.get(self.names[i], {}):
+                raise KeyError(field)
+            self._extra_pop(i, field)
+
+    def _fields(self, i: int) -> List[str]:
+        fields = list(CORE_FIELDS)
+        fields.extend(f for f in TIME_FIELDS if self._times[f][i] != NO_TIME)
+        fields.extend(f for f in FLAG_FIELDS if self._flags[f][i] != _NO_FLAG)
+        fields.extend(
+            f for f in self._extra.get(self.names[i], {}).keys() if f != "hash"
+        )
+        return fields
+
+    def _range(self, prefix: Union[None, str] = None) -> Tuple[int, int]:
+        # the positions of the names starting with prefix
+        if not prefix:
+            return 0, len(self.names)
+        start = bisect.bisect_left(self.names, prefix)
+        # all names starting with prefix sort before prefix followed by the highest code point
+        end = bisect.bisect_left(self.names, prefix + "\U0010ffff", lo=start)
+        return start, end
+
+    def select(
+        self,
+        prefix: Union[None, str] = None,
+        min_size: Union[None, int] = None,
+        max_size: Union[None, int] = None,
+        modified_after: Union[None, datetime.datetime] = None,
+        modified_before: Union[None, datetime.datetime] = None,
+        etags: Union[None, Iterable[str]] = None,
+    ) -> List[str]:
+        """
+        Selects objects by name prefix, size, modification time and ETag in one pass over the columns.
+
+        The modification time of an object is its `x-object-meta-mtime` (or `x-object-meta-last-modified`)
+        if known, else its `last_modified` time. Objects without any time are older than any time.
+
+        Args:
+            prefix (str, optional): The prefix of the object names. Defaults to None (all objects).
+            min_size (int, optional): The minimum size in bytes. Defaults to None.
+            max_size (int, optional): The maximum size in bytes. Defaults to None.
+            modified_after (datetime.datetime, optional): Select objects modified at or after this time,
+                naive datetimes are local time. Defaults to None.
+            modified_before (datetime.datetime, optional): Select objects modified before this time. Defaults to None.
+            etags (Iterable[str], optional): Select objects with one of these hashes (ETags). Defaults to None.
+
+        Returns:
+            list: The names of the selected objects, sorted.
+        """
+        start, end = self._range(prefix)
+        positions = range(start, end)
+        if min_size is not None or max_size is not None:
+            low = -1 if min_size is None else min_size
+            high = sys.maxsize if max_size is None else max_size
+            sizes = self._sizes
+            positions = [i for i in positions if low <= sizes[i] <= high]
+        if modified_after is not None or modified_before is not None:
+            low = NO_TIME
+            if modified_after is not None:
+                low = parse_timestamp(modified_after.astimezone())
+            high = sys.maxsize
+            if modified_before is not None:
+                high = parse_timestamp(modified_before.astimezone()) - 1
+            times = self.modified_times()
+            positions = [i for i in positions if low <= times[i] <= high]
+        if etags is not None:
+            positions = self._match_etags(positions, etags)
+        names = self.names
+        return [names[i] for i in positions]
+
+    def modified_times(self) -> array.array:
+        """
+        Returns the modification times of all objects, see `select`.
+
+        Returns:
+            array.array: The epoch milliseconds in the order of `names`, NO_TIME for objects without time.
+        """
+        times = array.array("q", self._modified)
+        for field in ["x-object-meta-last-modified", "x-object-meta-mtime"]:
+            column = self._times[field]
+            if column.count(NO_TIME) == len(column):
+                continue
+            for i in range(len(times)):
+                if column[i] != NO_TIME:
+                    times[i] = column[i]
+        return times
+
+    def _match_etags(self, positions: Iterable[int], etags: Iterable[str]) -> List[int]:
+        # compare binary digests instead of formatting the hash of every object
+        digests = set()
+        raw = set()
+        for etag in etags:
+            etag = etag.replace('"', "")
+            raw.add(etag)
+            digest, _, parts = etag.partition("-")
+            try:
+                digests.add((bytes.fromhex(digest), int(parts or 0)))
+            except ValueError:
+                pass
+        selected = list()
+        for i in positions:
+            if self._parts[i] == _RAW_HASH:
+                if self._get(i, "hash") in raw:
+                    selected.append(i)
+            elif (
+                bytes(self._digests[16 * i : 16 * (i + 1)]),
+                self._parts[i],
+            ) in digests:
+                selected.append(i)
+        return selected
+
+    def set_flag(self, field: str, names: Iterable[str]) -> None:
+        """
+        Sets a boolean field of all objects at once, True for the given objects and False for all others.
+
+        Args:
+            field (str): One of FLAG_FIELDS, e.g. "copy".
+            names (Iterable[str]): The objects to set the field to True for.
+        """
+        column = array.array("b", bytes(len(self.names)))
+        i = 0
+        for name in names:
+            # names are usually sorted (e.g. selected), search from the previous position
+            if i >= len(self.names) or name < self.names[i]:
+                i = 0
+            i = bisect.bisect_left(self.names, name, lo=i)
+            if i == len(self.names) or self.names[i] != name:
+                raise KeyError(name)
+            column[i] = 1
+        self._flags[field] = column
+
+    def flagged(self, field: str, value: bool = True) -> List[str]:
+        """
+        Returns the objects with a boolean field set to a value.
+
+        Args:
+            field (str): One of FLAG_FIELDS, e.g. "copy".
+            value (bool, optional): The value of the field. Defaults to True.
+
+        Returns:
+            list: The names of the objects, sorted.
+        """
+        flag = int(value)
+        column = self._flags[field]
+        names = self.names
+        return [names[i] for i in range(len(names)) if column[i] == flag]
+
+    def timestamp(self, name: str, field: str = "last_modified") -> Union[None, int]:
+        """
+        Returns a timestamp of an object without converting it.
+
+        Args:
+            name (str): The object name.
+            field (str, optional): `last_modified` or one of TIME_FIELDS. Defaults to "last_modified".
+
+        Returns:
+            int or None: The epoch milliseconds, None if the object has no such timestamp.
+        """
+        i = self._position(name)
+        ms = self._modified[i] if field == "last_modified" else self._times[field][i]
+        return None if ms == NO_TIME else ms
+
+    def to_columns(self) -> Dict:
+        """
+        Returns the columns of the index for serialization (e.g. as json).
+
+        Returns:
+            dict: The columns as lists, see `from_columns`.
+        """
+        return {
+            "names": list(self.names),
+            "digests": self._digests.hex(),
+            "parts": self._parts.tolist(),
+            "sizes": self._sizes.tolist(),
+            "modified": self._modified.tolist(),
+            "symlinks": list(self._symlinks),
+            "times": {field: column.tolist() for field, column in self._times.items()},
+            "flags": {field: column.tolist() for field, column in self._flags.items()},
+            "extra": self._extra,
+        }
+
+    @classmethod
+    def from_columns(cls, columns: Dict) -> "FileIndex":
+        """
+        Creates an index from serialized columns.
+
+        Args:
+            columns (dict): The columns as returned by `to_columns`.
+
+        Returns:
+            FileIndex: The index.
+        """
+        index = cls()
+        index.names = [sys.intern(name) for name in columns["names"]]
+        index._digests = bytearray.fromhex(columns["digests"])
+        index._parts = array.array("i", columns["parts"])
+        index._sizes = array.array("q", columns["sizes"])
+        index._modified = array.array("q", columns["modified"])
+        index._symlinks = list(columns["symlinks"])
+        for field in TIME_FIELDS:
+            index._times[field] = array.array("q", columns["times"][field])
+        for field in FLAG_FIELDS:
+            index._flags[field] = array.array("b", columns["flags"][field])
+        index._extra = {
+            sys.intern(name): extra for name, extra in columns["extra"].items()
+        }
+        return index
@@ -0,0 +1,145 @@
+"""Output layout of benchmarks, to list the outputs of a stage or module by prefix."""
+
+import concurrent.futures
+import fnmatch
+from typing import Callable, Dict, List, Tuple, Union
+
+# path components per stage in output paths, `{stage}/{module}/{params}`,
+# outputs of later stages are nested below their input directory
+STAGE_DEPTH = 3
+# maximum number of prefixes listed in parallel
+LAYOUT_MAX_WORKERS = 16
+
+
+def output_parts(name: str, root: str = "") -> Union[None, List[str]]:
+    """
+    Splits the path of an output below the output root.
+
+    Args:
+        name (str): The object name.
+        root (str, optional): The directory of the outputs, e.g. "out". Defaults to "" for outputs at the top level.
+
+    Returns:
+        list or None: The path components below the root, None if the object is no output.
+    """
+    root = root.strip("/")
+    if root:
+        if not name.startswith(f"{root}/"):
+            return None
+        name = name[len(root) + 1 :]
+    parts = name.split("/")
+    if len(parts) <= STAGE_DEPTH or (len(parts) - 1) % STAGE_DEPTH != 0:
+        return None
+    return parts
+
+
+def match_output(
+    name: str,
+    stage: Union[None, str] = None,
+    module: Union[None, str] = None,
+    file_id: Union[None, str] = None,
+    root: str = "",
+) -> bool:
+    """
+    Checks whether an object is an output of a stage and module.
+
+    The stage and module of an output are the directories of the last `{stage}/{module}/{params}` of its path
+    below the output root.
+
+    Args:
+        name (str): The object name.
+        stage (str, optional): The stage. Defaults to None which matches any stage.
+        module (str, optional): The module. Defaults to None which matches any module.
+        file_id (str, optional): Pattern (`fnmatch`) the file name must match. Defaults to None which matches any file.
+        root (str, optional): The directory of the outputs, e.g. "out". Defaults to "" for outputs at the top level.
+
+    Returns:
+        bool: Whether the object matches.
+    """
+    parts = output_parts(name, root)
+    if parts is None:
+        return False
+    if stage is not None and parts[-STAGE_DEPTH - 1] != stage:
+        return False
+    if module is not None and parts[-STAGE_DEPTH] != module:
+        return False
+    return file_id is None or fnmatch.fnmatchcase(parts[-1], file_id)
+
+
+def walk_outputs(
+    list_level: Callable[[str], Tuple[List[Dict], List[str]]],
+    stage: Union[None, str] = None,
+    module: Union[None, str] = None,
+    max_workers: int = LAYOUT_MAX_WORKERS,
+    root: str = "",
+) -> List[Dict]:
+    """
+    Lists the outputs of a stage and module with one delimited listing per directory of the layout.
+
+    Only the directories leading to the outputs are listed, starting at the output root. Below a stage that does not
+    match, its modules and parameters are followed to the nested stages. Below a matching stage, the module is
+    joined to the prefix without listing and nested stages are not followed. Disjoint prefixes are listed in parallel.
+
+    Args:
+        list_level (Callable): Lists a prefix with delimiter `/`, returns the records of the objects
+            directly below the prefix and the common prefixes (ending with `/`).
+        stage (str, optional): The stage. Defaults to None which matches any stage.
+        module (str, optional): The module. Defaults to None which matches any module.
+        max_workers (int, optional): The maximum number of listings running in parallel. Defaults to 16.
+        root (str, optional): The directory of the outputs, e.g. "out". Defaults to "" for outputs at the top level.
+
+    Returns:
+        List[Dict]: The records of the outputs, sorted by key.
+    """
+    root = root.strip("/")
+    start = f"{root}/" if root else ""
+    records = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # prefix and whether its stage and module match
+        pending = {executor.submit(list_level, start): (start, False)}
+        while len(pending) > 0:
+            done, _ = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                prefix, matched = pending.pop(future)
+                objects, prefixes = future.result()
+                if (
+                    matched
+                    and (prefix.count("/") - start.count("/")) % STAGE_DEPTH == 0
+                ):
+                    records.extend(objects)
+                for subprefix in prefixes:
+                    for child in _descend(subprefix, start, matched, stage, module):
+                        pending[executor.submit(list_level, child[0])] = child
+    records.sort(key=lambda record: record["key"])
+    return records
+
+
+def _descend(
+    prefix: str,
+    start: str,
+    matched: bool,
+    stage: Union[None, str],
+    module: Union[None, str],
+) -> List[Tuple[str, bool]]:
+    # the levels of the layout count from the output root
+    parts = prefix[len(start) :].rstrip("/").split("/")
+    level = (len(parts) - 1) % STAGE_DEPTH
+    if level == 0:
+        # a nested stage, a stage occurs only once per path
+        if matched and stage is not None:
+            return []
+        if parts[-1] == stage and module is not None:
+            # the module directory is known, skip listing the modules
+            return [(f"{prefix}{module}/", True)]
+        return [(prefix, False)]
+    if level == 1:
+        return [
+            (
+                prefix,
+                (stage is None or parts[-2] == stage)
+                and (module is None or parts[-1] == module),
+            )
+        ]
+    return [(prefix, matched)]
@@ -0,0 +1,208 @@
+"""Streaming, paginated listing of public S3 compatible buckets."""
+
+from typing import AsyncIterator, Callable, Dict, Iterator, Union
+from urllib.parse import quote
+
+import aiohttp
+import yarl
+from lxml import etree
+
+from omni.io.index import parse_timestamp
+from omni.io.session import get_session
+
+# maximum number of keys returned per page by S3 compatible stores
+MAX_KEYS = 1000
+# size of the chunks fed to the xml parser
+CHUNK_SIZE = 64 * 1024
+
+
+class ListingParser:
+    """
+    Incremental parser for a single page of a ListObjectsV2 response.
+
+    Bytes are fed as they arrive and parsed `Contents` elements are returned as records
+    right away, finished elements are discarded so memory stays flat independent of the page size.
+    Common prefixes of delimited listings are returned as records with the single key `prefix`.
+
+    Attributes:
+    - is_truncated (bool): Whether more pages are available.
+    - continuation_token (str): Token to request the next page.
+    - last_key (str): The last key or common prefix seen on this page.
+    """
+
+    def __init__(self):
+        self._parser = etree.XMLPullParser(events=("end",))
+        self.is_truncated = False
+        self.continuation_token = None
+        self.last_key = None
+
+    def feed(self, data: bytes) -> Iterator[Dict]:
+        """
+        Feeds a chunk of the response body to the parser.
+
+        Args:
+            data (bytes): The chunk of the response body.
+
+        Returns:
+            Iterator[Dict]: The records completed by this chunk.
+        """
+        self._parser.feed(data)
+        return self._read_events()
+
+    def close(self) -> Iterator[Dict]:
+        """
+        Finishes parsing of the page.
+
+        Returns:
+            Iterator[Dict]: The remaining records of the page.
+        """
+        self._parser.close()
+        return self._read_events()
+
+    def _read_events(self) -> Iterator[Dict]:
+        for _, element in self._parser.read_events():
+            tag = etree.QName(element).localname
+            if tag == "Contents":
+                record = _parse_contents(element)
+                self.last_key = record["key"]
+                yield record
+                # drop parsed elements to keep memory constant
+                element.clear()
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+            elif tag == "CommonPrefixes":
+                prefix = element.findtext("{*}Prefix")
+                self.last_key = prefix
+                yield {"prefix": prefix}
+                element.clear()
+            elif tag == "IsTruncated":
+                self.is_truncated = element.text == "true"
+            elif tag == "NextContinuationToken":
+                self.continuation_token = element.text
+
+
+def _parse_contents(element) -> Dict:
+    fields = {etree.QName(child).localname: child.text for child in element}
+    return {
+        "key": fields["Key"],
+        "hash": (fields.get("ETag") or "").replace('"', ""),
+        "size": int(fields.get("Size") or 0),
+        # parsed once here, to epoch milliseconds
+        "last_modified": parse_timestamp(fields.get("LastModified")),
+        "symlink_path": fields.get("symlink_path") or "",
+    }
+
+
+def list_objects_public(
+    url: str,
+    prefix: Union[None, str] = None,
+    max_keys: int = MAX_KEYS,
+    delimiter: Union[None, str] = None,
+) -> Iterator[Dict]:
+    """
+    Lists all objects of a public bucket, following continuation tokens.
+
+    Each page is streamed and parsed incrementally, records are yielded as soon as they are parsed.
+
+    Args:
+        url (str): The url of the bucket, e.g. `https://<endpoint>/<bucket>`.
+        prefix (str, optional): Only list objects starting with prefix. Defaults to None.
+        max_keys (int, optional): The number of keys requested per page. Defaults to 1000.
+        delimiter (str, optional): Group keys containing the delimiter after the prefix into common prefixes,
+            yielded as records with the single key `prefix`. Defaults to None.
+
+    Yields:
+        Dict: A record with the keys `key`, `hash`, `size`, `last_modified` (epoch milliseconds) and `symlink_path`.
+
+    Raises:
+        requests.HTTPError: If the listing request fails.
+    """
+    params = {"list-type": "2", "max-keys": str(max_keys)}
+    if prefix is not None:
+        params["prefix"] = prefix
+    if delimiter is not None:
+        params["delimiter"] = delimiter
+    while True:
+        parser = ListingParser()
+        with get_session().get(url, params=params, stream=True) as response:
+            if not response.ok:
+                response.raise_for_status()
+            for chunk in response.iter_content(CHUNK_SIZE):
+                yield from parser.feed(chunk)
+            yield from parser.close()
+
+        if not parser.is_truncated or parser.last_key is None:
+            break
+        if parser.continuation_token is not None:
+            params["continuation-token"] = parser.continuation_token
+        else:
+            # stores without continuation token support, continue after last key
+            params["start-after"] = parser.last_key
+            params["marker"] = parser.last_key
+
+
+async def list_objects_public_async(
+    session: aiohttp.ClientSession,
+    url: str,
+    prefix: Union[None, str] = None,
+    max_keys: int = MAX_KEYS,
+    sign: Callable[[str, str], Dict] = None,
+) -> AsyncIterator[Dict]:
+    """
+    Lists all objects of a public bucket asynchronously, see `list_objects_public`.
+
+    Args:
+        session (aiohttp.ClientSession): The session to use for the requests.
+        url (str): The url of the bucket, e.g. `https://<endpoint>/<bucket>`.
+        prefix (str, optional): Only list objects starting with prefix. Defaults to None.
+        max_keys (int, optional): The number of keys requested per page. Defaults to 1000.
+        sign (Callable, optional): Returns the headers of a signed request given method and url,
+            to list private buckets. Defaults to None.
+
+    Yields:
+        Dict: A record with the keys `key`, `hash`, `size`, `last_modified` (epoch milliseconds) and `symlink_path`.
+
+    Raises:
+        aiohttp.ClientResponseError: If the listing request fails.
+    """
+    params = {"list-type": "2", "max-keys": str(max_keys)}
+    if prefix is not None:
+        params["prefix"] = prefix
+    while True:
+        parser = ListingParser()
+        # encode the query once, signatures are computed over the exact query sent
+        page_url = f"{url}?{encode_query(params)}"
+        headers = sign("GET", page_url) if sign is not None else None
+        async with session.get(
+            yarl.URL(page_url, encoded=True), headers=headers
+        ) as response:
+            response.raise_for_status()
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                for record in parser.feed(chunk):
+                    yield record
+            for record in parser.close():
+                yield record
+
+        if not parser.is_truncated or parser.last_key is None:
+            break
+        if parser.continuation_token is not None:
+            params["continuation-token"] = parser.continuation_token
+        else:
+            params["start-after"] = parser.last_key
+            params["marker"] = parser.last_key
+
+
+def encode_query(params: Dict[str, str]) -> str:
+    """
+    Encodes query parameters the way S3 signatures expect them (sorted, RFC 3986).
+
+    Args:
+        params (dict): The query parameters.
+
+    Returns:
+        str: The query string.
+    """
+    return "&".join(
+        f"{quote(key, safe='-_.~')}={quote(value, safe='-_.~')}"
+        for key, value in sorted(params.items())
+    )
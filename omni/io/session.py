@@ -0,0 +1,172 @@
+"""Shared HTTP connection pools for omni.io."""
+
+import asyncio
+import os
+import threading
+from typing import Union
+
+import aiohttp
+import certifi
+import requests
+import requests.adapters
+import urllib3
+
+from omni.io.transfer import CountingRetry
+
+# timeout in seconds to establish a connection
+CONNECT_TIMEOUT = 10
+# timeout in seconds between two received chunks of a response
+READ_TIMEOUT = 60
+# maximum number of (keep-alive) connections per host
+MAX_CONNECTIONS_PER_HOST = 32
+# maximum number of connections of an async session
+MAX_CONNECTIONS = 100
+# time in seconds an idle connection of an async session is kept open
+KEEPALIVE_TIMEOUT = 30
+# http status codes of failed requests worth retrying
+RETRY_STATUSES = (408, 429, 500, 502, 503, 504)
+
+_lock = threading.Lock()
+_session = None
+_pool_manager = None
+
+
+class TimeoutHTTPAdapter(requests.adapters.HTTPAdapter):
+    """HTTPAdapter applying the default timeouts to requests without explicit timeout."""
+
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+        return super().send(request, timeout=timeout, **kwargs)
+
+
+def configure(
+    connect_timeout: Union[None, float] = None,
+    read_timeout: Union[None, float] = None,
+    max_connections_per_host: Union[None, int] = None,
+    max_connections: Union[None, int] = None,
+) -> None:
+    """
+    Configures timeouts and connection limits of the shared sessions.
+
+    Already created sessions are closed, new ones are created with the new settings on next use.
+
+    Args:
+        connect_timeout (float, optional): Timeout in seconds to establish a connection. Defaults to None (unchanged).
+        read_timeout (float, optional): Timeout in seconds between received chunks. Defaults to None (unchanged).
+        max_connections_per_host (int, optional): Maximum number of connections per host. Defaults to None (unchanged).
+        max_connections (int, optional): Maximum number of connections of async sessions. Defaults to None (unchanged).
+    """
+    global CONNECT_TIMEOUT, READ_TIMEOUT, MAX_CONNECTIONS_PER_HOST, MAX_CONNECTIONS
+    if connect_timeout is not None:
+        CONNECT_TIMEOUT = connect_timeout
+    if read_timeout is not None:
+        READ_TIMEOUT = read_timeout
+    if max_connections_per_host is not None:
+        MAX_CONNECTIONS_PER_HOST = max_connections_per_host
+    if max_connections is not None:
+        MAX_CONNECTIONS = max_connections
+    close()
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the shared requests session.
+
+    The session keeps connections alive and is safe to be used from multiple threads.
+
+    Returns:
+        requests.Session: The shared session.
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = TimeoutHTTPAdapter(
+                pool_connections=MAX_CONNECTIONS_PER_HOST,
+                pool_maxsize=MAX_CONNECTIONS_PER_HOST,
+                max_retries=_retries(),
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def _retries() -> urllib3.Retry:
+    # retry idempotent requests on connection errors and server errors, with backoff
+    return CountingRetry(
+        total=5,
+        backoff_factor=0.2,
+        status_forcelist=[429, 500, 502, 503, 504],
+        raise_on_status=False,
+    )
+
+
+def get_pool_manager() -> urllib3.PoolManager:
+    """
+    Returns the shared urllib3 pool manager, e.g. for the `http_client` of a MinIO client.
+
+    Returns:
+        urllib3.PoolManager: The shared pool manager.
+    """
+    global _pool_manager
+    with _lock:
+        if _pool_manager is None:
+            # same retry behaviour and certificate verification as the default http client of minio
+            _pool_manager = urllib3.PoolManager(
+                maxsize=MAX_CONNECTIONS_PER_HOST,
+                cert_reqs="CERT_REQUIRED",
+                ca_certs=os.environ.get("SSL_CERT_FILE") or certifi.where(),
+                timeout=urllib3.Timeout(connect=CONNECT_TIMEOUT, read=READ_TIMEOUT),
+                retries=_retries(),
+            )
+        return _pool_manager
+
+
+def client_session() -> aiohttp.ClientSession:
+    """
+    Creates an async session with the shared timeouts and connection limits.
+
+    An aiohttp session is bound to the event loop it is created in, create one per batch of requests
+    and pass it on instead of opening a session per request.
+
+    Returns:
+        aiohttp.ClientSession: The session, to be used as async context manager.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=MAX_CONNECTIONS,
+        limit_per_host=MAX_CONNECTIONS_PER_HOST,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+    )
+    timeout = aiohttp.ClientTimeout(
+        sock_connect=CONNECT_TIMEOUT, sock_read=READ_TIMEOUT
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+
+def is_retryable(e: BaseException) -> bool:
+    """
+    Decides whether a failed async request is worth retrying.
+
+    Args:
+        e (BaseException): The exception of the request.
+
+    Returns:
+        bool: True for connection errors, timeouts and responses with a status in RETRY_STATUSES.
+    """
+    if isinstance(e, aiohttp.ClientResponseError):
+        return e.status in RETRY_STATUSES
+    return isinstance(e, (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError))
+
+
+def close() -> None:
+    """Closes the shared sessions."""
+    global _session, _pool_manager
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+        if _pool_manager is not None:
+            _pool_manager.clear()
+            _pool_manager = None
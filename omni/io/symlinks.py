@@ -0,0 +1,122 @@
+"""Symlink manifest to reference objects of previous benchmark versions."""
+
+import json
+from typing import (
+    IO,
+    AsyncIterable,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Tuple,
+    Union,
+)
+
+# object holding the symlinks of a version, one json record per line sorted by key
+SYMLINK_MANIFEST = ".symlinks.jsonl"
+# size of the chunks symlink manifests are read in
+MANIFEST_CHUNK_SIZE = 64 * 1024
+
+
+def write_manifest(links: Iterable[Dict], file: IO[bytes]) -> int:
+    """
+    Writes symlink records to a manifest file.
+
+    Args:
+        links (Iterable[Dict]): Records with the keys `key`, `symlink_path`, `hash`, `size` and `last_modified`, sorted by key.
+        file (IO[bytes]): The file to write to.
+
+    Returns:
+        int: The number of bytes written.
+    """
+    length = 0
+    for link in links:
+        length += file.write((json.dumps(link) + "\n").encode())
+    return length
+
+
+def read_manifest(chunks: Iterable[bytes]) -> Iterator[Dict]:
+    """
+    Reads symlink records from the chunks of a manifest.
+
+    Args:
+        chunks (Iterable[bytes]): The content of the manifest in chunks.
+
+    Yields:
+        Dict: A symlink record.
+    """
+    rest = b""
+    for chunk in chunks:
+        lines = (rest + chunk).split(b"\n")
+        rest = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    if rest.strip():
+        yield json.loads(rest)
+
+
+def merge_symlinks(objects: Iterable[Dict], links: Iterable[Dict]) -> Iterator[Dict]:
+    """
+    Merges the records of a listing with the symlink records of its manifest.
+
+    Both inputs must be sorted by key, the output is sorted by key as well.
+    Objects shadow symlinks with the same key and the manifest itself is not listed.
+
+    Args:
+        objects (Iterable[Dict]): The records of the listing.
+        links (Iterable[Dict]): The symlink records.
+
+    Yields:
+        Dict: The merged records.
+    """
+    links = iter(links)
+    link = next(links, None)
+    for obj in objects:
+        records, link = _merge_object(obj, link, links)
+        yield from records
+    if link is not None:
+        yield link
+        yield from links
+
+
+async def merge_symlinks_async(
+    objects: AsyncIterable[Dict], links: Iterable[Dict]
+) -> AsyncIterator[Dict]:
+    """
+    Merges the records of an async listing with the symlink records of its manifest, see `merge_symlinks`.
+
+    Args:
+        objects (AsyncIterable[Dict]): The records of the listing.
+        links (Iterable[Dict]): The symlink records.
+
+    Yields:
+        Dict: The merged records.
+    """
+    links = iter(links)
+    link = next(links, None)
+    async for obj in objects:
+        records, link = _merge_object(obj, link, links)
+        for record in records:
+            yield record
+    if link is not None:
+        yield link
+        for link in links:
+            yield link
+
+
+def _merge_object(
+    obj: Dict, link: Union[None, Dict], links: Iterator[Dict]
+) -> Tuple[List[Dict], Union[None, Dict]]:
+    # the links sorting before the object and the object itself, and the next link after it
+    records = []
+    while link is not None and link["key"] < obj["key"]:
+        records.append(link)
+        link = next(links, None)
+    if link is not None and link["key"] == obj["key"]:
+        # objects shadow symlinks with the same key
+        link = next(links, None)
+    if obj["key"] != SYMLINK_MANIFEST:
+        records.append(obj)
+    return records, link
@@ -0,0 +1,409 @@
+"""Helpers to run remote storage transfers robustly."""
+
+import asyncio
+import collections
+import contextlib
+import logging
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Tuple, Type, Union
+
+import urllib3
+
+logger = logging.getLogger(__name__)
+
+# number of retries of a failed transfer
+RETRIES = 3
+# base delay in seconds between retries, doubled on every retry
+BACKOFF = 0.5
+# upper bound of the delay in seconds between retries
+MAX_BACKOFF = 30
+# fraction of the delay randomized, so that failed transfers do not retry in lockstep
+JITTER = 0.5
+# number of recent latencies the hedging threshold is computed from
+LATENCY_SAMPLES = 1000
+# minimum number of latencies before requests are hedged
+HEDGE_MIN_SAMPLES = 20
+# relative throughput loss tolerated before an adaptive limit is lowered
+THROUGHPUT_TOLERANCE = 0.05
+
+
+class TransferStats:
+    """
+    Thread-safe counters of transfer attempts, retries, redirects, timeouts, hedged requests and failures.
+
+    Attributes:
+    - counters (collections.Counter): The counters by name.
+    """
+
+    def __init__(self):
+        self.counters = collections.Counter()
+        self._lock = threading.Lock()
+
+    def add(self, name: str, n: int = 1) -> None:
+        """
+        Increments a counter.
+
+        Args:
+            name (str): The counter, e.g. "retries".
+            n (int, optional): The increment. Defaults to 1.
+        """
+        with self._lock:
+            self.counters[name] += n
+
+    def snapshot(self) -> Dict[str, int]:
+        """
+        Returns the current counts.
+
+        Returns:
+            dict: The counts by name.
+        """
+        with self._lock:
+            return dict(self.counters)
+
+    def reset(self) -> None:
+        """Resets all counters."""
+        with self._lock:
+            self.counters.clear()
+
+
+# counters of all transfers of omni.io
+stats = TransferStats()
+
+
+def backoff_delay(
+    attempt: int,
+    backoff: float = BACKOFF,
+    max_backoff: float = MAX_BACKOFF,
+    jitter: float = JITTER,
+) -> float:
+    """
+    Computes the delay before a retry, exponential with jitter.
+
+    Args:
+        attempt (int): The number of the failed attempt, starting at 0.
+        backoff (float, optional): The delay after the first attempt in seconds. Defaults to BACKOFF.
+        max_backoff (float, optional): The upper bound of the delay in seconds. Defaults to MAX_BACKOFF.
+        jitter (float, optional): The fraction of the delay that is randomized. Defaults to JITTER.
+
+    Returns:
+        float: The delay in seconds.
+    """
+    delay = min(max_backoff, backoff * 2**attempt)
+    return delay * (1 - jitter * random.random())
+
+
+def retry(
+    func: Callable,
+    *args,
+    retries: int = RETRIES,
+    backoff: float = BACKOFF,
+    exceptions: Tuple[Type[BaseException], ...] = (Exception,),
+    jitter: float = JITTER,
+    **kwargs,
+):
+    """
+    Calls a function and retries it with exponential backoff and jitter if it fails.
+
+    Retries and failures are counted in `stats`.
+
+    Args:
+        func (Callable): The function to call.
+        *args: Positional arguments passed to func.
+        retries (int, optional): The maximum number of retries. Defaults to RETRIES.
+        backoff (float, optional): The delay before the first retry in seconds. Defaults to BACKOFF.
+        exceptions (tuple, optional): The exceptions that trigger a retry. Defaults to (Exception,).
+        jitter (float, optional): The fraction of the delay that is randomized. Defaults to JITTER.
+        **kwargs: Keyword arguments passed to func.
+
+    Returns:
+        The return value of func.
+
+    Raises:
+        The last exception raised by func if all retries failed.
+    """
+    for attempt in range(retries + 1):
+        stats.add("attempts")
+        try:
+            return func(*args, **kwargs)
+        except exceptions as e:
+            if attempt == retries:
+                stats.add("failures")
+                raise
+            stats.add("retries")
+            delay = backoff_delay(attempt, backoff, jitter=jitter)
+            name = getattr(func, "__name__", repr(func))
+            logger.warning(f"{name} failed ({e}), retrying in {delay:.2f}s")
+            time.sleep(delay)
+
+
+class CountingRetry(urllib3.Retry):
+    """urllib3 retry configuration counting its retries and redirects in `stats`."""
+
+    def increment(
+        self,
+        method=None,
+        url=None,
+        response=None,
+        error=None,
+        _pool=None,
+        _stacktrace=None,
+    ):
+        # raises MaxRetryError if retries are exhausted, that call is no retry
+        new_retry = super().increment(method, url, response, error, _pool, _stacktrace)
+        if error is None and response is not None and response.get_redirect_location():
+            stats.add("redirects")
+        else:
+            stats.add("retries")
+        return new_retry
+
+
+class TransferPolicy:
+    """
+    Runs async transfers with retries, per request deadlines and hedged requests.
+
+    A request still running after the `hedge_quantile` of recent latencies is hedged: a second
+    (speculative) request is started and the first one to succeed wins, the other one is cancelled.
+
+    Attributes:
+    - retries (int): The maximum number of retries.
+    - backoff (float): The delay before the first retry in seconds, see `backoff_delay`.
+    - jitter (float): The fraction of the delay that is randomized.
+    - deadline (float): The time in seconds a single attempt may take, None for no deadline.
+    - hedge_quantile (float): The latency quantile after which requests are hedged, None to never hedge.
+    - retryable (Callable): Decides whether an exception is retried.
+    - latencies (collections.deque): Recent latencies of successful requests in seconds.
+    """
+
+    def __init__(
+        self,
+        retries: int = RETRIES,
+        backoff: float = BACKOFF,
+        jitter: float = JITTER,
+        deadline: Union[None, float] = None,
+        hedge_quantile: Union[None, float] = None,
+        retryable: Callable[[BaseException], bool] = None,
+    ):
+        self.retries = retries
+        self.backoff = backoff
+        self.jitter = jitter
+        self.deadline = deadline
+        self.hedge_quantile = hedge_quantile
+        self.retryable = retryable or (lambda e: True)
+        self.latencies = collections.deque(maxlen=LATENCY_SAMPLES)
+
+    def hedge_delay(self) -> Union[None, float]:
+        """
+        Returns the time after which a request is hedged.
+
+        Returns:
+            float or None: The delay in seconds, None if requests are not hedged (yet).
+        """
+        if self.hedge_quantile is None or len(self.latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        latencies = sorted(self.latencies)
+        return latencies[int(self.hedge_quantile * (len(latencies) - 1))]
+
+    async def run(
+        self,
+        request: Callable[[bool], Awaitable],
+        deadline: Union[None, float] = None,
+        hedge: bool = True,
+    ):
+        """
+        Runs a request with retries, deadline and hedging.
+
+        Args:
+            request (Callable): Creates the request, called with True for hedged (speculative) requests.
+            deadline (float, optional): The deadline of a single attempt in seconds. Defaults to None which uses the policy's deadline.
+            hedge (bool, optional): Whether the request may be hedged and its latency is recorded. Defaults to True.
+
+        Returns:
+            The result of the request.
+
+        Raises:
+            The last exception of the request if all retries failed or the exception is not retryable.
+        """
+        if deadline is None:
+            deadline = self.deadline
+        for attempt in range(self.retries + 1):
+            stats.add("attempts")
+            start = time.monotonic()
+            try:
+                result = await asyncio.wait_for(
+                    self._run_once(request, hedge), deadline
+                )
+            except Exception as e:
+                timeout = isinstance(e, asyncio.TimeoutError)
+                if timeout:
+                    stats.add("timeouts")
+                if attempt == self.retries or not (timeout or self.retryable(e)):
+                    stats.add("failures")
+                    raise
+                stats.add("retries")
+                delay = backoff_delay(attempt, self.backoff, jitter=self.jitter)
+                logger.warning(f"Transfer failed ({e!r}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+            else:
+                if hedge:
+                    self.latencies.append(time.monotonic() - start)
+                return result
+
+    async def _run_once(self, request, hedge):
+        delay = self.hedge_delay() if hedge else None
+        if delay is None:
+            return await request(False)
+        primary = asyncio.ensure_future(request(False))
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if primary in done:
+                return primary.result()
+            stats.add("hedges")
+            secondary = asyncio.ensure_future(request(True))
+            pending = {primary, secondary}
+            while len(pending) > 0:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is secondary:
+                            stats.add("hedge_wins")
+                        return task.result()
+            # both failed
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            # let cancelled requests clean up
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+class ByteBudget:
+    """
+    Limits the number of bytes in flight across concurrent transfers.
+
+    Reservations larger than the limit are capped to the limit, so a single large transfer
+    still proceeds (alone).
+
+    Attributes:
+    - limit (int): The maximum number of bytes in flight.
+    - available (int): The number of bytes currently available.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.available = limit
+        self._condition = threading.Condition()
+
+    def acquire(self, nbytes: int) -> int:
+        """
+        Blocks until the bytes are available and reserves them.
+
+        Args:
+            nbytes (int): The number of bytes.
+
+        Returns:
+            int: The number of bytes reserved, to be released again.
+        """
+        nbytes = min(nbytes, self.limit)
+        with self._condition:
+            self._condition.wait_for(lambda: self.available >= nbytes)
+            self.available -= nbytes
+        return nbytes
+
+    def release(self, nbytes: int) -> None:
+        """
+        Releases reserved bytes.
+
+        Args:
+            nbytes (int): The number of bytes returned by acquire.
+        """
+        with self._condition:
+            self.available += nbytes
+            self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def reserve(self, nbytes: int):
+        """
+        Reserves bytes for the duration of a with block.
+
+        Args:
+            nbytes (int): The number of bytes.
+        """
+        nbytes = self.acquire(nbytes)
+        try:
+            yield nbytes
+        finally:
+            self.release(nbytes)
+
+
+class AdaptiveLimiter:
+    """
+    Limits the number of concurrent async transfers, adapting the limit to throughput and errors.
+
+    The limit is raised by one after every round of transfers (as many as the current limit) that did not lower
+    the throughput, lowered by one if the throughput dropped and halved on errors (additive increase,
+    multiplicative decrease).
+
+    Attributes:
+    - maximum (int): The upper bound of the limit.
+    - minimum (int): The lower bound of the limit.
+    - limit (int): The current limit.
+    - active (int): The number of transfers in progress.
+    - throughput (float): The throughput in bytes per second of the last round.
+    """
+
+    def __init__(self, maximum: int, initial: int = None, minimum: int = 1):
+        self.maximum = maximum
+        self.minimum = minimum
+        self.limit = min(maximum, initial or maximum)
+        self.active = 0
+        self.throughput = 0.0
+        self._condition = asyncio.Condition()
+        self._round_bytes = 0
+        self._round_count = 0
+        self._round_start = time.monotonic()
+
+    async def acquire(self) -> None:
+        """Waits until a transfer can be started."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+
+    async def release(self, nbytes: int = 0, error: bool = False) -> None:
+        """
+        Marks a transfer as done and adapts the limit.
+
+        Args:
+            nbytes (int, optional): The number of bytes transferred. Defaults to 0.
+            error (bool, optional): Whether the transfer failed. Defaults to False.
+        """
+        async with self._condition:
+            self.active -= 1
+            if error:
+                self.limit = max(self.minimum, self.limit // 2)
+                self._reset_round()
+            else:
+                self._round_bytes += nbytes
+                self._round_count += 1
+                if self._round_count >= self.limit:
+                    self._adapt()
+            self._condition.notify_all()
+
+    def _adapt(self) -> None:
+        elapsed = max(time.monotonic() - self._round_start, 1e-6)
+        throughput = self._round_bytes / elapsed
+        if throughput >= self.throughput * (1 - THROUGHPUT_TOLERANCE):
+            self.limit = min(self.maximum, self.limit + 1)
+        else:
+            self.limit = max(self.minimum, self.limit - 1)
+        self.throughput = throughput
+        self._reset_round()
+
+    def _reset_round(self) -> None:
+        self._round_bytes = 0
+        self._round_count = 0
+        self._round_start = time.monotonic()
@@ -1,8 +1,9 @@
 """Utility functions to manage dataset handling"""
 
 import hashlib
-
-from omni.io.MinIOStorage import MinIOStorage
+import os
+import re
+from typing import Iterator, List, Tuple, Union
 
 
 def get_storage(storage_type: str, auth_options: dict, benchmark: str):
@@ -17,21 +18,301 @@ def get_storage(storage_type: str, auth_options: dict, benchmark: str):
     Returns:
     - RemoteStorage: The remote storage object.
     """
+    # the storages are imported here, they depend on this module
     if storage_type == "minio":
+        from omni.io.MinIOStorage import MinIOStorage
+
         return MinIOStorage(auth_options, benchmark)
+    elif storage_type == "local":
+        from omni.io.LocalStorage import LocalStorage
+
+        return LocalStorage(auth_options, benchmark)
+    elif storage_type == "s3":
+        # boto3 is optional, only imported when needed
+        from omni.io.S3Storage import S3Storage
+
+        return S3Storage(auth_options, benchmark)
+    elif storage_type == "swift":
+        # python-swiftclient is optional, only imported when needed
+        from omni.io.SwiftStorage import SwiftStorage
+
+        return SwiftStorage(auth_options, benchmark)
     else:
         raise ValueError("Invalid storage type")
 
 
-# https://stackoverflow.com/a/3431838
-def md5(fname: str):
+def object_name(filename: str) -> str:
+    """
+    Returns the object name of a local file, with forward slashes and without a leading "./".
+
+    Args:
+        filename (str): The path of the file, relative to the working directory.
+
+    Returns:
+        str: The object name.
+
+    Raises:
+        ValueError: If the path is absolute or outside the working directory.
+    """
+    if os.path.isabs(filename):
+        raise ValueError(f"Absolute path {filename} can not be used as object name")
+    name = os.path.normpath(filename).replace(os.sep, "/")
+    if name in (".", "..") or name.startswith("../"):
+        raise ValueError(f"Path {filename} is outside the working directory")
+    return name
+
+
+# size of the buffer files are hashed with, hashlib releases the GIL while hashing it
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+# part sizes of common S3 clients (aws cli/boto3, minio, mc, s3cmd, rclone), tried first
+DEFAULT_PART_SIZES = [
+    8 * 1024**2,
+    5 * 1024**2,
+    16 * 1024**2,
+    15 * 1000**2,
+    64 * 1024**2,
+    128 * 1024**2,
+]
+# maximum number of part sizes tried to rebuild a multipart ETag
+MAX_PART_SIZE_CANDIDATES = 16
+# maximum number of parts of a multipart upload
+MAX_MULTIPART_COUNT = 10000
+
+
+def _iter_file(fname: str) -> Iterator[memoryview]:
+    # reuse one large buffer, reads and hashing of such buffers release the GIL
+    with open(fname, "rb", buffering=0) as f:
+        # small files do not need a large buffer
+        size = os.fstat(f.fileno()).st_size
+        buffer = bytearray(max(min(size, HASH_CHUNK_SIZE), 1))
+        view = memoryview(buffer)
+        for n in iter(lambda: f.readinto(buffer), 0):
+            yield view[:n]
+
+
+def md5(fname: str) -> str:
+    """
+    Computes the md5 checksum of a file.
+
+    Args:
+        fname (str): The file.
+
+    Returns:
+        str: The hex digest.
+    """
     hash_md5 = hashlib.md5()
-    with open(fname, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_md5.update(chunk)
+    for chunk in _iter_file(fname):
+        hash_md5.update(chunk)
     return hash_md5.hexdigest()
 
 
+def parse_etag(etag: str) -> Tuple[str, Union[None, int]]:
+    """
+    Splits an S3 ETag into its hash and number of parts.
+
+    Args:
+        etag (str): The ETag, optionally quoted.
+
+    Returns:
+        tuple: The hash and the number of parts, None if the object was not uploaded in parts.
+    """
+    etag = etag.strip('"')
+    if re.fullmatch(r"[0-9a-fA-F]{32}-\d+", etag):
+        hash, parts = etag.split("-")
+        return hash.lower(), int(parts)
+    return etag.lower(), None
+
+
+def part_sizes(size: Union[None, int], parts: int) -> List[int]:
+    """
+    Infers the part sizes a multipart upload can have used.
+
+    The part sizes of common clients are tried first, followed by MiB aligned sizes
+    starting at the smallest size that results in the given number of parts.
+
+    Args:
+        size (int): The size of the object, None if unknown.
+        parts (int): The number of parts.
+
+    Returns:
+        list: The candidate part sizes, at most MAX_PART_SIZE_CANDIDATES.
+    """
+    if size is None:
+        return list(DEFAULT_PART_SIZES)
+    if parts <= 1:
+        return [max(size, 1)]
+
+    def valid(part_size):
+        return part_size > 0 and -(-size // part_size) == parts
+
+    # minio-py picks the smallest multiple of 5 MiB that keeps the number of parts in range
+    minio_part_size = -(-size // MAX_MULTIPART_COUNT)
+    minio_part_size = -(-minio_part_size // (5 * 1024**2)) * 5 * 1024**2
+    smallest = -(-size // parts)
+    candidates = DEFAULT_PART_SIZES + [minio_part_size, smallest]
+    mib = -(-smallest // 1024**2) * 1024**2
+    while len(candidates) < MAX_PART_SIZE_CANDIDATES * 2 and valid(mib):
+        candidates.append(mib)
+        mib += 1024**2
+
+    sizes = []
+    for candidate in candidates:
+        if valid(candidate) and candidate not in sizes:
+            sizes.append(candidate)
+    return sizes[:MAX_PART_SIZE_CANDIDATES]
+
+
+class ETagHasher:
+    """
+    Incrementally computes the ETag S3 assigns to an object, the md5 checksum for single part uploads
+    and the md5 checksum of the concatenated md5 digests of the parts (`<md5>-<parts>`) for multipart uploads.
+
+    Attributes:
+    - part_size (int): The part size of the upload, None for single part uploads.
+    """
+
+    def __init__(self, part_size: Union[None, int] = None):
+        self.part_size = part_size
+        self._hash = hashlib.md5()
+        self._filled = 0
+        self._digests = []
+
+    def update(self, data: bytes) -> None:
+        """
+        Adds data to the checksum.
+
+        Args:
+            data (bytes): The data.
+        """
+        if self.part_size is None:
+            self._hash.update(data)
+            return
+        data = memoryview(data)
+        while len(data) > 0:
+            n = min(len(data), self.part_size - self._filled)
+            self._hash.update(data[:n])
+            self._filled += n
+            data = data[n:]
+            if self._filled == self.part_size:
+                self._digests.append(self._hash.digest())
+                self._hash = hashlib.md5()
+                self._filled = 0
+
+    def hexdigest(self) -> str:
+        """
+        Returns the ETag of the data added so far.
+
+        Returns:
+            str: The ETag, without quotes.
+        """
+        if self.part_size is None:
+            return self._hash.hexdigest()
+        digests = list(self._digests)
+        if self._filled > 0 or len(digests) == 0:
+            digests.append(self._hash.digest())
+        return f"{hashlib.md5(b''.join(digests)).hexdigest()}-{len(digests)}"
+
+
+class ETagVerifier:
+    """
+    Verifies data against an S3 ETag, rebuilding multipart ETags for all candidate part sizes in a single pass.
+
+    Attributes:
+    - etag (str): The expected ETag, without quotes.
+    - hashers (list): One ETagHasher per candidate part size.
+    """
+
+    def __init__(
+        self,
+        etag: str,
+        size: Union[None, int] = None,
+        part_size: Union[None, int] = None,
+    ):
+        """
+        Args:
+            etag (str): The expected ETag.
+            size (int, optional): The size of the object, used to infer part sizes. Defaults to None.
+            part_size (int, optional): The part size of a multipart upload, inferred if None. Defaults to None.
+        """
+        hash, parts = parse_etag(etag)
+        self.etag = hash if parts is None else f"{hash}-{parts}"
+        if parts is None:
+            self.hashers = [ETagHasher()]
+        elif part_size is not None:
+            self.hashers = [ETagHasher(part_size)]
+        else:
+            self.hashers = [ETagHasher(p) for p in part_sizes(size, parts)]
+
+    def update(self, data: bytes) -> None:
+        """
+        Adds data to the checksums.
+
+        Args:
+            data (bytes): The data.
+        """
+        for hasher in self.hashers:
+            hasher.update(data)
+
+    def hexdigest(self) -> str:
+        """
+        Returns the computed ETag, the matching one if any.
+
+        Returns:
+            str: The ETag, without quotes.
+        """
+        digests = [hasher.hexdigest() for hasher in self.hashers]
+        if self.etag in digests:
+            return self.etag
+        # no part size matches, e.g. a corrupt file
+        return digests[0] if len(digests) > 0 else ""
+
+    def verify(self) -> bool:
+        """
+        Checks whether the data added so far matches the ETag.
+
+        Returns:
+            bool: True if it matches.
+        """
+        return any(hasher.hexdigest() == self.etag for hasher in self.hashers)
+
+
+def file_etag(fname: str, etag: str, part_size: Union[None, int] = None) -> str:
+    """
+    Computes the ETag of a local file in the form of a remote ETag (single or multipart).
+
+    Args:
+        fname (str): The file.
+        etag (str): The remote ETag.
+        part_size (int, optional): The part size of a multipart upload, inferred if None. Defaults to None.
+
+    Returns:
+        str: The local ETag, equal to the remote ETag (without quotes) if the file matches.
+    """
+    return _hash_file(fname, etag, part_size).hexdigest()
+
+
+def verify_etag(fname: str, etag: str, part_size: Union[None, int] = None) -> bool:
+    """
+    Checks a local file against a remote ETag (single or multipart).
+
+    Args:
+        fname (str): The file.
+        etag (str): The remote ETag.
+        part_size (int, optional): The part size of a multipart upload, inferred if None. Defaults to None.
+
+    Returns:
+        bool: True if the file matches.
+    """
+    return _hash_file(fname, etag, part_size).verify()
+
+
+def _hash_file(fname: str, etag: str, part_size: Union[None, int]) -> ETagVerifier:
+    verifier = ETagVerifier(etag, os.path.getsize(fname), part_size)
+    for chunk in _iter_file(fname):
+        verifier.update(chunk)
+    return verifier
+
+
 # from: https://stackoverflow.com/a/1094933
 def sizeof_fmt(num: int, suffix: str = "B"):
     if abs(num) < 1024.0:
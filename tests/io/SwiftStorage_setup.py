@@ -0,0 +1,79 @@
+import re
+import time
+
+import requests
+from testcontainers.core.container import DockerContainer
+
+# Swift all-in-one, with tempauth (account `test`, user `tester`, key `testing`)
+SWIFT_IMAGE = "openstackswift/saio:latest"
+SWIFT_PORT = 8080
+# seconds to wait for the proxy to answer
+SWIFT_STARTUP_TIMEOUT = 120
+
+
+class SwiftSetup:
+    def __init__(self, init: bool = True) -> None:
+        self.do_init = init
+        if self.do_init:
+            self.swift = DockerContainer(SWIFT_IMAGE).with_exposed_ports(SWIFT_PORT)
+            self.swift.start()
+            self.url = f"http://{self.swift.get_container_host_ip()}:{self.swift.get_exposed_port(SWIFT_PORT)}"
+            self._wait_ready()
+
+    def _wait_ready(self):
+        start = time.time()
+        while time.time() - start < SWIFT_STARTUP_TIMEOUT:
+            try:
+                if requests.get(f"{self.url}/info", timeout=1).ok:
+                    return
+            except requests.exceptions.ConnectionError:
+                pass
+            time.sleep(1)
+        raise Exception("Swift container did not start")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.do_init:
+            self.swift.stop()
+
+
+class TmpSwiftStorage:
+    def __init__(self, testcontainer) -> None:
+        self.url = testcontainer.url
+        self.auth_options = {}
+        self.auth_options["endpoint"] = f"{self.url}/v1/AUTH_test"
+        self.auth_options["auth"] = f"{self.url}/auth/v1.0"
+        self.auth_options["auth_version"] = "1.0"
+        self.auth_options["user"] = "test:tester"
+        self.auth_options["key"] = "testing"
+
+        self.auth_options_readonly = {"endpoint": self.auth_options["endpoint"]}
+
+        self.bucket_base = "test1"
+
+    def cleanup_containers(self):
+        from swiftclient.service import SwiftService
+
+        options = {
+            "os_storage_url": self.auth_options["endpoint"],
+            "auth": self.auth_options["auth"],
+            "auth_version": self.auth_options["auth_version"],
+            "user": self.auth_options["user"],
+            "key": self.auth_options["key"],
+        }
+        with SwiftService(options=options) as service:
+            for page in service.list():
+                for item in page["listing"]:
+                    if re.search(rf"^{self.bucket_base}\.", item["name"]) or re.search(
+                        rf"^{self.bucket_base}\d\.", item["name"]
+                    ):
+                        for _ in service.delete(container=item["name"]):
+                            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cleanup_containers()
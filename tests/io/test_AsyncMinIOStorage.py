@@ -0,0 +1,125 @@
+import asyncio
+import io
+import os
+import sys
+
+import pytest
+from packaging.version import Version
+
+from omni.io.AsyncMinIOStorage import AsyncMinIOStorage
+from omni.io.MinIOStorage import MinIOStorage, endpoint_url
+from tests.io.MinIOStorage_setup import MinIOSetup, TmpMinIOStorage
+
+if not sys.platform == "linux":
+    pytest.skip(
+        "for GHA, only works on linux (https://docs.github.com/en/actions/using-containerized-services/about-service-containers#about-service-containers)",
+        allow_module_level=True,
+    )
+
+# setup and start minio container
+minio_testcontainer = MinIOSetup(sys.platform == "linux")
+
+
+class TestAsyncMinIOStorage:
+    def test_init_fail(self):
+        with pytest.raises(ValueError):
+            AsyncMinIOStorage(auth_options={}, benchmark="test.1")
+
+    def test_url(self):
+        # the same scheme as the synchronous storage, https unless secure is False
+        for options, url in [
+            ({"endpoint": "localhost:9000"}, "https://localhost:9000/bm.0.1"),
+            (
+                {"endpoint": "https://localhost:9000", "secure": False},
+                "http://localhost:9000/bm.0.1",
+            ),
+        ]:
+            ss = AsyncMinIOStorage(auth_options=options, benchmark="bm")
+            assert ss._url("bm.0.1") == url
+            assert endpoint_url(options, "bm.0.1") == url
+
+    def test_connect(self):
+        with TmpMinIOStorage(minio_testcontainer) as tmp:
+            _ = MinIOStorage(auth_options=tmp.auth_options, benchmark=tmp.bucket_base)
+
+            async def main():
+                async with AsyncMinIOStorage(
+                    auth_options=tmp.auth_options, benchmark=tmp.bucket_base
+                ) as ss:
+                    ss.set_current_version()
+                    return ss.versions, ss.version
+
+            versions, version = asyncio.run(main())
+            assert versions == [Version("0.1")]
+            assert version == Version("0.1")
+
+    def test_list_copy_and_download(self, tmp_path, monkeypatch):
+        with TmpMinIOStorage(minio_testcontainer) as tmp:
+            ms = MinIOStorage(auth_options=tmp.auth_options, benchmark=tmp.bucket_base)
+            ms.client.put_object(
+                f"{ms.benchmark}.0.1", "file1.txt", io.BytesIO(b"file1"), 5
+            )
+            monkeypatch.chdir(tmp_path)
+
+            async def main():
+                async with AsyncMinIOStorage(
+                    auth_options=tmp.auth_options, benchmark=tmp.bucket_base
+                ) as ss:
+                    ss.set_current_version()
+                    ss.set_new_version("0.2")
+                    await ss._get_objects()
+                    meta = await ss.get_meta("file1.txt")
+                    failed_copy = await ss.copy_objects()
+                    failed_download = await ss.download_files(["file1.txt"])
+                    return ss.files, meta, failed_copy, failed_download
+
+            files, meta, failed_copy, failed_download = asyncio.run(main())
+            assert files.keys() == {"file1.txt"}
+            assert meta["size"] == 5
+            assert failed_copy == []
+            assert failed_download == []
+            with open("file1.txt", "rb") as f:
+                assert f.read() == b"file1"
+            objects = ms.client.list_objects(f"{ms.benchmark}.0.2")
+            assert [o.object_name for o in objects] == ["file1.txt"]
+
+    def test_upload_files(self, tmp_path, monkeypatch):
+        with TmpMinIOStorage(minio_testcontainer) as tmp:
+            _ = MinIOStorage(auth_options=tmp.auth_options, benchmark=tmp.bucket_base)
+            monkeypatch.chdir(tmp_path)
+            os.makedirs("out")
+            with open("out/file1.bin", "wb") as f:
+                f.write(os.urandom(6 * 1024**2))
+
+            async def main():
+                async with AsyncMinIOStorage(
+                    auth_options=tmp.auth_options, benchmark=tmp.bucket_base
+                ) as ss:
+                    ss.set_current_version()
+                    failed = await ss.upload_files(
+                        ["out/file1.bin", "out/missing.txt"], part_size=5 * 1024**2
+                    )
+                    await ss._get_objects()
+                    return failed, ss.files
+
+            failed, files = asyncio.run(main())
+            assert failed == ["out/missing.txt"]
+            assert files["out/file1.bin"]["hash"].endswith("-2")
+
+    def test_readonly_listing(self):
+        with TmpMinIOStorage(minio_testcontainer) as tmp:
+            ms = MinIOStorage(auth_options=tmp.auth_options, benchmark=tmp.bucket_base)
+            ms.client.put_object(
+                f"{ms.benchmark}.0.1", "file1.txt", io.BytesIO(b"file1"), 5
+            )
+
+            async def main():
+                async with AsyncMinIOStorage(
+                    auth_options=tmp.auth_options_readonly, benchmark=tmp.bucket_base
+                ) as ss:
+                    ss.set_current_version()
+                    await ss._get_objects()
+                    return ss.files
+
+            files = asyncio.run(main())
+            assert files.keys() == {"file1.txt"}
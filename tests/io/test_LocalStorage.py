@@ -0,0 +1,171 @@
+import os
+
+import pytest
+from packaging.version import Version
+
+import omni.io.LocalStorage
+from omni.io.LocalStorage import TMP_DIR, LocalStorage, clone_file
+from omni.io.utils import get_storage, md5
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorage(
+        auth_options={"root": str(tmp_path / "root")},
+        benchmark="bm",
+        hash_cache=str(tmp_path / "hashes.sqlite"),
+    )
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+
+
+def test_clone_file(tmp_path):
+    write(str(tmp_path / "a.txt"), b"a")
+    os.utime(tmp_path / "a.txt", (0, 1000))
+    method = clone_file(str(tmp_path / "a.txt"), str(tmp_path / "b.txt"))
+    assert method in ["reflink", "hardlink"]
+    assert os.path.getmtime(tmp_path / "b.txt") == 1000
+    method = clone_file(
+        str(tmp_path / "a.txt"), str(tmp_path / "c.txt"), hardlink=False
+    )
+    assert method in ["reflink", "copy"]
+    assert not os.path.samefile(tmp_path / "a.txt", tmp_path / "c.txt")
+
+
+class TestLocalStorage:
+    def test_init(self, storage, tmp_path):
+        assert storage.benchmarks == ["bm"]
+        assert storage.versions == [Version("0.1")]
+        assert storage.other_versions == ["test.1"]
+        assert sorted(os.listdir(tmp_path / "root" / "bm.overview")) == [
+            "0.1",
+            "test.1",
+        ]
+        with pytest.raises(KeyError):
+            LocalStorage(auth_options={}, benchmark="bm")
+
+    def test_get_storage(self, tmp_path):
+        ss = get_storage("local", {"root": str(tmp_path / "root")}, "bm")
+        assert isinstance(ss, LocalStorage)
+
+    def test_upload_and_list(self, storage, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        write("out/file1.txt", b"file1")
+        write("data/D1/default/D1.txt.gz", b"D1")
+        storage.set_current_version()
+        failed = storage.upload_files(
+            ["out/file1.txt", "data/D1/default/D1.txt.gz", "out/missing.txt"]
+        )
+        assert failed == ["out/missing.txt"]
+        storage._get_objects()
+        assert list(storage.files) == ["data/D1/default/D1.txt.gz", "out/file1.txt"]
+        assert storage.files["out/file1.txt"]["hash"] == md5("out/file1.txt")
+        assert storage.files["out/file1.txt"]["size"] == 5
+        storage._get_objects(stage="data")
+        assert list(storage.files) == ["data/D1/default/D1.txt.gz"]
+
+    def test_list_outputs_below_root(self, storage, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        write("out/data/D1/default/D1.txt.gz", b"D1")
+        write("out/data/D1/default/process/P1/a0/D1.txt.gz", b"P1")
+        storage.set_current_version()
+        storage.upload_files(
+            [
+                "out/data/D1/default/D1.txt.gz",
+                "out/data/D1/default/process/P1/a0/D1.txt.gz",
+            ]
+        )
+        storage._get_objects(stage="data", module="D1", root="out")
+        assert list(storage.files) == ["out/data/D1/default/D1.txt.gz"]
+        storage._get_objects(stage="process", root="out")
+        assert list(storage.files) == ["out/data/D1/default/process/P1/a0/D1.txt.gz"]
+
+    def test_upload_rejects_paths_outside_working_directory(
+        self, storage, tmp_path, monkeypatch
+    ):
+        monkeypatch.chdir(tmp_path / "root")
+        write(str(tmp_path / "file1.txt"), b"file1")
+        storage.set_current_version()
+        for filename in [str(tmp_path / "file1.txt"), "../file1.txt"]:
+            with pytest.raises(ValueError):
+                storage.upload_files([filename])
+        assert os.listdir(tmp_path / "root" / "bm.0.1") == []
+
+    def test_objects_stay_in_container(self, storage, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        write("link/file1.txt", b"file1")
+        os.makedirs(tmp_path / "outside")
+        os.symlink(tmp_path / "outside", tmp_path / "root" / "bm.0.1" / "link")
+        storage.set_current_version()
+        assert storage.upload_files(["link/file1.txt"]) == ["link/file1.txt"]
+        assert os.listdir(tmp_path / "outside") == []
+        assert os.listdir(tmp_path / "root" / TMP_DIR) == []
+        with pytest.raises(ValueError):
+            storage._path("bm.0.1", "../bm.0.2/file1.txt")
+
+    def test_upload_failure_removes_tmp_file(self, storage, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        write("file1.txt", b"file1")
+
+        def partial_clone(source, destination, hardlink=True):
+            write(destination, b"fi")
+            raise OSError("No space left on device")
+
+        monkeypatch.setattr(omni.io.LocalStorage, "clone_file", partial_clone)
+        storage.set_current_version()
+        assert storage.upload_files(["file1.txt"]) == ["file1.txt"]
+        assert os.listdir(tmp_path / "root" / TMP_DIR) == []
+
+    def test_create_new_version(self, storage, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        write("file1.txt", b"file1")
+        storage.set_current_version()
+        storage.upload_files(["file1.txt"])
+        storage.create_new_version()
+        assert storage.versions == [Version("0.1"), Version("0.2")]
+        assert "0.2" in os.listdir(tmp_path / "root" / "bm.overview")
+        assert all(storage.files[name]["copied"] for name in storage.files)
+        storage.set_current_version("0.2")
+        storage._get_objects()
+        assert storage.files["file1.txt"]["hash"] == md5("file1.txt")
+
+    def test_copy_objects_symlink(self, storage, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        write("file1.txt", b"file1")
+        storage.set_current_version()
+        storage.upload_files(["file1.txt"])
+        storage.create_new_version(copy_type="symlink")
+        storage.set_current_version("0.2")
+        storage._get_objects()
+        assert storage.files["file1.txt"]["symlink_path"] == "bm.0.1/file1.txt"
+        # symlinks are materialized by copies
+        storage.create_new_version()
+        storage.set_current_version("0.3")
+        storage._get_objects()
+        assert storage.files["file1.txt"]["symlink_path"] == ""
+        assert storage.files["file1.txt"]["hash"] == md5("file1.txt")
+
+    def test_archive_and_delete_version(self, storage, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        write("file1.txt", b"file1")
+        storage.set_current_version()
+        storage.upload_files(["file1.txt"])
+        storage.set_new_version()
+        storage._create_new_version()
+        storage.find_objects_to_copy()
+        storage.copy_objects()
+        path = tmp_path / "root" / "bm.0.2" / "file1.txt"
+        mode = os.stat(path).st_mode
+        storage.archive_version("0.1")
+        assert not os.stat(tmp_path / "root" / "bm.0.1").st_mode & 0o222
+        # copies in other versions, possibly hardlinks, are untouched
+        assert os.stat(path).st_mode == mode
+        assert os.stat(tmp_path / "root" / "bm.0.2").st_mode & 0o200
+        storage.delete_version("0.1")
+        storage.delete_version("0.2")
+        assert storage.versions == []
+        assert os.listdir(tmp_path / "root" / "bm.overview") == ["test.1"]
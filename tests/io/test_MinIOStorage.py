@@ -1,4 +1,5 @@
 import io
+import os
 import sys
 
 import pytest
@@ -35,6 +36,22 @@ class TestMinIOStorage:
             )
             assert ss.benchmark == tmp.bucket_base
 
+    def test_init_lazy_and_ttl(self):
+        with TmpMinIOStorage(minio_testcontainer) as tmp:
+            _ = MinIOStorage(auth_options=tmp.auth_options, benchmark=tmp.bucket_base)
+            ss = MinIOStorage(
+                auth_options=tmp.auth_options_readonly, benchmark=tmp.bucket_base
+            )
+            assert ss._lazy == {}
+            assert ss.versions == [Version("0.1")]
+
+            ws = MinIOStorage(auth_options=tmp.auth_options, benchmark=tmp.bucket_base)
+            ws.client.make_bucket(f"{tmp.bucket_base}.0.2")
+            # served from the bucket snapshot until invalidated
+            assert ws.versions == [Version("0.1")]
+            ws.invalidate()
+            assert ws.versions == [Version("0.1"), Version("0.2")]
+
     def test__test_connect_success_with_valid_endpoint(self):
         with TmpMinIOStorage(minio_testcontainer) as tmp:
             ss = MinIOStorage(auth_options=tmp.auth_options, benchmark=tmp.bucket_base)
@@ -111,6 +128,18 @@ class TestMinIOStorage:
                 all_versions_in_overview.append(element.object_name)
             assert "0.2" not in all_versions_in_overview
 
+    def test__update_overview_add_missing(self):
+        with TmpMinIOStorage(minio_testcontainer) as tmp:
+            ss = MinIOStorage(auth_options=tmp.auth_options, benchmark=tmp.bucket_base)
+            ss.client.remove_object(f"{ss.benchmark}.overview", "0.1")
+            ss.client.remove_object(f"{ss.benchmark}.overview", "test.1")
+            ss._update_overview(cleanup=False)
+            all_versions_in_overview = {
+                element.object_name
+                for element in ss.client.list_objects(f"{ss.benchmark}.overview")
+            }
+            assert all_versions_in_overview == {"0.1", "test.1"}
+
     def test__create_new_version_fail_if_no_version_provided(self):
         with TmpMinIOStorage(minio_testcontainer) as tmp:
             ss = MinIOStorage(auth_options=tmp.auth_options, benchmark=tmp.bucket_base)
@@ -198,6 +227,25 @@ class TestMinIOStorage:
             assert len(ss.files["file1.txt"]["last_modified"]) > 0
             assert len(ss.files["file2.txt"]["last_modified"]) > 0
 
+    def test__get_objects_public_without_meta(self):
+        with TmpMinIOStorage(minio_testcontainer) as tmp:
+            ss = MinIOStorage(auth_options=tmp.auth_options, benchmark=tmp.bucket_base)
+            result = ss.client.put_object(
+                f"{ss.benchmark}.0.1", "file1.txt", io.BytesIO(b""), 0
+            )
+            ss = MinIOStorage(
+                auth_options=tmp.auth_options_readonly, benchmark=tmp.bucket_base
+            )
+            ss.set_current_version()
+            ss._get_objects(meta=False)
+            assert ss.files.keys() == {"file1.txt"}
+            assert ss.files["file1.txt"].keys() == {
+                "hash",
+                "last_modified",
+                "size",
+                "symlink_path",
+            }
+
     def test_find_objects_to_copy(self):
         with TmpMinIOStorage(minio_testcontainer) as tmp:
             ss = MinIOStorage(auth_options=tmp.auth_options, benchmark=tmp.bucket_base)
@@ -254,6 +302,42 @@ class TestMinIOStorage:
             assert ss.files["file1.txt"]["copy"] == True
             assert ss.files["file2.txt"]["copy"] == True
 
+    def test_find_objects_to_copy_predicates(self):
+        with TmpMinIOStorage(minio_testcontainer) as tmp:
+            ss = MinIOStorage(auth_options=tmp.auth_options, benchmark=tmp.bucket_base)
+            for name, content in [("a/file1.txt", b""), ("b/file2.txt", b"file2")]:
+                ss.client.put_object(
+                    f"{ss.benchmark}.0.1", name, io.BytesIO(content), len(content)
+                )
+            ss.set_current_version()
+            ss.find_objects_to_copy(prefix="a/")
+            assert ss.files.flagged("copy") == ["a/file1.txt"]
+            ss.find_objects_to_copy(min_size=1)
+            assert ss.files.flagged("copy") == ["b/file2.txt"]
+            ss.find_objects_to_copy(etags=[ss.files["a/file1.txt"]["hash"]])
+            assert ss.files.flagged("copy") == ["a/file1.txt"]
+
+    def test__get_objects_stage_and_module(self):
+        with TmpMinIOStorage(minio_testcontainer) as tmp:
+            ss = MinIOStorage(auth_options=tmp.auth_options, benchmark=tmp.bucket_base)
+            names = [
+                "data/D1/default/D1.txt.gz",
+                "data/D1/default/process/P1/a0/D1.txt.gz",
+                "data/D2/default/process/P1/a0/D2.txt.gz",
+                "data/D2/default/process/P2/a0/D2.txt.gz",
+            ]
+            for name in names:
+                ss.client.put_object(f"{ss.benchmark}.0.1", name, io.BytesIO(b""), 0)
+            ss.set_current_version()
+            ss._get_objects(stage="process", module="P1")
+            assert list(ss.files) == names[1:3]
+            ss_public = MinIOStorage(
+                auth_options=tmp.auth_options_readonly, benchmark=tmp.bucket_base
+            )
+            ss_public.set_current_version()
+            ss_public._get_objects(meta=False, stage="data")
+            assert list(ss_public.files) == names[:1]
+
     def test_copy_objects(self):
         with TmpMinIOStorage(minio_testcontainer) as tmp:
             ss = MinIOStorage(auth_options=tmp.auth_options, benchmark=tmp.bucket_base)
@@ -267,7 +351,8 @@ class TestMinIOStorage:
             ss.set_new_version()
             ss.find_objects_to_copy()
             ss._create_new_version()
-            ss.copy_objects()
+            failed = ss.copy_objects()
+            assert failed == []
             assert ss.files.keys() == {"file1.txt", "file2.txt"}
             assert ss.files["file1.txt"].keys() == {
                 "hash",
@@ -287,12 +372,75 @@ class TestMinIOStorage:
             }
             assert type(ss.files["file1.txt"]["copied"]) == bool
             assert type(ss.files["file2.txt"]["copied"]) == bool
+            new_objects = ss.client.list_objects(f"{ss.benchmark}.0.2")
+            assert {o.object_name for o in new_objects} == {"file1.txt", "file2.txt"}
+
+            # resume, nothing left to copy
+            assert ss.copy_objects() == []
 
-            with pytest.raises(NotImplementedError):
-                ss.copy_objects(type="symlink")
             with pytest.raises(ValueError):
                 ss.copy_objects(type="other")
 
+    def test_upload_files(self, tmp_path, monkeypatch):
+        with TmpMinIOStorage(minio_testcontainer) as tmp:
+            ss = MinIOStorage(auth_options=tmp.auth_options, benchmark=tmp.bucket_base)
+            ss.set_current_version()
+            monkeypatch.chdir(tmp_path)
+            os.makedirs("out")
+            with open("out/file1.txt", "wb") as f:
+                f.write(b"file1")
+            with open("out/file2.bin", "wb") as f:
+                f.write(os.urandom(6 * 1024**2))
+            os.utime("out/file1.txt", (1700000000, 1700000000))
+
+            failed = ss.upload_files(
+                ["out/file1.txt", "./out/file2.bin", "out/missing.txt"],
+                part_size=5 * 1024**2,
+            )
+            assert failed == ["out/missing.txt"]
+
+            ss._get_objects()
+            assert ss.files.keys() == {"out/file1.txt", "out/file2.bin"}
+            assert ss.files["out/file2.bin"]["hash"].endswith("-2")
+            stat = ss.client.stat_object(f"{ss.benchmark}.0.1", "out/file1.txt")
+            assert float(stat.metadata["x-amz-meta-mtime"]) == 1700000000
+
+    def test_copy_objects_symlink(self):
+        with TmpMinIOStorage(minio_testcontainer) as tmp:
+            ss = MinIOStorage(auth_options=tmp.auth_options, benchmark=tmp.bucket_base)
+            result = ss.client.put_object(
+                f"{ss.benchmark}.0.1", "file1.txt", io.BytesIO(b"file1"), 5
+            )
+            ss.create_new_version("0.2", copy_type="symlink")
+            assert ss.copy_objects(type="symlink") == []
+            assert ss.files["file1.txt"]["copied"] == True
+
+            ss.set_current_version("0.2")
+            ss._get_objects()
+            assert ss.files.keys() == {"file1.txt"}
+            assert (
+                ss.files["file1.txt"]["symlink_path"] == f"{ss.benchmark}.0.1/file1.txt"
+            )
+            assert ss.files["file1.txt"]["size"] == 5
+
+            # symlinks of symlinks point to the original object
+            ss.create_new_version("0.3", copy_type="symlink")
+            ss.set_current_version("0.3")
+            ss._get_objects()
+            assert (
+                ss.files["file1.txt"]["symlink_path"] == f"{ss.benchmark}.0.1/file1.txt"
+            )
+
+            ss = MinIOStorage(
+                auth_options=tmp.auth_options_readonly, benchmark=tmp.bucket_base
+            )
+            ss.set_current_version("0.3")
+            ss._get_objects()
+            assert ss.files.keys() == {"file1.txt"}
+            assert (
+                ss.files["file1.txt"]["symlink_path"] == f"{ss.benchmark}.0.1/file1.txt"
+            )
+
     def test_create_new_version(self):
         with TmpMinIOStorage(minio_testcontainer) as tmp:
             ss = MinIOStorage(auth_options=tmp.auth_options, benchmark=tmp.bucket_base)
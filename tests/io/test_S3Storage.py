@@ -0,0 +1,124 @@
+import os
+import sys
+
+import pytest
+from packaging.version import Version
+
+boto3 = pytest.importorskip("boto3")
+
+from boto3.s3.transfer import TransferConfig
+
+from omni.io.MinIOStorage import MinIOStorage
+from omni.io.S3Storage import S3Storage
+from omni.io.utils import get_storage
+from tests.io.MinIOStorage_setup import MinIOSetup, TmpMinIOStorage
+
+if not sys.platform == "linux":
+    pytest.skip(
+        "for GHA, only works on linux (https://docs.github.com/en/actions/using-containerized-services/about-service-containers#about-service-containers)",
+        allow_module_level=True,
+    )
+
+# setup and start minio container
+minio_testcontainer = MinIOSetup(sys.platform == "linux")
+
+# small parts to test multipart transfers
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=5 * 1024**2, multipart_chunksize=5 * 1024**2
+)
+
+
+class TestS3Storage:
+    def test_init(self):
+        with TmpMinIOStorage(minio_testcontainer) as tmp:
+            ss = get_storage("s3", tmp.auth_options, tmp.bucket_base)
+            assert isinstance(ss, S3Storage)
+            assert ss.versions == [Version("0.1")]
+            assert f"{tmp.bucket_base}.overview" in ss.containers
+            # the benchmark can be read with the minio client
+            ms = MinIOStorage(auth_options=tmp.auth_options, benchmark=tmp.bucket_base)
+            assert ms.versions == [Version("0.1")]
+
+    def test_upload_copy_and_download(self, tmp_path, monkeypatch):
+        with TmpMinIOStorage(minio_testcontainer) as tmp:
+            ss = S3Storage(
+                auth_options=tmp.auth_options,
+                benchmark=tmp.bucket_base,
+                transfer_config=TRANSFER_CONFIG,
+            )
+            monkeypatch.chdir(tmp_path)
+            os.makedirs("out")
+            with open("out/file1.txt", "wb") as f:
+                f.write(b"file1")
+            with open("out/file2.bin", "wb") as f:
+                f.write(os.urandom(12 * 1024**2))
+            ss.set_current_version()
+            failed = ss.upload_files(
+                ["out/file1.txt", "out/file2.bin", "out/missing.txt"]
+            )
+            assert failed == ["out/missing.txt"]
+            ss._get_objects()
+            assert ss.files.keys() == {"out/file1.txt", "out/file2.bin"}
+            assert ss.files["out/file2.bin"]["hash"].endswith("-3")
+
+            ss.set_new_version()
+            ss._create_new_version()
+            ss.find_objects_to_copy()
+            assert ss.copy_objects() == []
+            ss.set_current_version("0.2")
+            ss._get_objects()
+            assert ss.files.keys() == {"out/file1.txt", "out/file2.bin"}
+            stat = ss.client.head_object(
+                Bucket=f"{ss.benchmark}.0.2", Key="out/file2.bin"
+            )
+            assert "mtime" in stat["Metadata"]
+
+            os.makedirs("download")
+            monkeypatch.chdir(tmp_path / "download")
+            assert ss.download_files(["out/file1.txt", "out/file2.bin"]) == []
+            with open("out/file1.txt", "rb") as f:
+                assert f.read() == b"file1"
+            assert os.path.getsize("out/file2.bin") == 12 * 1024**2
+
+    def test_copy_objects_symlink(self):
+        with TmpMinIOStorage(minio_testcontainer) as tmp:
+            ss = S3Storage(auth_options=tmp.auth_options, benchmark=tmp.bucket_base)
+            ss.client.put_object(
+                Bucket=f"{ss.benchmark}.0.1", Key="file1.txt", Body=b"file1"
+            )
+            ss.set_current_version()
+            ss.set_new_version()
+            ss._create_new_version()
+            ss.find_objects_to_copy()
+            assert ss.copy_objects("symlink") == []
+            ss.set_current_version("0.2")
+            ss._get_objects()
+            assert (
+                ss.files["file1.txt"]["symlink_path"] == f"{ss.benchmark}.0.1/file1.txt"
+            )
+
+    def test_copy_objects_missing_source(self):
+        with TmpMinIOStorage(minio_testcontainer) as tmp:
+            ss = S3Storage(
+                auth_options=tmp.auth_options,
+                benchmark=tmp.bucket_base,
+                transfer_config=TRANSFER_CONFIG,
+            )
+            ss.client.put_object(
+                Bucket=f"{ss.benchmark}.0.1", Key="file1.txt", Body=b"file1"
+            )
+            ss.client.put_object(
+                Bucket=f"{ss.benchmark}.0.1", Key="file2.bin", Body=b"file2"
+            )
+            ss.set_current_version()
+            ss._get_objects()
+            # a large object linking to a missing object
+            ss.files["file2.bin"]["size"] = 6 * 1024**2
+            ss.files["file2.bin"]["symlink_path"] = f"{ss.benchmark}.0.1/missing.bin"
+            ss.set_new_version()
+            ss._create_new_version()
+            ss.find_objects_to_copy()
+            assert ss.copy_objects() == ["file2.bin"]
+            assert ss.files["file1.txt"]["copied"]
+            assert not ss.files["file2.bin"]["copied"]
+            assert ss.files["file2.bin"]["copy_error"]
@@ -0,0 +1,114 @@
+import os
+import sys
+
+import pytest
+from packaging.version import Version
+
+swiftclient = pytest.importorskip("swiftclient")
+
+from omni.io.SwiftStorage import SwiftStorage
+from omni.io.utils import get_storage
+from tests.io.SwiftStorage_setup import SwiftSetup, TmpSwiftStorage
+
+if not sys.platform == "linux":
+    pytest.skip(
+        "for GHA, only works on linux (https://docs.github.com/en/actions/using-containerized-services/about-service-containers#about-service-containers)",
+        allow_module_level=True,
+    )
+
+# setup and start swift container
+swift_testcontainer = SwiftSetup(sys.platform == "linux")
+
+# small segments to test segmented large objects
+SEGMENT_SIZE = 1024**2
+
+
+class TestSwiftStorage:
+    def test_init(self):
+        with TmpSwiftStorage(swift_testcontainer) as tmp:
+            ss = get_storage("swift", tmp.auth_options, tmp.bucket_base)
+            assert isinstance(ss, SwiftStorage)
+            assert ss.versions == [Version("0.1")]
+            assert f"{tmp.bucket_base}.overview" in ss.containers
+            assert f"{tmp.bucket_base}.0.1_segments" in ss.containers
+            # the segments containers are no versions
+            assert ss.other_versions == ["test.1"]
+
+    def test_init_readonly(self):
+        with TmpSwiftStorage(swift_testcontainer) as tmp:
+            SwiftStorage(auth_options=tmp.auth_options, benchmark=tmp.bucket_base)
+            ss = SwiftStorage(
+                auth_options=tmp.auth_options_readonly, benchmark=tmp.bucket_base
+            )
+            assert ss.versions == [Version("0.1")]
+
+    @pytest.mark.parametrize("use_slo", [True, False])
+    def test_upload_copy_and_download(self, tmp_path, monkeypatch, use_slo):
+        with TmpSwiftStorage(swift_testcontainer) as tmp:
+            ss = SwiftStorage(
+                auth_options=tmp.auth_options,
+                benchmark=tmp.bucket_base,
+                segment_size=SEGMENT_SIZE,
+                use_slo=use_slo,
+            )
+            monkeypatch.chdir(tmp_path)
+            os.makedirs("out")
+            with open("out/file1.txt", "wb") as f:
+                f.write(b"file1")
+            with open("out/file2.bin", "wb") as f:
+                f.write(os.urandom(3 * SEGMENT_SIZE + 1))
+            ss.set_current_version()
+            failed = ss.upload_files(
+                ["out/file1.txt", "out/file2.bin", "out/missing.txt"]
+            )
+            assert failed == ["out/missing.txt"]
+            ss._get_objects()
+            assert ss.files.keys() == {"out/file1.txt", "out/file2.bin"}
+
+            ss.set_new_version()
+            ss._create_new_version()
+            ss.find_objects_to_copy()
+            assert ss.copy_objects() == []
+            ss.set_current_version("0.2")
+            ss._get_objects()
+            assert ss.files.keys() == {"out/file1.txt", "out/file2.bin"}
+            assert ss.files["out/file2.bin"]["size"] == 3 * SEGMENT_SIZE + 1
+            headers = ss._conn().head_object(f"{ss.benchmark}.0.2", "out/file2.bin")
+            assert "x-object-meta-mtime" in headers
+
+            # the copy has its own segments
+            ss.delete_version("0.1")
+            assert ss.versions == [Version("0.2")]
+            os.makedirs("download")
+            monkeypatch.chdir(tmp_path / "download")
+            assert ss.download_files(["out/file1.txt", "out/file2.bin"]) == []
+            with open("out/file1.txt", "rb") as f:
+                assert f.read() == b"file1"
+            assert os.path.getsize("out/file2.bin") == 3 * SEGMENT_SIZE + 1
+
+    def test_copy_objects_symlink(self):
+        with TmpSwiftStorage(swift_testcontainer) as tmp:
+            ss = SwiftStorage(auth_options=tmp.auth_options, benchmark=tmp.bucket_base)
+            ss._conn().put_object(f"{ss.benchmark}.0.1", "file1.txt", b"file1")
+            ss.set_current_version()
+            ss.set_new_version()
+            ss._create_new_version()
+            ss.find_objects_to_copy()
+            assert ss.copy_objects("symlink") == []
+            ss.set_current_version("0.2")
+            ss._get_objects()
+            assert (
+                ss.files["file1.txt"]["symlink_path"] == f"{ss.benchmark}.0.1/file1.txt"
+            )
+
+    def test_archive_version(self):
+        with TmpSwiftStorage(swift_testcontainer) as tmp:
+            ss = SwiftStorage(auth_options=tmp.auth_options, benchmark=tmp.bucket_base)
+            container = f"{ss.benchmark}.0.1"
+            ss._conn().post_container(
+                container, headers={"X-Container-Write": "test:other"}
+            )
+            ss.archive_version("0.1")
+            assert "x-container-write" not in ss._conn().head_container(container)
+            with pytest.raises(ValueError):
+                ss.archive_version("0.9")
@@ -0,0 +1,100 @@
+import datetime
+import os
+
+from packaging.version import Version
+
+from omni.io.cache import HashCache, ListingCache, listing_fingerprint
+from omni.io.MinIOStorage import MinIOStorage
+
+FILES = {
+    "file1.txt": {
+        "hash": "d41d8cd98f00b204e9800998ecf8427e",
+        "size": 0,
+        "last_modified": "2024-06-20T09:10:11.123Z",
+        "symlink_path": "",
+        "x-object-meta-mtime": datetime.datetime(
+            2024, 6, 20, 9, 10, 11, tzinfo=datetime.timezone.utc
+        ),
+    },
+    "file2.txt": {
+        "hash": "6a204bd89f3c8348afd5c77c717a097a",
+        "size": 8,
+        "last_modified": "2024-06-21T09:10:11.123Z",
+        "symlink_path": "",
+    },
+}
+
+
+class TestListingCache:
+    def test_listing_fingerprint(self):
+        fingerprint = listing_fingerprint(FILES)
+        assert fingerprint["count"] == 2
+        assert fingerprint["newest"] == "2024-06-21T09:10:11.123Z"
+
+        changed = {k: dict(v) for k, v in FILES.items()}
+        changed["file2.txt"]["hash"] = "d41d8cd98f00b204e9800998ecf8427e"
+        assert listing_fingerprint(changed) != fingerprint
+
+    def test_store_and_load(self, tmp_path):
+        cache = ListingCache(cache_dir=str(tmp_path))
+        assert cache.load("http://localhost", "bm.0.1") is None
+
+        cache.store("http://localhost", "bm.0.1", FILES, meta=True)
+        entry = cache.load("http://localhost", "bm.0.1")
+        assert entry["meta"]
+        assert entry["files"] == FILES
+        assert entry["fingerprint"] == listing_fingerprint(FILES)
+        assert cache.is_fresh(entry)
+        assert cache.load("http://localhost", "bm.0.2") is None
+
+        cache.invalidate("http://localhost", "bm.0.1")
+        assert cache.load("http://localhost", "bm.0.1") is None
+
+    def test_get_objects_without_meta_is_not_cached(self, tmp_path):
+        listings = []
+
+        def iter_objects(**kwargs):
+            listings.append(kwargs)
+            return iter(FILES.items())
+
+        ss = MinIOStorage.__new__(MinIOStorage)
+        ss.benchmark = "bm"
+        ss.version = Version("0.1")
+        ss.auth_options = {"endpoint": "http://localhost"}
+        ss.listing_cache = ListingCache(cache_dir=str(tmp_path))
+        ss._iter_objects = iter_objects
+        # newly pushed objects are listed at once
+        ss._get_objects(meta=False, cache=True)
+        ss._get_objects(meta=False, cache=True)
+        assert len(listings) == 2
+        assert ss.listing_cache.load("http://localhost", "bm.0.1") is None
+        assert list(ss.files) == ["file1.txt", "file2.txt"]
+
+    def test_ttl(self, tmp_path):
+        cache = ListingCache(cache_dir=str(tmp_path), ttl=0)
+        cache.store("http://localhost", "bm.0.1", FILES, meta=False)
+        entry = cache.load("http://localhost", "bm.0.1")
+        assert not cache.is_fresh(entry)
+
+
+class TestHashCache:
+    def test_get_and_put(self, tmp_path):
+        fname = tmp_path / "file.txt"
+        fname.write_text("asdfasdf")
+        path = str(tmp_path / "hashes.sqlite")
+        etag = "6a204bd89f3c8348afd5c77c717a097a"
+
+        with HashCache(path) as cache:
+            stat = os.stat(fname)
+            assert cache.get(fname, etag, stat) is None
+            cache.put(fname, etag, stat, etag)
+            assert cache.get(fname, etag, stat) == etag
+            assert cache.get(fname, f"{etag}-2", stat) is None
+
+        # persisted
+        with HashCache(path) as cache:
+            assert cache.get(fname, etag, os.stat(fname)) == etag
+
+            # file changed
+            os.utime(fname, ns=(0, 0))
+            assert cache.get(fname, etag, os.stat(fname)) is None
@@ -0,0 +1,56 @@
+from omni.io.diff import diff_objects, group_name, summarize_diff
+
+
+def record(hash, size):
+    return {"hash": hash, "size": size, "last_modified": "", "symlink_path": ""}
+
+
+OLD = [
+    ("data/D1/a.txt", record("a", 10)),
+    ("data/D1/b.txt", record("b", 20)),
+    ("methods/M1/p1/c.txt", record("c", 30)),
+    ("top.txt", record("t", 1)),
+]
+NEW = [
+    ("data/D1/a.txt", record("a", 10)),
+    ("data/D1/b.txt", record("b2", 25)),
+    ("data/D2/a.txt", record("a", 10)),
+    ("top.txt", record("t", 1)),
+]
+
+
+def test_diff_objects():
+    changes = list(diff_objects(iter(OLD), iter(NEW)))
+    assert [(status, name) for status, name, _, _ in changes] == [
+        ("changed", "data/D1/b.txt"),
+        ("added", "data/D2/a.txt"),
+        ("removed", "methods/M1/p1/c.txt"),
+    ]
+    assert changes[0][2]["size"] == 20
+    assert changes[0][3]["size"] == 25
+
+    assert list(diff_objects(OLD, OLD)) == []
+    assert [c[0] for c in diff_objects([], OLD)] == ["added"] * 4
+    assert [c[0] for c in diff_objects(OLD, [])] == ["removed"] * 4
+
+
+def test_group_name():
+    assert group_name("data/D1/params/file.txt") == "data/D1"
+    # outputs of later stages are nested below their input directory
+    assert group_name("data/D1/params/process/P1/params/file.txt") == "process/P1"
+    assert group_name("data/D1/p/process/P1/p/methods/M1/p/file.txt") == "methods/M1"
+    # outside the output layout
+    assert group_name("data/D1/file.txt") == "data/D1"
+    assert group_name("data/file.txt") == "data"
+    assert group_name("file.txt") == ""
+    # outputs below an output root
+    assert group_name("out/data/D1/params/file.txt", root="out") == "data/D1"
+    assert group_name("out/data/D1/file.txt", root="out") == "out/data/D1"
+
+
+def test_summarize_diff():
+    groups = summarize_diff(diff_objects(OLD, NEW))
+    assert list(groups.keys()) == ["data/D1", "data/D2", "methods/M1"]
+    assert groups["data/D1"] == {"changed": 1, "changed_bytes": 25}
+    assert groups["data/D2"] == {"added": 1, "added_bytes": 10}
+    assert groups["methods/M1"] == {"removed": 1, "removed_bytes": 30}
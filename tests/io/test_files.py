@@ -1,9 +1,15 @@
+import asyncio
+import hashlib
+import io
+import re
 import sys
 
 import pytest
 import requests
+from aiohttp import web
 
 import omni.io.files as oif
+from omni.io.transfer import TransferPolicy
 from omni.io.MinIOStorage import MinIOStorage
 from tests.io.MinIOStorage_setup import MinIOSetup, TmpMinIOStorage
 
@@ -51,3 +57,252 @@ def test_get_benchmark_versions_public():
             versions = oif.get_benchmark_versions_public(
                 "non_existing_benchmark", tmp.auth_options_readonly["endpoint"]
             )
+
+
+@pytest.mark.skipif(
+    sys.platform != "linux", reason="for GHA, skip tests on non Linux platforms"
+)
+def test_iter_benchmark_versions_public():
+    with TmpMinIOStorage(minio_testcontainer) as tmp:
+        _ = MinIOStorage(auth_options=tmp.auth_options, benchmark="bm")
+
+        async def collect():
+            return {
+                benchmark: versions
+                async for benchmark, versions in oif.iter_benchmark_versions_public(
+                    tmp.auth_options_readonly["endpoint"]
+                )
+            }
+
+        benchmarks = asyncio.run(collect())
+        assert "bm" in benchmarks
+        assert benchmarks["bm"] == oif.get_benchmark_versions_public(
+            "bm", tmp.auth_options_readonly["endpoint"]
+        )
+
+
+@pytest.mark.skipif(
+    sys.platform != "linux", reason="for GHA, skip tests on non Linux platforms"
+)
+def test_retrieve_file_resume(tmp_path, monkeypatch):
+    with TmpMinIOStorage(minio_testcontainer) as tmp:
+        ss = MinIOStorage(auth_options=tmp.auth_options, benchmark="bm")
+        content = b"0123456789" * 1000
+        result = ss.client.put_object(
+            "bm.0.1", "out/file.txt", io.BytesIO(content), len(content)
+        )
+        url = f"{tmp.auth_options_readonly['endpoint']}/bm.0.1/out/file.txt"
+        monkeypatch.chdir(tmp_path)
+
+        # interrupted download
+        (tmp_path / "out").mkdir()
+        (tmp_path / "out/file.txt.part").write_bytes(content[:1234])
+        (tmp_path / "out/file.txt.part.etag").write_text(f'"{result.etag}"')
+        headers, md5sum = asyncio.run(oif.retrieve_file(url))
+        assert headers["Content-Range"].startswith("bytes 1234-")
+        assert md5sum == hashlib.md5(content).hexdigest()
+        assert (tmp_path / "out/file.txt").read_bytes() == content
+        assert not (tmp_path / "out/file.txt.part").exists()
+        assert not (tmp_path / "out/file.txt.part.etag").exists()
+
+        # outdated partial download
+        (tmp_path / "out/file.txt.part").write_bytes(b"outdated")
+        (tmp_path / "out/file.txt.part.etag").write_text('"outdated"')
+        asyncio.run(oif.retrieve_file(url))
+        assert (tmp_path / "out/file.txt").read_bytes() == content
+
+
+def test_retrieve_file_ignored_if_range(tmp_path, monkeypatch):
+    content = b"0123456789" * 1000
+    etag = hashlib.md5(content).hexdigest()
+    ranges = []
+
+    async def handle(request):
+        # serves ranges regardless of If-Range
+        ranges.append(request.headers.get("Range"))
+        match = re.match(r"bytes=(\d+)-", request.headers.get("Range", ""))
+        if match is None:
+            return web.Response(body=content, headers={"ETag": f'"{etag}"'})
+        start = int(match.group(1))
+        return web.Response(
+            status=206,
+            body=content[start:],
+            headers={
+                "ETag": f'"{etag}"',
+                "Content-Range": f"bytes {start}-{len(content) - 1}/{len(content)}",
+            },
+        )
+
+    async def retrieve():
+        app = web.Application()
+        app.router.add_get("/{path:.*}", handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            return await oif.retrieve_file(
+                f"http://127.0.0.1:{port}/bm.0.1/out/file.txt"
+            )
+        finally:
+            await runner.cleanup()
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "out").mkdir()
+    # partial download of another object
+    (tmp_path / "out/file.txt.part").write_bytes(b"outdated" * 100)
+    (tmp_path / "out/file.txt.part.etag").write_text('"outdated"\n800')
+    _, md5sum = asyncio.run(retrieve())
+    assert ranges == ["bytes=800-", None]
+    assert md5sum == etag
+    assert (tmp_path / "out/file.txt").read_bytes() == content
+
+    # same ETag, but another size
+    ranges.clear()
+    (tmp_path / "out/file.txt.part").write_bytes(content[:100])
+    (tmp_path / "out/file.txt.part.etag").write_text(f'"{etag}"\n99999')
+    asyncio.run(retrieve())
+    assert ranges == ["bytes=100-", None]
+    assert (tmp_path / "out/file.txt").read_bytes() == content
+
+
+def test_retrieve_file_hedged_deadline(tmp_path, monkeypatch):
+    deadlines = []
+
+    class RecordingPolicy(TransferPolicy):
+        async def run(self, request, deadline=None, hedge=False):
+            deadlines.append(deadline)
+            return await super().run(request, deadline=deadline, hedge=hedge)
+
+    async def handle(request):
+        return web.Response(body=b"file")
+
+    async def retrieve(size):
+        app = web.Application()
+        app.router.add_get("/{path:.*}", handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            async with oif.client_session() as session:
+                return await oif._retrieve_file_hedged(
+                    f"http://127.0.0.1:{port}/bm.0.1/file.txt",
+                    session,
+                    RecordingPolicy(),
+                    size,
+                )
+        finally:
+            await runner.cleanup()
+
+    monkeypatch.chdir(tmp_path)
+    asyncio.run(retrieve(None))
+    asyncio.run(retrieve(4))
+    # no deadline for downloads of unknown size
+    assert deadlines == [None, oif.DOWNLOAD_DEADLINE + 4 / oif.DOWNLOAD_MIN_RATE]
+
+
+@pytest.mark.skipif(
+    sys.platform != "linux", reason="for GHA, skip tests on non Linux platforms"
+)
+def test_get_file(tmp_path, monkeypatch):
+    with TmpMinIOStorage(minio_testcontainer) as tmp:
+        ss = MinIOStorage(auth_options=tmp.auth_options, benchmark="bm")
+        for name in ["file1.txt", "file2.txt"]:
+            ss.client.put_object("bm.0.1", f"out/{name}", io.BytesIO(b"content"), 7)
+        urls = [
+            f"{tmp.auth_options_readonly['endpoint']}/bm.0.1/out/{name}"
+            for name in ["file1.txt", "file2.txt"]
+        ]
+        monkeypatch.chdir(tmp_path)
+
+        assert oif.get_file(urls[0]) == "out/file1.txt"
+        assert oif.get_file(urls) == ["out/file1.txt", "out/file2.txt"]
+        assert (tmp_path / "out/file2.txt").read_bytes() == b"content"
+
+
+@pytest.mark.skipif(
+    sys.platform != "linux", reason="for GHA, skip tests on non Linux platforms"
+)
+def test_sync_files(tmp_path, monkeypatch):
+    with TmpMinIOStorage(minio_testcontainer) as tmp:
+        ss = MinIOStorage(auth_options=tmp.auth_options, benchmark="bm")
+        contents = {"out/file1.txt": b"content1", "out/file2.txt": b"content2"}
+
+        def list_files(*args, **kwargs):
+            return {
+                name: {
+                    "url": f"{tmp.auth_options_readonly['endpoint']}/bm.0.1/{name}",
+                    "size": len(content),
+                    "md5": hashlib.md5(content).hexdigest(),
+                }
+                for name, content in contents.items()
+            }
+
+        for name, content in contents.items():
+            ss.client.put_object("bm.0.1", name, io.BytesIO(content), len(content))
+        monkeypatch.setattr(oif, "list_files", list_files)
+        monkeypatch.chdir(tmp_path)
+
+        downloaded, deleted = oif.sync_files("bm")
+        assert sorted(downloaded) == ["out/file1.txt", "out/file2.txt"]
+        assert deleted == []
+
+        # nothing changed
+        assert oif.sync_files("bm") == ([], [])
+
+        # file1 changed, file2 removed remotely
+        contents["out/file1.txt"] = b"changed"
+        del contents["out/file2.txt"]
+        ss.client.put_object("bm.0.1", "out/file1.txt", io.BytesIO(b"changed"), 7)
+        assert oif.sync_files("bm") == (["out/file1.txt"], [])
+        assert (tmp_path / "out/file2.txt").exists()
+        assert oif.sync_files("bm", delete=True) == ([], ["out/file2.txt"])
+        assert not (tmp_path / "out/file2.txt").exists()
+
+
+@pytest.mark.skipif(
+    sys.platform != "linux", reason="for GHA, skip tests on non Linux platforms"
+)
+def test_sync_files_delete_owned_and_filtered(tmp_path, monkeypatch):
+    with TmpMinIOStorage(minio_testcontainer) as tmp:
+        ss = MinIOStorage(auth_options=tmp.auth_options, benchmark="bm")
+        contents = {
+            "data/D1/default/D1.txt": b"data",
+            "process/P1/a0/P1.txt": b"process",
+            "out/existing.txt": b"existing",
+        }
+
+        def list_files(benchmark, type=None, stage=None, module=None, *args, **kwargs):
+            return {
+                name: {
+                    "url": f"{tmp.auth_options_readonly['endpoint']}/bm.0.1/{name}",
+                    "size": len(content),
+                    "md5": hashlib.md5(content).hexdigest(),
+                }
+                for name, content in contents.items()
+                if (stage is None and module is None)
+                or oif.match_output(name, stage, module)
+            }
+
+        for name, content in contents.items():
+            ss.client.put_object("bm.0.1", name, io.BytesIO(content), len(content))
+        monkeypatch.setattr(oif, "list_files", list_files)
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "out").mkdir()
+        (tmp_path / "out/existing.txt").write_bytes(b"existing")
+
+        downloaded, deleted = oif.sync_files("bm")
+        assert sorted(downloaded) == ["data/D1/default/D1.txt", "process/P1/a0/P1.txt"]
+
+        # outputs of other stages are no candidates of a filtered sync
+        assert oif.sync_files("bm", stage="data", delete=True) == ([], [])
+        assert (tmp_path / "process/P1/a0/P1.txt").exists()
+
+        # files not downloaded by a sync are kept
+        del contents["out/existing.txt"]
+        del contents["process/P1/a0/P1.txt"]
+        assert oif.sync_files("bm", delete=True) == ([], ["process/P1/a0/P1.txt"])
+        assert (tmp_path / "out/existing.txt").exists()
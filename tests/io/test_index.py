@@ -0,0 +1,152 @@
+import datetime
+
+import pytest
+
+from omni.io.index import FileIndex, format_timestamp, parse_timestamp
+
+RECORDS = [
+    (
+        "a/file1.txt",
+        {
+            "hash": "d41d8cd98f00b204e9800998ecf8427e",
+            "size": 0,
+            "last_modified": "2024-06-20T09:10:11.123Z",
+            "symlink_path": "",
+        },
+    ),
+    (
+        "a/file2.bin",
+        {
+            "hash": "6a204bd89f3c8348afd5c77c717a097a-3",
+            "size": 20 * 1024**2,
+            "last_modified": "2024-06-21T09:10:11.000000",
+            "symlink_path": "bm.0.1/a/file2.bin",
+        },
+    ),
+    (
+        "b/file3.txt",
+        {
+            "hash": "not-an-md5",
+            "size": 8,
+            "last_modified": "",
+            "symlink_path": "",
+        },
+    ),
+]
+
+
+def test_parse_and_format_timestamp():
+    ms = parse_timestamp("2024-06-20T09:10:11.123Z")
+    assert format_timestamp(ms) == "2024-06-20T09:10:11.123Z"
+    assert parse_timestamp("2024-06-20T09:10:11.123000") == ms
+    assert parse_timestamp("Thu, 20 Jun 2024 09:10:11 GMT") == ms - 123
+    assert parse_timestamp(ms) == ms
+    utc = datetime.timezone.utc
+    assert (
+        parse_timestamp(datetime.datetime(2024, 6, 20, 9, 10, 11, tzinfo=utc))
+        == ms - 123
+    )
+    assert format_timestamp(parse_timestamp("")) == ""
+
+
+class TestFileIndex:
+    def test_records(self):
+        files = FileIndex(RECORDS)
+        assert files.keys() == {"a/file1.txt", "a/file2.bin", "b/file3.txt"}
+        for name, record in RECORDS:
+            assert files[name].keys() == record.keys()
+        assert files["a/file2.bin"]["hash"] == "6a204bd89f3c8348afd5c77c717a097a-3"
+        assert files["b/file3.txt"]["hash"] == "not-an-md5"
+        assert files["a/file1.txt"]["last_modified"] == "2024-06-20T09:10:11.123Z"
+        assert files["a/file2.bin"]["last_modified"] == "2024-06-21T09:10:11.000Z"
+        assert files["b/file3.txt"]["last_modified"] == ""
+        assert files["a/file2.bin"]["symlink_path"] == "bm.0.1/a/file2.bin"
+        assert "c.txt" not in files
+        with pytest.raises(KeyError):
+            files["c.txt"]
+
+    def test_update_fields(self):
+        files = FileIndex(RECORDS)
+        record = files["a/file1.txt"]
+        record["copy"] = True
+        record["copy_error"] = "failed"
+        mtime = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+        record["x-object-meta-mtime"] = mtime
+        assert files["a/file1.txt"]["copy"] is True
+        assert files["a/file1.txt"]["x-object-meta-mtime"] == mtime
+        assert record.pop("copy_error") == "failed"
+        assert record.get("copied", False) is False
+        assert set(record.keys()) == set(RECORDS[0][1]) | {
+            "copy",
+            "x-object-meta-mtime",
+        }
+        with pytest.raises(KeyError):
+            del record["hash"]
+
+    def test_insert_and_delete(self):
+        files = FileIndex(RECORDS[1:])
+        files[RECORDS[0][0]] = RECORDS[0][1]
+        assert list(files) == [name for name, _ in RECORDS]
+        assert dict(files["a/file1.txt"]) == RECORDS[0][1] | {
+            "last_modified": "2024-06-20T09:10:11.123Z"
+        }
+        del files["a/file2.bin"]
+        assert list(files) == ["a/file1.txt", "b/file3.txt"]
+        assert files["b/file3.txt"]["size"] == 8
+
+    def test_pop(self):
+        files = FileIndex(RECORDS)
+        assert files.pop("a/file2.bin") == RECORDS[1][1] | {
+            "last_modified": "2024-06-21T09:10:11.000Z"
+        }
+        assert list(files) == ["a/file1.txt", "b/file3.txt"]
+        assert files.pop("a/file2.bin", None) is None
+        with pytest.raises(KeyError):
+            files.pop("a/file2.bin")
+        assert files.popitem() == ("b/file3.txt", RECORDS[2][1])
+        assert list(files) == ["a/file1.txt"]
+        # views go stale after deleting their object
+        record = files["a/file1.txt"]
+        del files["a/file1.txt"]
+        with pytest.raises(KeyError):
+            dict(record)
+        with pytest.raises(KeyError):
+            files.popitem()
+
+    def test_select(self):
+        files = FileIndex(RECORDS)
+        assert files.select(prefix="a/") == ["a/file1.txt", "a/file2.bin"]
+        assert files.select(prefix="a/file2") == ["a/file2.bin"]
+        assert files.select(prefix="c") == []
+        assert files.select(min_size=1) == ["a/file2.bin", "b/file3.txt"]
+        assert files.select(max_size=8) == ["a/file1.txt", "b/file3.txt"]
+        june21 = datetime.datetime(2024, 6, 21, tzinfo=datetime.timezone.utc)
+        # objects without time are older than any time
+        assert files.select(modified_before=june21) == ["a/file1.txt", "b/file3.txt"]
+        assert files.select(modified_after=june21) == ["a/file2.bin"]
+        assert files.select(
+            etags=['"6a204bd89f3c8348afd5c77c717a097a-3"', "not-an-md5"]
+        ) == ["a/file2.bin", "b/file3.txt"]
+        assert files.select(prefix="a/", max_size=8, etags=["not-an-md5"]) == []
+
+    def test_select_by_mtime(self):
+        files = FileIndex(RECORDS)
+        june = datetime.datetime(2024, 6, 1, tzinfo=datetime.timezone.utc)
+        files["a/file2.bin"]["x-object-meta-mtime"] = june
+        june20 = datetime.datetime(2024, 6, 20, tzinfo=datetime.timezone.utc)
+        assert files.select(modified_before=june20) == ["a/file2.bin", "b/file3.txt"]
+
+    def test_set_flag(self):
+        files = FileIndex(RECORDS)
+        files.set_flag("copy", ["a/file2.bin"])
+        assert [files[name]["copy"] for name in files] == [False, True, False]
+        assert files.flagged("copy") == ["a/file2.bin"]
+        assert files.flagged("copy", False) == ["a/file1.txt", "b/file3.txt"]
+
+    def test_columns(self):
+        files = FileIndex(RECORDS)
+        files["a/file1.txt"]["copied"] = False
+        restored = FileIndex.from_columns(files.to_columns())
+        assert list(restored) == list(files)
+        for name in files:
+            assert dict(restored[name]) == dict(files[name])
@@ -0,0 +1,101 @@
+import threading
+
+from omni.io.layout import match_output, output_parts, walk_outputs
+
+KEYS = [
+    "benchmark.yaml",
+    "data/D1/default/D1.txt.gz",
+    "data/D1/default/D1.meta.json",
+    "data/D1/default/process/P1/a0/D1.txt.gz",
+    "data/D1/default/process/P1/a0/methods/M1/default/D1.model.out.gz",
+    "data/D1/default/process/P2/a0/D1.txt.gz",
+    "data/D2/default/D2.txt.gz",
+    "data/D2/default/process/P1/a0/D2.txt.gz",
+]
+
+
+class Listing:
+    """Delimited listing of KEYS, recording the listed prefixes."""
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.listed = []
+        self.lock = threading.Lock()
+
+    def __call__(self, prefix):
+        with self.lock:
+            self.listed.append(prefix)
+        objects = []
+        prefixes = []
+        for key in self.keys:
+            if not key.startswith(prefix):
+                continue
+            rest = key[len(prefix) :]
+            if "/" in rest:
+                subprefix = prefix + rest.split("/")[0] + "/"
+                if subprefix not in prefixes:
+                    prefixes.append(subprefix)
+            else:
+                objects.append({"key": key})
+        return objects, prefixes
+
+
+def test_match_output():
+    assert match_output("data/D1/default/D1.txt.gz", stage="data", module="D1")
+    assert not match_output("data/D1/default/D1.txt.gz", stage="process")
+    assert match_output("data/D1/default/process/P1/a0/D1.txt.gz", module="P1")
+    assert not match_output("data/D1/default/process/P1/a0/D1.txt.gz", module="D1")
+    assert match_output("data/D1/default/D1.meta.json", file_id="*.meta.json")
+    assert not match_output("data/D1/default/D1.txt.gz", file_id="*.meta.json")
+    assert not match_output("benchmark.yaml")
+    assert not match_output("data/D1/D1.txt.gz")
+
+
+def test_walk_outputs_stage_and_module():
+    listing = Listing(KEYS)
+    records = walk_outputs(listing, stage="process", module="P1")
+    assert [r["key"] for r in records] == [
+        "data/D1/default/process/P1/a0/D1.txt.gz",
+        "data/D2/default/process/P1/a0/D2.txt.gz",
+    ]
+    # the other modules of the stage and nested stages are not listed
+    assert not any("P2" in prefix or "methods" in prefix for prefix in listing.listed)
+
+
+def test_walk_outputs_initial_stage():
+    listing = Listing(KEYS)
+    records = walk_outputs(listing, stage="data", module="D1")
+    assert [r["key"] for r in records] == [
+        "data/D1/default/D1.meta.json",
+        "data/D1/default/D1.txt.gz",
+    ]
+    assert sorted(listing.listed) == ["", "data/D1/", "data/D1/default/"]
+
+
+def test_walk_outputs_matches_filter():
+    for stage, module in [("methods", None), (None, "P1"), ("process", None)]:
+        records = walk_outputs(Listing(KEYS), stage=stage, module=module)
+        assert [r["key"] for r in records] == sorted(
+            key for key in KEYS if match_output(key, stage, module)
+        )
+
+
+def test_output_root():
+    assert match_output("out/data/D1/default/D1.txt.gz", stage="data", root="out")
+    assert match_output("out/data/D1/default/D1.txt.gz", stage="data", root="out/")
+    assert not match_output("out/data/D1/default/D1.txt.gz", stage="data")
+    assert not match_output("data/D1/default/D1.txt.gz", root="out")
+    assert output_parts("out/data/D1/default/D1.txt.gz", "out") == [
+        "data",
+        "D1",
+        "default",
+        "D1.txt.gz",
+    ]
+    keys = ["out.txt"] + [f"out/{key}" for key in KEYS]
+    for stage, module in [("data", "D1"), ("process", "P1"), ("methods", None)]:
+        listing = Listing(keys)
+        records = walk_outputs(listing, stage=stage, module=module, root="out")
+        assert [r["key"] for r in records] == sorted(
+            f"out/{key}" for key in KEYS if match_output(key, stage, module)
+        )
+        assert "" not in listing.listed
@@ -0,0 +1,67 @@
+from omni.io.listing import ListingParser, encode_query
+
+PAGE = b"""<?xml version="1.0" encoding="UTF-8"?>
+<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">
+<Name>bm.0.1</Name><KeyCount>2</KeyCount><MaxKeys>2</MaxKeys>
+<IsTruncated>true</IsTruncated>
+<Contents><Key>file1.txt</Key><LastModified>2024-06-20T09:10:11.123Z</LastModified>
+<ETag>&quot;d41d8cd98f00b204e9800998ecf8427e&quot;</ETag><Size>0</Size></Contents>
+<Contents><Key>file2.txt</Key><LastModified>2024-06-20T09:10:12.123Z</LastModified>
+<ETag>&quot;6a204bd89f3c8348afd5c77c717a097a&quot;</ETag><Size>8</Size></Contents>
+<NextContinuationToken>token</NextContinuationToken>
+</ListBucketResult>"""
+
+
+class TestListingParser:
+    def test_parse_page_in_chunks(self):
+        parser = ListingParser()
+        records = []
+        for i in range(0, len(PAGE), 7):
+            records.extend(parser.feed(PAGE[i : i + 7]))
+        records.extend(parser.close())
+
+        assert [r["key"] for r in records] == ["file1.txt", "file2.txt"]
+        assert records[0]["hash"] == "d41d8cd98f00b204e9800998ecf8427e"
+        assert records[1]["size"] == 8
+        # 2024-06-20T09:10:12.123Z
+        assert records[1]["last_modified"] == 1718874612123
+        assert records[1]["symlink_path"] == ""
+        assert parser.is_truncated
+        assert parser.continuation_token == "token"
+        assert parser.last_key == "file2.txt"
+
+    def test_parse_empty_page(self):
+        parser = ListingParser()
+        records = list(
+            parser.feed(
+                b'<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">'
+                b"<IsTruncated>false</IsTruncated></ListBucketResult>"
+            )
+        )
+        records.extend(parser.close())
+        assert records == []
+        assert not parser.is_truncated
+
+
+def test_encode_query():
+    params = {"prefix": "a dir/ü+", "list-type": "2", "delimiter": ""}
+    assert encode_query(params) == "delimiter=&list-type=2&prefix=a%20dir%2F%C3%BC%2B"
+
+
+def test_parse_common_prefixes():
+    parser = ListingParser()
+    records = list(
+        parser.feed(
+            b'<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">'
+            b"<Prefix>data/</Prefix><Delimiter>/</Delimiter>"
+            b"<IsTruncated>false</IsTruncated>"
+            b"<Contents><Key>data/file1.txt</Key><Size>1</Size></Contents>"
+            b"<CommonPrefixes><Prefix>data/D1/</Prefix></CommonPrefixes>"
+            b"<CommonPrefixes><Prefix>data/D2/</Prefix></CommonPrefixes>"
+            b"</ListBucketResult>"
+        )
+    )
+    records.extend(parser.close())
+    assert records[0]["key"] == "data/file1.txt"
+    assert records[1:] == [{"prefix": "data/D1/"}, {"prefix": "data/D2/"}]
+    assert parser.last_key == "data/D2/"
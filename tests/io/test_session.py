@@ -0,0 +1,46 @@
+import asyncio
+
+import certifi
+
+import omni.io.session as ois
+
+
+def test_get_session_is_shared():
+    assert ois.get_session() is ois.get_session()
+    assert ois.get_pool_manager() is ois.get_pool_manager()
+
+
+def test_pool_manager_verifies_certificates(monkeypatch):
+    monkeypatch.delenv("SSL_CERT_FILE", raising=False)
+    ois.close()
+    try:
+        pool_kw = ois.get_pool_manager().connection_pool_kw
+        assert pool_kw["cert_reqs"] == "CERT_REQUIRED"
+        assert pool_kw["ca_certs"] == certifi.where()
+
+        monkeypatch.setenv("SSL_CERT_FILE", "/etc/ssl/custom.pem")
+        ois.close()
+        pool_kw = ois.get_pool_manager().connection_pool_kw
+        assert pool_kw["ca_certs"] == "/etc/ssl/custom.pem"
+    finally:
+        ois.close()
+
+
+def test_configure_resets_sessions():
+    session = ois.get_session()
+    connect_timeout = ois.CONNECT_TIMEOUT
+    try:
+        ois.configure(connect_timeout=1, max_connections_per_host=4)
+        assert ois.get_session() is not session
+        adapter = ois.get_session().get_adapter("https://localhost")
+        assert adapter._pool_maxsize == 4
+    finally:
+        ois.configure(connect_timeout=connect_timeout, max_connections_per_host=32)
+
+
+def test_client_session_limits():
+    async def create():
+        async with ois.client_session() as session:
+            return session.connector.limit_per_host
+
+    assert asyncio.run(create()) == ois.MAX_CONNECTIONS_PER_HOST
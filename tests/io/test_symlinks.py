@@ -0,0 +1,103 @@
+import asyncio
+import io
+
+import urllib3
+from packaging.version import Version
+
+import omni.io.transfer
+from omni.io.index import FileIndex
+from omni.io.MinIOStorage import MinIOStorage
+from omni.io.symlinks import (
+    SYMLINK_MANIFEST,
+    merge_symlinks,
+    merge_symlinks_async,
+    read_manifest,
+    write_manifest,
+)
+
+LINKS = [
+    {
+        "key": "a.txt",
+        "symlink_path": "bm.0.1/a.txt",
+        "hash": "d41d8cd98f00b204e9800998ecf8427e",
+        "size": 0,
+        "last_modified": "2024-06-20T09:10:11.123Z",
+    },
+    {
+        "key": "c/d.txt",
+        "symlink_path": "bm.0.1/c/d.txt",
+        "hash": "d41d8cd98f00b204e9800998ecf8427e",
+        "size": 0,
+        "last_modified": "2024-06-20T09:10:11.123Z",
+    },
+]
+
+
+def test_write_and_read_manifest():
+    file = io.BytesIO()
+    length = write_manifest(LINKS, file)
+    content = file.getvalue()
+    assert length == len(content)
+
+    chunks = [content[i : i + 5] for i in range(0, len(content), 5)]
+    assert list(read_manifest(chunks)) == LINKS
+
+
+def test_merge_symlinks():
+    objects = [
+        {"key": SYMLINK_MANIFEST},
+        {"key": "a.txt", "symlink_path": ""},
+        {"key": "b.txt", "symlink_path": ""},
+    ]
+    merged = list(merge_symlinks(objects, LINKS))
+    assert [m["key"] for m in merged] == ["a.txt", "b.txt", "c/d.txt"]
+    # objects shadow symlinks
+    assert merged[0]["symlink_path"] == ""
+    assert merged[2]["symlink_path"] == "bm.0.1/c/d.txt"
+
+
+def test_merge_symlinks_async():
+    objects = [
+        {"key": SYMLINK_MANIFEST},
+        {"key": "a.txt", "symlink_path": ""},
+        {"key": "b.txt", "symlink_path": ""},
+    ]
+
+    async def listing():
+        for obj in objects:
+            yield obj
+
+    async def merge():
+        return [m async for m in merge_symlinks_async(listing(), LINKS)]
+
+    merged = asyncio.run(merge())
+    assert merged == list(merge_symlinks(objects, LINKS))
+
+
+class FlakyClient:
+    """Client failing the first `put_object`, keeping the bodies it was sent."""
+
+    def __init__(self):
+        self.bodies = []
+
+    def put_object(self, bucket, name, data, length):
+        self.bodies.append(data.read(length))
+        if len(self.bodies) == 1:
+            raise urllib3.exceptions.ProtocolError("connection reset")
+
+
+def test_copy_objects_symlink_retry(monkeypatch):
+    monkeypatch.setattr(omni.io.transfer.time, "sleep", lambda delay: None)
+    ss = MinIOStorage.__new__(MinIOStorage)
+    ss.benchmark = "bm"
+    ss.version = Version("0.1")
+    ss.version_new = Version("0.2")
+    ss.client = FlakyClient()
+    ss.files = FileIndex(
+        (link["key"], dict(link, symlink_path="", copy=True)) for link in LINKS
+    )
+    assert ss.copy_objects("symlink") == []
+    first, retried = ss.client.bodies
+    # the retry writes the whole manifest again
+    assert len(first) > 0 and retried == first
+    assert [link["key"] for link in read_manifest([retried])] == ["a.txt", "c/d.txt"]
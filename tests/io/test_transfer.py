@@ -0,0 +1,174 @@
+import asyncio
+import threading
+import time
+
+import pytest
+import urllib3
+
+from omni.io.transfer import (
+    AdaptiveLimiter,
+    ByteBudget,
+    CountingRetry,
+    TransferPolicy,
+    backoff_delay,
+    retry,
+    stats,
+)
+
+
+class Flaky:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self, value):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("flaky")
+        return value
+
+
+def test_retry_success_after_failures():
+    func = Flaky(2)
+    assert retry(func, 1, retries=2, backoff=0) == 1
+    assert func.calls == 3
+
+
+def test_retry_fails_after_retries():
+    func = Flaky(3)
+    with pytest.raises(ConnectionError):
+        retry(func, 1, retries=2, backoff=0)
+    assert func.calls == 3
+
+
+def test_retry_does_not_retry_other_exceptions():
+    func = Flaky(1)
+    with pytest.raises(ConnectionError):
+        retry(func, 1, retries=2, backoff=0, exceptions=(ValueError,))
+    assert func.calls == 1
+
+
+def test_byte_budget():
+    budget = ByteBudget(10)
+    # larger than the limit, capped
+    with budget.reserve(100) as nbytes:
+        assert nbytes == 10
+        assert budget.available == 0
+    assert budget.available == 10
+
+    nbytes = budget.acquire(6)
+    acquired = threading.Event()
+
+    def blocked():
+        budget.release(budget.acquire(6))
+        acquired.set()
+
+    thread = threading.Thread(target=blocked)
+    thread.start()
+    time.sleep(0.05)
+    assert not acquired.is_set()
+    budget.release(nbytes)
+    thread.join(timeout=1)
+    assert acquired.is_set()
+    assert budget.available == 10
+
+
+def test_adaptive_limiter():
+    async def run():
+        limiter = AdaptiveLimiter(4, initial=2)
+        await limiter.acquire()
+        await limiter.acquire()
+        assert limiter.active == 2
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(limiter.acquire(), timeout=0.05)
+
+        # a full round without throughput loss raises the limit
+        await limiter.release(1000)
+        await limiter.release(1000)
+        assert limiter.limit == 3
+
+        # errors halve the limit
+        await limiter.acquire()
+        await limiter.release(error=True)
+        assert limiter.limit == 1
+        assert limiter.active == 0
+
+    asyncio.run(run())
+
+
+def test_backoff_delay():
+    assert backoff_delay(0, backoff=1, jitter=0) == 1
+    assert backoff_delay(3, backoff=1, jitter=0) == 8
+    assert backoff_delay(10, backoff=1, max_backoff=30, jitter=0) == 30
+    assert 0.5 <= backoff_delay(0, backoff=1, jitter=0.5) <= 1
+
+
+class TestTransferPolicy:
+    def test_retry(self):
+        calls = []
+
+        async def request(hedged):
+            calls.append(hedged)
+            if len(calls) < 3:
+                raise ConnectionError("failed")
+            return "done"
+
+        policy = TransferPolicy(retries=3, backoff=0)
+        assert asyncio.run(policy.run(request)) == "done"
+        assert calls == [False, False, False]
+
+        calls.clear()
+        policy = TransferPolicy(retries=3, backoff=0, retryable=lambda e: False)
+        with pytest.raises(ConnectionError):
+            asyncio.run(policy.run(request))
+        assert len(calls) == 1
+
+    def test_deadline(self):
+        async def request(hedged):
+            await asyncio.sleep(1)
+
+        stats.reset()
+        policy = TransferPolicy(retries=1, backoff=0, deadline=0.01)
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(policy.run(request))
+        assert stats.snapshot()["timeouts"] == 2
+        assert stats.snapshot()["retries"] == 1
+
+    def test_hedge(self):
+        cancelled = []
+
+        async def request(hedged):
+            try:
+                await asyncio.sleep(0 if hedged else 1)
+            except asyncio.CancelledError:
+                cancelled.append(hedged)
+                raise
+            return hedged
+
+        stats.reset()
+        policy = TransferPolicy(hedge_quantile=0.5)
+        policy.latencies.extend([0.01] * 20)
+        assert policy.hedge_delay() == 0.01
+        # the hedged request wins, the first one is cancelled
+        assert asyncio.run(policy.run(request)) is True
+        assert cancelled == [False]
+        assert stats.snapshot()["hedges"] == 1
+        assert stats.snapshot()["hedge_wins"] == 1
+
+
+def test_counting_retry():
+    stats.reset()
+    retry = CountingRetry(total=2, redirect=1)
+    error = urllib3.exceptions.ProtocolError("connection reset")
+    retry = retry.increment("GET", "/", error=error)
+    retry = retry.increment("GET", "/", error=error)
+    # retries are exhausted, the last call raises and is no retry
+    with pytest.raises(urllib3.exceptions.MaxRetryError):
+        retry.increment("GET", "/", error=error)
+    assert stats.snapshot()["retries"] == 2
+
+    stats.reset()
+    response = urllib3.HTTPResponse(status=302, headers={"Location": "/other"})
+    CountingRetry(total=2, redirect=1).increment("GET", "/", response=response)
+    assert stats.snapshot().get("retries", 0) == 0
+    assert stats.snapshot()["redirects"] == 1
@@ -1,3 +1,4 @@
+import hashlib
 import os
 import sys
 
@@ -26,12 +27,14 @@ def test_get_storage():
         )
         assert isinstance(ss, omni.io.MinIOStorage.MinIOStorage)
 
+        # versions are loaded on first access
+        ss = oiu.get_storage(
+            storage_type="minio",
+            auth_options=tmp.auth_options_readonly,
+            benchmark="not_existing_benchmark",
+        )
         with pytest.raises(requests.exceptions.HTTPError):
-            ss = oiu.get_storage(
-                storage_type="minio",
-                auth_options=tmp.auth_options_readonly,
-                benchmark="not_existing_benchmark",
-            )
+            ss.versions
 
 
 def cleanup_md5():
@@ -54,6 +57,40 @@ def test_md5():
         oiu.md5("not_existing_file.txt")
 
 
+def test_etag_multipart(tmp_path):
+    part_size = 5 * 1024**2
+    content = os.urandom(2 * part_size + 1234)
+    fname = tmp_path / "multipart.bin"
+    fname.write_bytes(content)
+    digests = [
+        hashlib.md5(content[i : i + part_size]).digest()
+        for i in range(0, len(content), part_size)
+    ]
+    etag = f'"{hashlib.md5(b"".join(digests)).hexdigest()}-3"'
+
+    assert oiu.parse_etag(etag) == (etag[1:-3], 3)
+    assert part_size in oiu.part_sizes(len(content), 3)
+    assert oiu.verify_etag(fname, etag)
+    assert oiu.verify_etag(fname, etag, part_size=part_size)
+    assert not oiu.verify_etag(fname, etag, part_size=8 * 1024**2)
+    assert oiu.file_etag(fname, etag) == etag.strip('"')
+
+    hasher = oiu.ETagHasher(part_size)
+    for i in range(0, len(content), 1000_000):
+        hasher.update(content[i : i + 1000_000])
+    assert hasher.hexdigest() == etag.strip('"')
+
+    fname.write_bytes(content[:-1] + b"x")
+    assert not oiu.verify_etag(fname, etag)
+
+
+def test_etag_single_part(tmp_path):
+    fname = tmp_path / "single.txt"
+    fname.write_bytes(b"asdfasdf")
+    assert oiu.verify_etag(fname, '"6a204bd89f3c8348afd5c77c717a097a"')
+    assert oiu.file_etag(fname, "") == "6a204bd89f3c8348afd5c77c717a097a"
+
+
 def test_sizeof_fmt():
     assert oiu.sizeof_fmt(0) == "    0B"
     assert oiu.sizeof_fmt(1) == "    1B"